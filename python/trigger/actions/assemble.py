@@ -114,9 +114,20 @@ class Assemble(ActionCore):
 
         def update_all():
             row_count = alembic_paths_listbox.viewWidget.count()
-            for row_nmb in range(row_count):
-                item = alembic_paths_listbox.viewWidget.item(row_nmb)
-                color_update(item)
+            items = [
+                alembic_paths_listbox.viewWidget.item(row_nmb)
+                for row_nmb in range(row_count)
+            ]
+            file_paths = [os.path.normpath(str(item.text())) for item in items]
+            # one directory listing for all paths
+            latest_versions = naming.get_latest_versions(file_paths)
+            for item, file_path, latest in zip(items, file_paths, latest_versions):
+                if not os.path.isfile(file_path):
+                    item.setForeground(QtGui.QColor(255, 0, 0, 255))
+                elif latest == naming.resolve_version(file_path):
+                    item.setForeground(QtGui.QColor(0, 255, 0, 255))
+                else:
+                    item.setForeground(QtGui.QColor(255, 255, 0, 255))
 
         update_all()
 
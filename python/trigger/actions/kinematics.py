@@ -1,5 +1,7 @@
 """Builds the kinematics starting from the given root and for all descendants"""
 import os
+import time
+
 from maya import cmds
 from trigger.core import filelog
 from trigger.core.action import ActionCore
@@ -10,6 +12,8 @@ from trigger.core.compatibility import is_string
 from trigger.library import functions, naming, joint
 from trigger.library import attribute
 from trigger.library import api
+from trigger.library import arithmetic
+from trigger.library import graph_builder
 
 from trigger.base import session
 
@@ -31,6 +35,8 @@ ACTION_DATA = {
     "extra_switchers": [],  # list of dictionaries?
     "after_creation": 2,  # 0=nothing 1=hide 2=delete
     "multi_selectionSets": False,
+    "batch_node_creation": False,
+    "cache_expressions": False,
 }
 
 
@@ -48,10 +54,12 @@ class Kinematics(ActionCore):
         self.autoSwitchers = create_switchers
         self.root_joints = root_joints if type(root_joints) == list else [root_joints]
         self.module_dict = {
-            module_name: data["guide"].limb_data
-            for module_name, data in modules.class_data.items()
+            module_name: modules.class_data.get_data(module_name)
+            for module_name in modules.class_data
         }
 
+        # joint type lookups for the identify functions
+        self.limb_type_map = joint.get_limb_type_map(self.module_dict)
         self.validRootList = [
             values["members"][0] for values in self.module_dict.values()
         ]
@@ -68,6 +76,11 @@ class Kinematics(ActionCore):
         self.totalDefJoints = []
         self.afterlife = 2  # valid values are keep=0, hide=1, delete=2
         self.multi_selectionSets = False
+        # queue the nodes of each limb and create them with a single command
+        self.batchNodeCreation = False
+        self.limbCreationTime = 0.0
+        # fold the constant arithmetic and reuse identical operations
+        self.cacheExpressions = False
         self.guides_file_path = None
         self.limbCreationList = []
         self.rootGroup = None
@@ -84,8 +97,19 @@ class Kinematics(ActionCore):
         self.extraSwitchers = action_data.get("extra_switchers")
         self.afterlife = action_data.get("after_creation")
         self.multi_selectionSets = action_data.get("multi_selectionSets", False)
+        self.batchNodeCreation = action_data.get("batch_node_creation", False)
+        self.cacheExpressions = action_data.get("cache_expressions", False)
 
     def action(self):
+        if not self.cacheExpressions:
+            self.create_rig()
+            return
+        with arithmetic.ExpressionCache() as cache:
+            self.create_rig()
+        cache.report()
+
+    def create_rig(self):
+        """Create the limbs of all root joints."""
         root_grp = "trigger_grp"
         if self.guides_file_path:
             guides_handler = session.Session()
@@ -112,6 +136,10 @@ class Kinematics(ActionCore):
                 cmds.hide(root_joint)
             elif self.afterlife == 2:  # delete guides
                 functions.delete_object(root_joint)
+        log.info(
+            "Limbs created in %.2f seconds (batch node creation: %s)"
+            % (self.limbCreationTime, self.batchNodeCreation)
+        )
 
     def save_action(self, *args, **kwargs):
         """Mandatory Method"""
@@ -157,12 +185,29 @@ class Kinematics(ActionCore):
         multi_selection_sets_cb = QtWidgets.QCheckBox()
         layout.addRow(multi_selection_sets_lbl, multi_selection_sets_cb)
 
+        batch_node_creation_lbl = QtWidgets.QLabel(text="Batch Node Creation")
+        batch_node_creation_cb = QtWidgets.QCheckBox()
+        batch_node_creation_cb.setToolTip(
+            "Create the utility nodes of each limb with a single command"
+        )
+        layout.addRow(batch_node_creation_lbl, batch_node_creation_cb)
+
+        cache_expressions_lbl = QtWidgets.QLabel(text="Cache Expressions")
+        cache_expressions_cb = QtWidgets.QCheckBox()
+        cache_expressions_cb.setToolTip(
+            "Compute the constant arithmetic and reuse the identical operations"
+            " instead of creating new nodes"
+        )
+        layout.addRow(cache_expressions_lbl, cache_expressions_cb)
+
         # make connections with the controller object
         ctrl.connect(file_path_le, "guides_file_path", str)
         ctrl.connect(guide_roots_le, "guide_roots", list)
         ctrl.connect(create_auto_sw_cb, "auto_switchers", bool)
         ctrl.connect(after_action_combo, "after_creation", int)
         ctrl.connect(multi_selection_sets_cb, "multi_selectionSets", bool)
+        ctrl.connect(batch_node_creation_cb, "batch_node_creation", bool)
+        ctrl.connect(cache_expressions_cb, "cache_expressions", bool)
 
         ctrl.update_ui()
 
@@ -206,6 +251,8 @@ class Kinematics(ActionCore):
         create_auto_sw_cb.stateChanged.connect(lambda x=0: ctrl.update_model())
         after_action_combo.currentIndexChanged.connect(lambda x=0: ctrl.update_model())
         multi_selection_sets_cb.stateChanged.connect(lambda x=0: ctrl.update_model())
+        batch_node_creation_cb.stateChanged.connect(lambda x=0: ctrl.update_model())
+        cache_expressions_cb.stateChanged.connect(lambda x=0: ctrl.update_model())
 
     def collect_guides_info(self, root_node):
         """
@@ -220,8 +267,10 @@ class Kinematics(ActionCore):
         all_joints = cmds.listRelatives(root_node, type="joint", allDescendents=True)
         all_joints = [] if not all_joints else all_joints
         # all_fingers = []
-        for jnt in all_joints:
-            limb_name, limb_type, limb_side = joint.identify(jnt, self.module_dict)
+        identities = joint.identify_many(
+            all_joints, self.module_dict, self.limb_type_map
+        )
+        for jnt, (limb_name, limb_type, limb_side) in zip(all_joints, identities):
             if limb_name == "Hip" and limb_side == "L":
                 l_hip = jnt
             if limb_name == "Hip" and limb_side == "R":
@@ -240,7 +289,9 @@ class Kinematics(ActionCore):
             else self.shoulderDist
         )
 
-    def get_limb_hierarchy(self, node, is_root=True, parent_index=None, r_list=None):
+    def get_limb_hierarchy(
+        self, node, is_root=True, parent_index=None, r_list=None, identities=None
+    ):
         """Checks the given nodes entire hieararchy for roots, and catalogues the root nodes into dictionaries.
 
         Args:
@@ -248,14 +299,20 @@ class Kinematics(ActionCore):
             is_root(bool): if True, the given joint is considered as true. Default is True. For recursion.
             parent_index(string): indicates the parent of the current node. Default is none. For recursion.
             r_list(list): If a list is provided, it appends the results into this one. For recursion
+            identities(dict): joint.identify_hierarchy result of the top node. For recursion
 
         Returns (list): list of root guide nodes in the hierarchy
 
         """
         if not r_list:
             r_list = []
+        if identities is None:
+            # identify the whole hierarchy once
+            identities = joint.identify_hierarchy(
+                node, self.module_dict, self.limb_type_map
+            )
         if is_root:
-            limb_props = self.get_whole_limb(node)
+            limb_props = self.get_whole_limb(node, identities=identities)
             limb_props.append(parent_index)
             r_list.append(limb_props)
 
@@ -263,16 +320,24 @@ class Kinematics(ActionCore):
         children = cmds.listRelatives(node, children=True, type="joint")
         children = children if children else []
         for jnt in children:
-            c_id = joint.identify(jnt, self.module_dict)
+            c_id = identities.get(jnt) or joint.identify(
+                jnt, self.module_dict, self.limb_type_map
+            )
             if c_id[0] in self.validRootList:
                 self.get_limb_hierarchy(
-                    jnt, is_root=True, parent_index=node, r_list=r_list
+                    jnt,
+                    is_root=True,
+                    parent_index=node,
+                    r_list=r_list,
+                    identities=identities,
                 )
             else:
-                self.get_limb_hierarchy(jnt, is_root=False, r_list=r_list)
+                self.get_limb_hierarchy(
+                    jnt, is_root=False, r_list=r_list, identities=identities
+                )
         return r_list
 
-    def get_whole_limb(self, node):
+    def get_whole_limb(self, node, identities=None):
         multi_guide_jnts = [
             value["multi_guide"]
             for value in self.module_dict.values()
@@ -280,7 +345,13 @@ class Kinematics(ActionCore):
         ]
         limb_dict = {}
         multi_list = []
-        limb_name, limb_type, limb_side = joint.identify(node, self.module_dict)
+        if identities is None:
+            identities = joint.identify_hierarchy(
+                node, self.module_dict, self.limb_type_map
+            )
+        limb_name, limb_type, limb_side = identities.get(node) or joint.identify(
+            node, self.module_dict, self.limb_type_map
+        )
 
         limb_dict[limb_name] = node
         next_node = node
@@ -292,9 +363,9 @@ class Kinematics(ActionCore):
                 z = False
             failed_children = 0
             for child in children:
-                child_limb_name, child_limb_type, child_limb_side = joint.identify(
-                    child, self.module_dict
-                )
+                child_limb_name, child_limb_type, child_limb_side = identities.get(
+                    child
+                ) or joint.identify(child, self.module_dict, self.limb_type_map)
                 if (
                     child_limb_name not in self.validRootList
                     and child_limb_type == limb_type
@@ -362,7 +433,9 @@ class Kinematics(ActionCore):
                 if root_plug and parent_socket and master_cont:
                     # check the root
                     if (
-                        joint.identify(root_plug, self.module_dict)[0]
+                        joint.identify(
+                            root_plug, self.module_dict, self.limb_type_map
+                        )[0]
                         not in self.validRootList
                     ):
                         log.error("root must be a valid root guide node")
@@ -379,7 +452,7 @@ class Kinematics(ActionCore):
                         "Select exactly three nodes. First reference root node then target parent and finally master controller"
                     )
                 if (
-                    joint.identify(root_plug, self.module_dict)[0]
+                    joint.identify(root_plug, self.module_dict, self.limb_type_map)[0]
                     not in self.validRootList
                 ):
                     log.error("First selection must be a valid root joint node")
@@ -430,7 +503,13 @@ class Kinematics(ActionCore):
 
             limb = modules.class_data[x[1]]["build"](build_data=x[0])
             limb.colorCodes = color_codes
-            limb.createLimb()
+            start_time = time.time()
+            if self.batchNodeCreation:
+                with graph_builder.GraphBuilder():
+                    limb.createLimb()
+            else:
+                limb.createLimb()
+            self.limbCreationTime += time.time() - start_time
 
             ##############################################
             if add_limb:
@@ -9,6 +9,7 @@ from trigger.ui.Qt import QtWidgets
 from trigger.library import functions, attribute, deformers
 
 from trigger.core import filelog
+from trigger.core import shape_file
 from trigger.core.action import ActionCore
 
 log = filelog.Filelog(logname=__name__, filename="trigger_log")
@@ -36,6 +37,7 @@ class Morph(ActionCore):
         self.morphHook = None
         self.morphMesh = None
         self.bsNode = "trigger_morph_blendshape"
+        self._builder = None
 
     def feed(self, action_data, *args, **kwargs):
         """Feeds the instance with the action data stored in actions session"""
@@ -47,17 +49,18 @@ class Morph(ActionCore):
     def action(self):
         """Execute Action - Mandatory"""
         assert self.blendshapesGroup, "Blendshape Group not defined"
+        if shape_file.is_shape_file(self.blendshapesGroup):
+            self.ingest_shape_file(self.blendshapesGroup)
+            return
         self.categorize_blendshapes(functions.get_meshes(self.blendshapesGroup))
         # build hierarchy
         self._create_hierarchy()
         print(self.shapeCategories)
         # ingest base shapes
-        for target in self.shapeCategories["base"]:
-            self.ingest_base(target)
+        self.ingest_bases(self.shapeCategories["base"])
 
         # ingest inbetween shapes
-        for target in self.shapeCategories["inbetween"]:
-            self.ingest_inbetween(target)
+        self.ingest_inbetweens(self.shapeCategories["inbetween"])
 
         # ingest combination shapes
         for target in self.shapeCategories["combination"]:
@@ -70,6 +73,10 @@ class Morph(ActionCore):
         """UI - Mandatory"""
         blendshapes_group_lbl = QtWidgets.QLabel(text="Blendshapes Group:")
         blendshapes_group_le = QtWidgets.QLineEdit()
+        blendshapes_group_le.setToolTip(
+            "Group of the target meshes or a sparse shape file (%s)"
+            % shape_file.EXTENSION
+        )
         layout.addRow(blendshapes_group_lbl, blendshapes_group_le)
 
         neutral_mesh_lbl = QtWidgets.QLabel(text="Neutral Mesh:")
@@ -176,12 +183,42 @@ class Morph(ActionCore):
         cmds.parent(morph_hook, self.morphGrp)
         return morph_hook
 
-    def ingest_base(self, blendshape):
-        deformers.connect_bs_targets(
-            "%s.%s" % (self.morphHook, blendshape),
-            {self.morphMesh: blendshape},
-            bs_node_name=self.bsNode,
+    @property
+    def builder(self):
+        """Bulk target writer of the morph blendshape node."""
+        if not self._builder:
+            self._builder = deformers.BlendshapeBuilder(
+                self.morphMesh, name=self.bsNode
+            )
+        return self._builder
+
+    def ingest_shape_file(self, file_path):
+        """Load the targets from a sparse shape file instead of the scene meshes."""
+        self._create_hierarchy()
+        self._builder = deformers.load_shape_file(
+            file_path, self.morphMesh, name=self.bsNode
         )
+        with shape_file.ShapeFile(file_path) as shapes:
+            targets = shapes.targets
+        for target in targets:
+            if target["target"] or target["combination"]:
+                continue
+            driver_attr = deformers.prepare_driver_attr(
+                "%s.%s" % (self.morphHook, target["name"]), [0, 1]
+            )
+            cmds.connectAttr(driver_attr, "%s.%s" % (self.bsNode, target["name"]))
+
+    def ingest_base(self, blendshape):
+        self.ingest_bases([blendshape])
+
+    def ingest_bases(self, blendshapes):
+        """Add the shapes as targets and drive them from the hook node."""
+        self.builder.add_targets(blendshapes)
+        for blendshape in blendshapes:
+            driver_attr = deformers.prepare_driver_attr(
+                "%s.%s" % (self.morphHook, blendshape), [0, 1]
+            )
+            cmds.connectAttr(driver_attr, "%s.%s" % (self.bsNode, blendshape))
 
     # def ingest_inbetween(self, blendshape):
     #     # is it delta?
@@ -210,12 +247,15 @@ class Morph(ActionCore):
         #     else re.search("(.*)(%s)$" % digits.groups()[0], blendshape).groups()[0]
         # )
 
-        id = deformers.get_bs_index_by_name(self.bsNode, base)
-        cmds.blendShape(
-            self.bsNode,
-            edit=True,
-            ib=True,
-            t=(self.morphMesh, id, blendshape, percentage),
+        self.builder.add_inbetweens([(blendshape, base, percentage)])
+
+    def ingest_inbetweens(self, blendshapes):
+        """Add the shapes as inbetweens of their base targets."""
+        self.builder.add_inbetweens(
+            [
+                (blendshape,) + self.get_inbetween_base_and_value(blendshape)
+                for blendshape in blendshapes
+            ]
         )
 
     def get_inbetween_base_and_value(self, shape):
@@ -246,13 +286,7 @@ class Morph(ActionCore):
 
         if not is_inbetween:
             # ingest combination delta just like a regular base and drive it with combinationShape node
-            next_index = cmds.blendShape(self.bsNode, q=True, wc=True)
-            cmds.blendShape(
-                self.bsNode,
-                edit=True,
-                t=(self.morphMesh, next_index, delta_shape, 1.0),
-                w=[next_index, 0.0],
-            )
+            self.builder.add_targets([delta_shape])
             combination_node = cmds.createNode(
                 "combinationShape", name="cmb_%s" % blendshape
             )
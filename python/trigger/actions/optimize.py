@@ -0,0 +1,177 @@
+"""Post-build optimization of the rig evaluation cost"""
+import datetime
+
+from trigger.core import filelog
+from trigger.core import io
+from trigger.core.action import ActionCore
+from trigger.library import optimization
+
+from trigger.ui.Qt import QtWidgets
+from trigger.ui.widgets.browser import BrowserButton, FileLineEdit
+
+log = filelog.Filelog(logname=__name__, filename="trigger_log")
+
+ACTION_DATA = {
+    "measure_playback": True,
+    "start_frame": 1,
+    "end_frame": 24,
+    "expensive_node_count": 10,
+    "delete_dead_nodes": False,
+    "merge_node_chains": True,
+    "report_file_path": "",
+}
+
+
+class Optimize(ActionCore):
+    action_data = ACTION_DATA
+
+    def __init__(self, **kwargs):
+        super(Optimize, self).__init__(kwargs)
+        self.measurePlayback = True
+        self.startFrame = 1
+        self.endFrame = 24
+        self.expensiveNodeCount = 10
+        self.deleteDeadNodes = False
+        self.mergeNodeChains = True
+        self.reportFilePath = ""
+        self.report = {}
+
+    def feed(self, action_data):
+        self.measurePlayback = action_data.get("measure_playback", True)
+        self.startFrame = action_data.get("start_frame", 1)
+        self.endFrame = action_data.get("end_frame", 24)
+        self.expensiveNodeCount = action_data.get("expensive_node_count", 10)
+        self.deleteDeadNodes = action_data.get("delete_dead_nodes", False)
+        self.mergeNodeChains = action_data.get("merge_node_chains", True)
+        self.reportFilePath = action_data.get("report_file_path", "")
+
+    def action(self):
+        """Mandatory Method - Execute Action"""
+        report = {
+            "date": datetime.datetime.now().isoformat(),
+            "before": {"node_count": optimization.get_node_count()},
+            "after": {},
+            "expensive_nodes": [],
+            "dead_nodes": [],
+            "deleted_nodes": [],
+            "merged_nodes": [],
+        }
+        if self.measurePlayback:
+            # dgtimer slows the evaluation down. Both fps are measured without it
+            playback = optimization.measure_playback(self.startFrame, self.endFrame)
+            report["before"]["fps"] = playback["fps"]
+        if self.measurePlayback and self.expensiveNodeCount:
+            timed = optimization.measure_playback(
+                self.startFrame, self.endFrame, time_nodes=True
+            )
+            report["expensive_nodes"] = optimization.find_expensive_nodes(
+                timed["node_times"], count=self.expensiveNodeCount
+            )
+            for node, seconds in report["expensive_nodes"]:
+                log.info("Expensive node: %s (%.4f s)" % (node, seconds))
+
+        if self.deleteDeadNodes:
+            report["deleted_nodes"] = optimization.delete_dead_nodes()
+        else:
+            report["dead_nodes"] = optimization.find_dead_nodes()
+            log.info(
+                "%i dead nodes found. Enable Delete Dead Nodes to delete them"
+                % len(report["dead_nodes"])
+            )
+        if self.mergeNodeChains:
+            report["merged_nodes"] = optimization.merge_node_chains()
+            if self.deleteDeadNodes:
+                # merging may leave the inputs of the merged chains unused
+                report["deleted_nodes"].extend(optimization.delete_dead_nodes())
+
+        report["after"]["node_count"] = optimization.get_node_count()
+        if self.measurePlayback:
+            playback = optimization.measure_playback(self.startFrame, self.endFrame)
+            report["after"]["fps"] = playback["fps"]
+            log.info(
+                "Playback: %.1f fps => %.1f fps"
+                % (report["before"]["fps"], report["after"]["fps"])
+            )
+        log.info(
+            "Node count: %i => %i"
+            % (report["before"]["node_count"], report["after"]["node_count"])
+        )
+        self.report = report
+        if self.reportFilePath:
+            io.IO(file_path=self.reportFilePath, compact=False).write(report)
+        return report
+
+    def save_action(self, *args, **kwargs):
+        """Mandatory Method - Save Action"""
+        pass
+
+    def ui(self, ctrl, layout, handler, *args, **kwargs):
+        """
+        Mandatory Method - UI setting definitions
+
+        Args:
+            ctrl: (model_ctrl) ctrl object instance of /ui/model_ctrl.
+                                Updates UI and Model
+            layout: (QLayout) The layout object from the main ui.
+                                All setting widgets should be added to this layout
+            handler: (actions_session) An instance of the actions_session.
+                                TRY NOT TO USE HANDLER UNLESS ABSOLUTELY NECESSARY
+
+        Returns: None
+
+        """
+        measure_playback_lbl = QtWidgets.QLabel(text="Measure Playback:")
+        measure_playback_cb = QtWidgets.QCheckBox()
+        layout.addRow(measure_playback_lbl, measure_playback_cb)
+
+        frame_range_lbl = QtWidgets.QLabel(text="Frame Range:")
+        frame_range_hlay = QtWidgets.QHBoxLayout()
+        start_frame_sp = QtWidgets.QSpinBox(minimum=-99999, maximum=99999)
+        end_frame_sp = QtWidgets.QSpinBox(minimum=-99999, maximum=99999)
+        frame_range_hlay.addWidget(start_frame_sp)
+        frame_range_hlay.addWidget(end_frame_sp)
+        layout.addRow(frame_range_lbl, frame_range_hlay)
+
+        expensive_count_lbl = QtWidgets.QLabel(text="Expensive Nodes to Report:")
+        expensive_count_sp = QtWidgets.QSpinBox(minimum=0, maximum=9999)
+        layout.addRow(expensive_count_lbl, expensive_count_sp)
+
+        optimize_lbl = QtWidgets.QLabel(text="Optimize: ")
+        optimize_vlay = QtWidgets.QVBoxLayout()
+        dead_nodes_cb = QtWidgets.QCheckBox(text="Delete Dead Nodes")
+        merge_chains_cb = QtWidgets.QCheckBox(text="Merge Node Chains")
+        optimize_vlay.addWidget(dead_nodes_cb)
+        optimize_vlay.addWidget(merge_chains_cb)
+        layout.addRow(optimize_lbl, optimize_vlay)
+
+        report_path_lbl = QtWidgets.QLabel(text="Report File:")
+        report_path_hlay = QtWidgets.QHBoxLayout()
+        report_path_le = FileLineEdit()
+        report_path_hlay.addWidget(report_path_le)
+        browse_path_pb = BrowserButton(
+            mode="saveFile",
+            update_widget=report_path_le,
+            filterExtensions=["Json (*.json)"],
+            overwrite_check=False,
+        )
+        report_path_hlay.addWidget(browse_path_pb)
+        layout.addRow(report_path_lbl, report_path_hlay)
+
+        ctrl.connect(measure_playback_cb, "measure_playback", bool)
+        ctrl.connect(start_frame_sp, "start_frame", int)
+        ctrl.connect(end_frame_sp, "end_frame", int)
+        ctrl.connect(expensive_count_sp, "expensive_node_count", int)
+        ctrl.connect(dead_nodes_cb, "delete_dead_nodes", bool)
+        ctrl.connect(merge_chains_cb, "merge_node_chains", bool)
+        ctrl.connect(report_path_le, "report_file_path", str)
+        ctrl.update_ui()
+
+        # Signals
+        measure_playback_cb.stateChanged.connect(lambda x=0: ctrl.update_model())
+        start_frame_sp.valueChanged.connect(lambda x=0: ctrl.update_model())
+        end_frame_sp.valueChanged.connect(lambda x=0: ctrl.update_model())
+        expensive_count_sp.valueChanged.connect(lambda x=0: ctrl.update_model())
+        dead_nodes_cb.stateChanged.connect(lambda x=0: ctrl.update_model())
+        merge_chains_cb.stateChanged.connect(lambda x=0: ctrl.update_model())
+        report_path_le.textChanged.connect(lambda x=0: ctrl.update_model())
+        browse_path_pb.clicked.connect(lambda x=0: ctrl.update_model())
@@ -1,4 +1,6 @@
 import os
+import time
+from collections import deque
 from copy import deepcopy
 from maya import cmds
 
@@ -13,6 +15,16 @@ from trigger.library import deformers
 
 from trigger.objects import skin
 
+try:
+    from trigger.core import weight_file
+except ImportError:
+    weight_file = None
+
+try:
+    from concurrent import futures
+except ImportError:
+    futures = None
+
 from trigger.ui.Qt import QtWidgets, QtGui  # for progressbar
 from trigger.ui import custom_widgets
 from trigger.ui.layouts.save_box import SaveBoxLayout
@@ -20,7 +32,13 @@ from trigger.ui.widgets.browser import BrowserButton, FileLineEdit
 
 log = filelog.Filelog(logname=__name__, filename="trigger_log")
 
-ACTION_DATA = {"create_deformers": True, "deformers": [], "weights_file_path": ""}
+ACTION_DATA = {
+    "create_deformers": True,
+    "deformers": [],
+    "weights_file_path": "",
+    "binary_weights": False,
+    "prefetch_workers": 2,
+}
 
 
 def multiply_list(list_of_values):
@@ -56,6 +74,9 @@ class Weights(ActionCore, dict):
         self.isCreateDeformers = True
         self.deformers_list = []
         self.weights_file_path = ""
+        self.isBinaryWeights = False
+        self.prefetchWorkers = 2
+        self.timings = []
 
     def info(self):
         info_msg = """Weights action is for storing different weight paints on versioned files.
@@ -85,32 +106,101 @@ Then you can save and increment versions for all of them at once.
         self.isCreateDeformers = action_data.get("create_deformers")
         self.deformers_list = action_data.get("deformers")
         self.weights_file_path = action_data.get("weights_file_path")
+        self.isBinaryWeights = action_data.get("binary_weights", False)
+        self.prefetchWorkers = action_data.get("prefetch_workers", 2)
 
     def action(self):
         """Mandatory method for all action modules"""
         self.io.file_path = self.weights_file_path
-        data_list = self.io.read()
 
         base_folder, file_name_and_ext = os.path.split(self.weights_file_path)
         file_name, ext = os.path.splitext(file_name_and_ext)
         weights_folder = os.path.join(base_folder, file_name)
 
-        for data in data_list:
-            deformer = data["deformer"]
-            deformer_type = data["type"]
-            influencers = data.get(
-                "influencers", 0
-            )  # leave them as get for backward compatibility
-            affected = data.get("affected", 0)
-            deformer_weight_path = os.path.join(weights_folder, "%s.json" % deformer)
-            self.create_deformer(
-                deformer_weight_path,
-                deformer_type=deformer_type,
-                deformer_name=deformer,
-                affected=affected,
-                influencers=influencers,
+        # weight files are decoded in worker threads while the deformers are created
+        # and weights are applied in order in the main thread
+        workers = self.prefetchWorkers if futures else 0
+        executor = futures.ThreadPoolExecutor(max_workers=workers) if workers else None
+        pending = deque()
+        self.timings = []
+        try:
+            # start creating the deformers while the rest of the list is being read
+            for _, data in self.io.stream():
+                deformer_weight_path = self.get_deformer_weight_path(
+                    weights_folder, data["deformer"]
+                )
+                future = None
+                if executor:
+                    future = executor.submit(
+                        self.prefetch_weights, deformer_weight_path, data["type"]
+                    )
+                pending.append((data, deformer_weight_path, future))
+                # keep the number of decoded files in the memory bounded
+                if len(pending) > workers:
+                    self._create_from_prefetch(*pending.popleft())
+            while pending:
+                self._create_from_prefetch(*pending.popleft())
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+
+        for timing in self.timings:
+            log.info(
+                "%(deformer)s => decode: %(decode).3f, wait: %(wait).3f, "
+                "apply: %(apply).3f" % timing
             )
 
+    @staticmethod
+    def prefetch_weights(weights_file, deformer_type):
+        """Decode the weights file without touching the scene. Safe to run in a thread.
+
+        Returns:
+            (dict) {"weights_data": <deformerWeight dictionary>,
+                    "skin_weight": <skin.Weight object for skinClusters>,
+                    "decode_time": <seconds>}
+            None if the file does not exist.
+        """
+        if not os.path.isfile(weights_file):
+            return None
+        start = time.time()
+        skin_weight = None
+        if deformer_type == "skinCluster":
+            skin_weight = skin.Weight(source=str(weights_file))
+            weights_data = skin_weight.metadata
+        elif weight_file and weight_file.is_weight_file(weights_file):
+            with weight_file.WeightFile(weights_file) as binary_file:
+                weights_data = binary_file.to_deformer_weight()
+        else:
+            weights_data = io.IO(file_path=weights_file).read()
+        return {
+            "weights_data": weights_data,
+            "skin_weight": skin_weight,
+            "decode_time": time.time() - start,
+        }
+
+    def _create_from_prefetch(self, data, deformer_weight_path, future):
+        """Wait for the decoded weights and create the deformer."""
+        start = time.time()
+        prefetched = future.result() if future else None
+        wait_time = time.time() - start
+        self.create_deformer(
+            deformer_weight_path,
+            deformer_type=data["type"],
+            deformer_name=data["deformer"],
+            # leave them as get for backward compatibility
+            affected=data.get("affected", 0),
+            influencers=data.get("influencers", 0),
+            prefetched=prefetched,
+        )
+        self.timings.append(
+            {
+                "deformer": data["deformer"],
+                "decode": prefetched["decode_time"] if prefetched else 0.0,
+                "wait": wait_time,
+                "apply": time.time() - start - wait_time,
+            }
+        )
+
     def save_action(self, file_path=None, *args, **kwargs):
         """Mandatory method for all action modules"""
         file_path = file_path or self.weights_file_path
@@ -207,10 +297,37 @@ Then you can save and increment versions for all of them at once.
 
             data_list.append(data)
             self.save_weights(deformer=deformer, file_path=deformer_weight_path)
+            if self.isBinaryWeights:
+                if not weight_file:
+                    log.error("Binary weight files require numpy", proceed=False)
+                weight_file.json_to_binary(deformer_weight_path, remove_source=True)
+            elif weight_file:
+                # remove the outdated binary file. It would have the priority while
+                # loading
+                binary_path = "%s%s" % (
+                    os.path.splitext(deformer_weight_path)[0],
+                    weight_file.EXTENSION,
+                )
+                if os.path.isfile(binary_path):
+                    os.remove(binary_path)
 
         self.io.file_path = file_path
         self.io.write(data_list)
 
+    @staticmethod
+    def get_deformer_weight_path(weights_folder, deformer):
+        """Return the weights file of the deformer.
+
+        Binary (.trwz) file has the priority over json.
+        """
+        if weight_file:
+            binary_path = os.path.join(
+                weights_folder, "%s%s" % (deformer, weight_file.EXTENSION)
+            )
+            if os.path.isfile(binary_path):
+                return binary_path
+        return os.path.join(weights_folder, "%s.json" % deformer)
+
     def ui(self, ctrl, layout, handler, *args, **kwargs):
         "Mandatory Method"
 
@@ -233,8 +350,27 @@ Then you can save and increment versions for all of them at once.
         )
         layout.addRow(deformers_lbl, deformers_listbox)
 
+        binary_weights_lbl = QtWidgets.QLabel(text="Binary Weight Files")
+        binary_weights_cb = QtWidgets.QCheckBox()
+        binary_weights_cb.setToolTip(
+            "Saves the weights as compressed binary files (.trwz) instead of json"
+        )
+        layout.addRow(binary_weights_lbl, binary_weights_cb)
+
+        prefetch_workers_lbl = QtWidgets.QLabel(text="Prefetch Workers")
+        prefetch_workers_sp = QtWidgets.QSpinBox()
+        prefetch_workers_sp.setToolTip(
+            "Number of threads decoding the weight files while the deformers are "
+            "created. 0 reads them one by one"
+        )
+        prefetch_workers_sp.setMinimum(0)
+        prefetch_workers_sp.setMaximum(32)
+        layout.addRow(prefetch_workers_lbl, prefetch_workers_sp)
+
         ctrl.connect(file_path_le, "weights_file_path", str)
         ctrl.connect(deformers_listbox.viewWidget, "deformers", list)
+        ctrl.connect(binary_weights_cb, "binary_weights", bool)
+        ctrl.connect(prefetch_workers_sp, "prefetch_workers", int)
 
         ctrl.update_ui()
 
@@ -289,6 +425,8 @@ Then you can save and increment versions for all of them at once.
         deformers_listbox.buttonGet.clicked.connect(get_deformers_menu)
         deformers_listbox.buttonNew.clicked.connect(lambda x: ctrl.update_model())
         deformers_listbox.buttonRemove.clicked.connect(lambda x: ctrl.update_model())
+        binary_weights_cb.stateChanged.connect(lambda x=0: ctrl.update_model())
+        prefetch_workers_sp.valueChanged.connect(lambda: ctrl.update_model())
 
         savebox_lay.saved.connect(lambda file_path: update_deformers())
         savebox_lay.saved.connect(lambda file_path: self.save_action(file_path))
@@ -441,6 +579,8 @@ Then you can save and increment versions for all of them at once.
         ignore_name=True,
         deferred=False,
         suppress_messages=False,
+        skin_weight=None,
+        weights_data=None,
     ):
         if not deformer and not self.deformer:
             log.error(
@@ -456,15 +596,24 @@ Then you can save and increment versions for all of them at once.
 
         if deferred:  # this is only for workaround for the bug introduced in 2022
             # deferred argument bypasses all extra 'surgery' afterwards.
+            temp_json = None
+            if weight_file and weight_file.is_weight_file(file_name):
+                binary_path = os.path.join(file_dir, file_name)
+                temp_json = weight_file.binary_to_json(
+                    binary_path, "%s_tmp.json" % os.path.splitext(binary_path)[0]
+                )
+                file_name = os.path.basename(temp_json)
             deferred_command = "cmds.deformerWeights('{0}', im=True, deformer='{1}', path='{2}', method='{3}', ignoreName={4})".format(
                 file_name, deformer, file_dir, method, ignore_name
             )
             cmds.evalDeferred(deferred_command)
+            if temp_json:
+                cmds.evalDeferred("import os; os.remove({0!r})".format(temp_json))
             return
 
         deformer_type = cmds.objectType(deformer)
         if deformer_type == "skinCluster":
-            sc_weight_handler = skin.Weight(
+            sc_weight_handler = skin_weight or skin.Weight(
                 source=str(os.path.join(file_dir, file_name))
             )
             sc_weight_handler.apply(deformer)
@@ -472,6 +621,23 @@ Then you can save and increment versions for all of them at once.
                 log.info("%s Weights Lodaded Successfully..." % deformer)
             return
 
+        if weight_file and weight_file.is_weight_file(file_name):
+            # deformerWeights command can only read json files
+            binary_path = os.path.join(file_dir, file_name)
+            temp_json = weight_file.binary_to_json(
+                binary_path, "%s_tmp.json" % os.path.splitext(binary_path)[0]
+            )
+            try:
+                return self.load_weights(
+                    deformer=deformer,
+                    file_path=temp_json,
+                    method=method,
+                    ignore_name=ignore_name,
+                    suppress_messages=suppress_messages,
+                )
+            finally:
+                os.remove(temp_json)
+
         try:
             cmds.deformerWeights(
                 file_name,
@@ -485,8 +651,11 @@ Then you can save and increment versions for all of them at once.
             # Somehow it does not assign the value to index: 0
             # the following part forces to assign the correct value to index 0
 
-            self.io.file_path = os.path.join(file_dir, file_name)
-            data = self.io.read()
+            if weights_data and weights_data["deformerWeight"].get("weights"):
+                data = weights_data
+            else:
+                self.io.file_path = os.path.join(file_dir, file_name)
+                data = self.io.read()
             if deformer_type == "blendShape":
                 point_attr_template = (
                     "{0}.inputTarget[0].inputTargetGroup[{1}].targetWeights[0]"
@@ -513,6 +682,7 @@ Then you can save and increment versions for all of them at once.
         deformer_name=None,
         affected=None,
         influencers=None,
+        prefetched=None,
     ):
         """
         Creates the deformer defined in the weights file and applies the pre-saved weights.
@@ -526,14 +696,23 @@ Then you can save and increment versions for all of them at once.
                     be used to identify the deformer type
             force_unique_deformer: (Bool) If True, in case of scene contains a node with the same name, it uses a
                     unique name instead. Otherwise it will throw an error
+            prefetched: (Dict) Already decoded weights returned by prefetch_weights().
+                    If defined, the file is not read again
 
         Returns:
 
         """
         deferred_loading = False
         # load the weights file
-        self.io.file_path = weights_file
-        weights_data = self.io.read()
+        if prefetched:
+            weights_data = prefetched["weights_data"]
+        elif weight_file and weight_file.is_weight_file(weights_file):
+            # only the header is needed here. Weights are read while loading
+            with weight_file.WeightFile(weights_file) as binary_file:
+                weights_data = binary_file.header_data()
+        else:
+            self.io.file_path = weights_file
+            weights_data = self.io.read()
 
         weights_list = weights_data["deformerWeight"].get("weights", [])
         # get the deformer name
@@ -649,6 +828,8 @@ Then you can save and increment versions for all of them at once.
             method="index",
             ignore_name=False,
             deferred=deferred_loading,
+            skin_weight=prefetched["skin_weight"] if prefetched else None,
+            weights_data=prefetched["weights_data"] if prefetched else None,
         )
 
     def save_matching_weights(
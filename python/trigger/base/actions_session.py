@@ -5,11 +5,12 @@ from maya import cmds
 
 from trigger.core import io
 from trigger.core import filelog
+from trigger.core import checkpoint
+from trigger.core import profiler
 from trigger.library import scene
 from trigger import actions
 from trigger.core.decorators import tracktime, windowsOff
 from trigger.core import compatibility as compat
-from trigger.ui.Qt import QtWidgets
 
 LOG = filelog.Filelog(logname=__name__, filename="trigger_log")
 
@@ -22,7 +23,12 @@ class ActionsSession(dict):
         # at least a file name is necessary while instancing the IO
         self.io = io.IO(file_name="tmp_actions_session.tr")
         self.currentFile = None
-        self.action_data_dict =  {module_name: class_obj.action_data for module_name, class_obj in actions.class_data.items()}
+        self.profiler = profiler.BuildProfiler()
+        # defaults are read without importing the actions
+        self.action_data_dict = {
+            module_name: actions.class_data.get_data(module_name)
+            for module_name in actions.class_data
+        }
 
         # self.action_data_dict = {}
         # for mod in actions.__all__:
@@ -283,6 +289,20 @@ class ActionsSession(dict):
         except KeyError:  ## this is for backward compatibility
             return True
 
+    def set_checkpoint(self, action_name, state=True):
+        """Saves the scene after the action during incremental builds"""
+        action = self.get_action(action_name)
+        action["checkpoint"] = state
+
+    def is_checkpoint(self, action_name):
+        action = self.get_action(action_name)
+        return action.get("checkpoint", False)
+
+    def clear_checkpoints(self):
+        """Removes all saved checkpoint scenes of the session"""
+        if self.currentFile:
+            checkpoint.Checkpoints(self.currentFile).clear()
+
     def get_all_actions(self):
         """Returns all available actions"""
         return self["actions"]
@@ -314,10 +334,7 @@ class ActionsSession(dict):
 
     def get_info(self, action_name):
         action = self.get_action(action_name)
-        action_cmd = "actions.{0}.{1}()".format(
-            action["type"], action["type"].capitalize()
-        )
-        a_hand = eval(action_cmd)
+        a_hand = actions.class_data[action["type"]]()
         # backward compatibility for v2.0.0
         try:
             return a_hand.info()
@@ -328,26 +345,86 @@ class ActionsSession(dict):
     def _action(self, action):
         LOG.header("%s" % action["name"])
 
-        a_hand = actions.class_data[action["type"]](vcs=self.vcs)
+        with self.profiler.measure(action, "init"):
+            a_hand = actions.class_data[action["type"]](vcs=self.vcs)
 
-        a_hand.feed(action["data"])
-        a_hand.action()
+        with self.profiler.measure(action, "feed"):
+            a_hand.feed(action["data"])
+        with self.profiler.measure(action, "action"):
+            a_hand.action()
         LOG.info("success...")
 
     @windowsOff
     @tracktime
-    def run_all_actions(self, reset_scene=True, until=None):
-        """runs all actions in the actions list"""
-        # reset scene
+    def run_all_actions(
+        self, reset_scene=True, until=None, profile=False, incremental=False
+    ):
+        """
+        runs all actions in the actions list
+
+        Args:
+            reset_scene: (Bool) Starts from an empty scene
+            until: (String) Stops before the action with this name
+            profile: (Bool) Captures cProfile data for each action
+            incremental: (Bool) Resumes from the last valid checkpoint and saves the
+                scene after the checkpoint actions. Needs a saved session.
+
+        Timings of each action are written next to the session file. See core.profiler
+        """
+        self.profiler.cprofile = profile
+        self.profiler.start()
+        try:
+            self._run_actions(
+                reset_scene=reset_scene, until=until, incremental=incremental
+            )
+        finally:
+            self.profiler.finish()
+            if self.currentFile:
+                # a failing report must not hide the error of the build
+                try:
+                    self.profiler.write_report(self.currentFile)
+                except Exception as exc:
+                    LOG.error("Build report cannot be written => %s" % exc)
+        LOG.header("Total BUILDING TIME:")
+
+    def _run_actions(self, reset_scene=True, until=None, incremental=False):
         LOG.seperator()
         LOG.header("BUILDING...")
-        if reset_scene:
+        if incremental and not self.currentFile:
+            LOG.warning("Incremental build needs a saved session. Running all actions")
+            incremental = False
+
+        resume_index = -1
+        if incremental:
+            checkpoints = checkpoint.Checkpoints(self.currentFile)
+            checkpoints.prune(self.list_action_names())
+            fingerprints = checkpoint.chain_fingerprints(self["actions"])
+            names = self.list_action_names()
+            stop = names.index(until) if until in names else len(names)
+            resume_index, scene_path = checkpoints.find_resume_point(
+                self["actions"][:stop], fingerprints[:stop]
+            )
+
+        if resume_index != -1:
+            LOG.info(
+                "Resuming from checkpoint => %s" % self["actions"][resume_index]["name"]
+            )
+            scene.load_checkpoint(scene_path)
+        elif reset_scene:
             scene.reset()
         for row, action in enumerate(self["actions"]):
             if action["name"] == until:
                 return
+            if row <= resume_index:
+                # restored from the checkpoint
+                if self.progress_listwidget and self.is_enabled(action["name"]):
+                    self.progress_listwidget.successItem(row)
+                continue
             if self.is_enabled(action["name"]):
                 if self.progress_listwidget:
+                    # headless builds do not load the Qt bindings
+                    from trigger.ui.Qt import QtWidgets
+
                     self.progress_listwidget.setCurrentRow(-1)
                     self.progress_listwidget.activateItem(row)
 
@@ -365,7 +442,13 @@ class ActionsSession(dict):
                         self.progress_listwidget.errorItem(row)
                     LOG.error("Cannot complete action => %s\n%s" % (action["name"], e))
                     raise
-        LOG.header("Total BUILDING TIME:")
+                if incremental and self.is_checkpoint(action["name"]):
+                    scene_path = scene.save_checkpoint(
+                        checkpoints.get_scene_path(row, action["name"])
+                    )
+                    checkpoints.record(
+                        row, action["name"], fingerprints[row], scene_path
+                    )
 
     # @windowsOff
     def run_action(self, action_name):
@@ -0,0 +1,389 @@
+"""Guide serialization through the Maya API.
+
+Collecting reads the world matrices and the attributes of all guides in a single
+traversal with MFnTransform / MFnDependencyNode. Rebuilding creates the whole
+hierarchy and the attributes with prepared modifiers and commits them together
+with the attribute values as one undoable GraphBuilder command.
+
+Both produce the same data and scene as the command based implementations in
+Session and Initials.
+"""
+import math
+
+from maya import cmds
+from maya.api import OpenMaya as om
+
+from trigger.core import filelog
+from trigger.core import compatibility as compat
+from trigger.library import graph_builder
+from trigger.library.joint import JOINT_TYPE_DICT, JOINT_SIDE_DICT
+
+log = filelog.Filelog(logname=__name__, filename="trigger_log")
+
+NUMERIC_TYPES = {
+    om.MFnNumericData.kBoolean: "bool",
+    om.MFnNumericData.kShort: "short",
+    om.MFnNumericData.kLong: "long",
+    om.MFnNumericData.kFloat: "float",
+    om.MFnNumericData.kDouble: "double",
+}
+
+GLOBAL_AXIS_ATTRS = ["upAxis", "mirrorAxis", "lookAxis"]
+# attributes of attribute.create_global_joint_attrs
+GLOBAL_ATTR_NAMES = set(
+    ["moduleName", "useRefOri"]
+    + GLOBAL_AXIS_ATTRS
+    + ["%s%s" % (attr, axis) for attr in GLOBAL_AXIS_ATTRS for axis in "XYZ"]
+)
+
+
+def _get_dag_path(node):
+    selection_list = om.MSelectionList()
+    selection_list.add(node)
+    return selection_list.getDagPath(0)
+
+
+def _get_attr_type(attr_obj):
+    """Return the attributeQuery type name of the attribute. None if unsupported."""
+    if attr_obj.hasFn(om.MFn.kEnumAttribute):
+        return "enum"
+    if attr_obj.hasFn(om.MFn.kTypedAttribute):
+        return "typed"
+    if attr_obj.hasFn(om.MFn.kNumericAttribute):
+        return NUMERIC_TYPES.get(om.MFnNumericAttribute(attr_obj).numericType())
+    return None
+
+
+def _get_enum_list(attr_obj):
+    """Return the fields of the enum attribute in the 'a:b=3:c' format."""
+    fn_enum = om.MFnEnumAttribute(attr_obj)
+    fields = []
+    previous = -1
+    for value in range(fn_enum.getMin(), fn_enum.getMax() + 1):
+        try:
+            field = fn_enum.fieldName(value)
+        except RuntimeError:
+            continue
+        fields.append(field if value == previous + 1 else "%s=%i" % (field, value))
+        previous = value
+    return ":".join(fields)
+
+
+def _get_plug_value(plug, attr_type):
+    if attr_type == "bool":
+        return plug.asBool()
+    if attr_type in ("long", "short", "enum"):
+        return plug.asInt()
+    if attr_type == "float":
+        return plug.asFloat()
+    if attr_type == "double":
+        return plug.asDouble()
+    # getAttr returns None for the string attributes which are never set
+    try:
+        if plug.asMObject().isNull():
+            return None
+        return plug.asString()
+    except RuntimeError:
+        return None
+
+
+def get_user_attrs(node, fn_node=None):
+    """
+    Returns a list of dictionaries for every supported custom attribute
+
+    Same output as Initials.get_user_attrs without the per attribute queries.
+
+    Args:
+        node: (String) Node name
+        fn_node: (MFnDependencyNode) Optional. Function set of the node
+
+    Returns: (List)
+    """
+    if fn_node is None:
+        fn_node = om.MFnDependencyNode(_get_dag_path(node).node())
+    list_of_dicts = []
+    for index in range(fn_node.attributeCount()):
+        attr_obj = fn_node.attribute(index)
+        fn_attr = om.MFnAttribute(attr_obj)
+        if not fn_attr.dynamic:
+            continue
+        attr_type = _get_attr_type(attr_obj)
+        if not attr_type:
+            continue
+        tmp_dict = {}
+        tmp_dict["attr_name"] = fn_attr.name
+        tmp_dict["attr_type"] = attr_type
+        # the API has no getter for the nice name overrides
+        tmp_dict["nice_name"] = cmds.attributeQuery(
+            fn_attr.name, node=node, niceName=True
+        )
+        tmp_dict["default_value"] = _get_plug_value(
+            fn_node.findPlug(attr_obj, False), attr_type
+        )
+        if attr_type == "enum":
+            tmp_dict["enum_list"] = _get_enum_list(attr_obj)
+        elif attr_type == "bool":
+            pass
+        elif attr_type == "typed":
+            tmp_dict["attr_type"] = "string"
+        else:
+            fn_numeric = om.MFnNumericAttribute(attr_obj)
+            if fn_numeric.hasMin():
+                tmp_dict["min_value"] = float(fn_numeric.getMin())
+            if fn_numeric.hasMax():
+                tmp_dict["max_value"] = float(fn_numeric.getMax())
+        list_of_dicts.append(tmp_dict)
+    return list_of_dicts
+
+
+def collect(joints):
+    """
+    Collect the guide data of the joints ready to write
+
+    Args:
+        joints: (List) Guide joints. Parents are only kept if they are in the list
+
+    Returns: (List) List of dictionaries. Same as Session.collect_guides
+    """
+    joint_set = set(joints)
+    save_data = []
+    for jnt in joints:
+        dag_path = _get_dag_path(jnt)
+        fn_node = om.MFnDependencyNode(dag_path.node())
+        world_pos = om.MFnTransform(dag_path).rotatePivot(om.MSpace.kWorld)
+        # world rotation of an unparented joint with zero joint orient
+        euler = (
+            om.MTransformationMatrix(dag_path.inclusiveMatrix())
+            .rotation(asQuaternion=True)
+            .asEulerRotation()
+        )
+
+        type_int = fn_node.findPlug("type", False).asInt()
+        if type_int == 18:
+            j_type = fn_node.findPlug("otherType", False).asString()
+        else:
+            j_type = JOINT_TYPE_DICT.get(type_int)
+
+        parent_path = om.MDagPath(dag_path)
+        parent_path.pop()
+        parent = parent_path.partialPathName() if parent_path.length() else None
+        if parent not in joint_set:
+            parent = None
+
+        jnt_dict = {
+            "name": jnt,
+            "position": (world_pos.x, world_pos.y, world_pos.z),
+            "rotation": tuple(math.degrees(x) for x in (euler.x, euler.y, euler.z)),
+            "joint_orient": (0.0, 0.0, 0.0),
+            "scale": (1, 1, 1),
+            "parent": parent,
+            "side": JOINT_SIDE_DICT.get(fn_node.findPlug("side", False).asInt()),
+            "type": j_type,
+            "color": fn_node.findPlug("overrideColor", False).asInt(),
+            "radius": fn_node.findPlug("radius", False).asDouble(),
+            "user_attributes": get_user_attrs(jnt, fn_node=fn_node),
+        }
+        save_data.append(jnt_dict)
+    return save_data
+
+
+def _get_world_matrix(jnt_dict):
+    """Return the world matrix the guide has before it is parented."""
+    rotation = om.MEulerRotation(
+        *[math.radians(x) for x in jnt_dict.get("rotation")]
+    ).asMatrix()
+    orient = om.MEulerRotation(
+        *[math.radians(x) for x in jnt_dict.get("joint_orient")]
+    ).asMatrix()
+    matrix = om.MTransformationMatrix(rotation * orient)
+    matrix.setTranslation(om.MVector(*jnt_dict.get("position")), om.MSpace.kTransform)
+    return matrix.asMatrix()
+
+
+def _get_local_values(jnt_dict, parent_matrix):
+    """Return translate and joint orient keeping the world transform under parent.
+
+    Like the parent command, the rotate values are kept and the difference goes
+    to the joint orient. Guide scales are expected to be 1.
+    """
+    local = om.MTransformationMatrix(
+        _get_world_matrix(jnt_dict) * parent_matrix.inverse()
+    )
+    rotation = om.MEulerRotation(
+        *[math.radians(x) for x in jnt_dict.get("rotation")]
+    ).asMatrix()
+    orient_matrix = rotation.inverse() * local.rotation(asQuaternion=True).asMatrix()
+    orient = om.MTransformationMatrix(orient_matrix).rotation()
+    translate = local.translation(om.MSpace.kTransform)
+    return (
+        [translate.x, translate.y, translate.z],
+        [math.degrees(x) for x in (orient.x, orient.y, orient.z)],
+    )
+
+
+def _create_numeric(name, numeric_type, keyable=False):
+    fn_numeric = om.MFnNumericAttribute()
+    attr_obj = fn_numeric.create(name, name, numeric_type)
+    fn_numeric.keyable = keyable
+    return attr_obj
+
+
+def _get_global_attributes():
+    """Return the attributes created by attribute.create_global_joint_attrs."""
+    fn_typed = om.MFnTypedAttribute()
+    attributes = [fn_typed.create("moduleName", "moduleName", om.MFnData.kString)]
+    fn_typed.keyable = False
+    for attr in GLOBAL_AXIS_ATTRS:
+        children = [
+            _create_numeric("%s%s" % (attr, axis), om.MFnNumericData.kFloat)
+            for axis in "XYZ"
+        ]
+        attributes.append(om.MFnNumericAttribute().create(attr, attr, *children))
+    use_ref_ori = _create_numeric(
+        "useRefOri", om.MFnNumericData.kBoolean, keyable=True
+    )
+    om.MFnAttribute(use_ref_ori).setNiceNameOverride("Inherit_Orientation")
+    attributes.append(use_ref_ori)
+    return attributes
+
+
+def _get_user_attribute(attr_dict):
+    """Return the attribute object attribute.create_attribute would create."""
+    attr_name = attr_dict.get("attr_name")
+    attr_type = attr_dict.get("attr_type")
+    default_value = attr_dict.get("default_value")
+    if attr_type == "bool":
+        fn_attr = om.MFnNumericAttribute()
+        attr_obj = fn_attr.create(
+            attr_name, attr_name, om.MFnNumericData.kBoolean, bool(default_value)
+        )
+    elif attr_type == "enum":
+        fn_attr = om.MFnEnumAttribute()
+        attr_obj = fn_attr.create(attr_name, attr_name, int(default_value or 0))
+        value = 0
+        for field in attr_dict.get("enum_list", "").split(":"):
+            if "=" in field:
+                field, value = field.rsplit("=", 1)
+            fn_attr.addField(field, int(value))
+            value = int(value) + 1
+    elif attr_type == "string":
+        fn_attr = om.MFnTypedAttribute()
+        attr_obj = fn_attr.create(attr_name, attr_name, om.MFnData.kString)
+    else:
+        numeric_type = {v: k for k, v in NUMERIC_TYPES.items()}.get(attr_type)
+        if numeric_type is None:
+            log.error("The attribute type (%s) is not supported" % attr_type)
+            raise Exception
+        fn_attr = om.MFnNumericAttribute()
+        attr_obj = fn_attr.create(
+            attr_name, attr_name, numeric_type, default_value or 0
+        )
+        min_value = attr_dict.get("min_value")
+        max_value = attr_dict.get("max_value")
+        fn_attr.setMin(min_value if min_value is not None else -99999)
+        fn_attr.setMax(max_value if max_value is not None else 99999)
+    fn_attr.keyable = True
+    fn_attr.setNiceNameOverride(attr_dict.get("nice_name") or attr_name)
+    return attr_obj
+
+
+def _get_side_value(side):
+    side = (side or "").lower()
+    if side in ("left", "l"):
+        return 1
+    if side in ("right", "r"):
+        return 2
+    if side in ("center", "c"):
+        return 0
+    log.error("%s is not a valid side value" % side)
+    return None
+
+
+def rebuild(guides_data, holder_group):
+    """
+    Rebuild the guides with a single undoable commit
+
+    Args:
+        guides_data: (List) List of dictionaries. Output from collect()
+        holder_group: (String) Existing group holding the root guides
+
+    Returns: None
+    """
+    holder_path = _get_dag_path(holder_group)
+    dag_modifier = om.MDagModifier()
+    attribute_modifier = om.MDGModifier()
+    nodes = {}
+    for jnt_dict in guides_data:
+        name = jnt_dict.get("name")
+        node = dag_modifier.createNode("joint")
+        dag_modifier.renameNode(node, name)
+        nodes[name] = node
+        for attr_obj in _get_global_attributes():
+            attribute_modifier.addAttribute(node, attr_obj)
+        for attr_dict in jnt_dict.get("user_attributes"):
+            if attr_dict.get("attr_name") not in GLOBAL_ATTR_NAMES:
+                attribute_modifier.addAttribute(node, _get_user_attribute(attr_dict))
+
+    data_map = {jnt_dict.get("name"): jnt_dict for jnt_dict in guides_data}
+    with graph_builder.GraphBuilder() as builder:
+        builder.add_modifier(dag_modifier)
+        builder.add_modifier(attribute_modifier)
+        for jnt_dict in guides_data:
+            jnt = jnt_dict.get("name")
+            node = nodes[jnt]
+            parent = jnt_dict.get("parent")
+            if parent in nodes:
+                dag_modifier.reparentNode(node, nodes[parent])
+                parent_matrix = _get_world_matrix(data_map[parent])
+                graph_builder.connect(
+                    (nodes[parent], "scale"), (node, "inverseScale"), force=True
+                )
+            elif parent:
+                parent_path = _get_dag_path(parent)
+                dag_modifier.reparentNode(node, parent_path.node())
+                parent_matrix = parent_path.inclusiveMatrix()
+            else:
+                dag_modifier.reparentNode(node, holder_path.node())
+                parent_matrix = holder_path.inclusiveMatrix()
+            translate, joint_orient = _get_local_values(jnt_dict, parent_matrix)
+
+            # the node may not get the name if it is taken. Plugs are found on
+            # the node objects to never set the values of the existing node
+            graph_builder.set_value((node, "translate"), translate)
+            graph_builder.set_value((node, "rotate"), list(jnt_dict.get("rotation")))
+            graph_builder.set_value((node, "jointOrient"), joint_orient)
+            graph_builder.set_value((node, "scale"), list(jnt_dict.get("scale")))
+            graph_builder.set_value((node, "radius"), jnt_dict.get("radius"))
+            graph_builder.set_value((node, "drawLabel"), 1)
+            graph_builder.set_value((node, "displayLocalAxis"), 1)
+            graph_builder.set_value((node, "overrideEnabled"), True)
+            graph_builder.set_value((node, "overrideColor"), jnt_dict.get("color"))
+            side_value = _get_side_value(jnt_dict.get("side"))
+            if side_value is not None:
+                graph_builder.set_value((node, "side"), side_value)
+            type_name = jnt_dict.get("type")
+            if type_name in JOINT_TYPE_DICT.values():
+                value_list = [0] + list(JOINT_TYPE_DICT.values())
+                graph_builder.set_value((node, "type"), value_list.index(type_name))
+            else:
+                graph_builder.set_value((node, "type"), 18)
+                graph_builder.set_value((node, "otherType"), type_name)
+
+            graph_builder.set_value((node, "moduleName"), jnt)
+            graph_builder.set_value((node, "useRefOri"), True)
+            for attr_dict in jnt_dict.get("user_attributes"):
+                value = attr_dict.get("default_value")
+                is_global = attr_dict.get("attr_name") in GLOBAL_ATTR_NAMES
+                # new numeric attributes already have the value as default
+                if value is None or not (is_global or compat.is_string(value)):
+                    continue
+                graph_builder.set_value((node, attr_dict.get("attr_name")), value)
+        # an outer builder would commit after the names are checked
+        graph_builder.flush()
+
+    for name, node in nodes.items():
+        new_name = om.MFnDependencyNode(node).name()
+        if new_name != name:
+            log.warning(
+                "%s already exists. The guide is renamed to %s" % (name, new_name)
+            )
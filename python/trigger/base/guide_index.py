@@ -0,0 +1,254 @@
+"""Index of the guide root joints in the scene kept up to date with Maya callbacks.
+
+Instead of scanning all joints, only the joints which are added, removed, renamed
+or had one of the identifying attributes changed are checked again. Callbacks only
+mark the joints as dirty. The checks run when update() is called, so a guide
+created by a script is checked once, after all its attributes are set.
+"""
+import maya.api.OpenMaya as om
+
+from trigger.core import filelog
+
+LOG = filelog.Filelog(logname=__name__, filename="trigger_log")
+
+# changes on these attributes can make a joint a root or change the root properties
+WATCHED_ATTRIBUTES = ["type", "otherType", "side", "moduleName"]
+
+# operations adding or removing many nodes. The index is rebuilt once they are done
+BULK_SCENE_MESSAGES = [
+    (om.MSceneMessage.kBeforeNew, om.MSceneMessage.kAfterNew),
+    (om.MSceneMessage.kBeforeOpen, om.MSceneMessage.kAfterOpen),
+    (om.MSceneMessage.kBeforeImport, om.MSceneMessage.kAfterImport),
+    (om.MSceneMessage.kBeforeCreateReference, om.MSceneMessage.kAfterCreateReference),
+    (om.MSceneMessage.kBeforeLoadReference, om.MSceneMessage.kAfterLoadReference),
+    (
+        om.MSceneMessage.kBeforeUnloadReference,
+        om.MSceneMessage.kAfterUnloadReference,
+    ),
+    (
+        om.MSceneMessage.kBeforeRemoveReference,
+        om.MSceneMessage.kAfterRemoveReference,
+    ),
+]
+
+
+class GuideRootIndex(object):
+    """Cache of the guide roots in the scene."""
+
+    def __init__(self, initials):
+        """Initialize.
+
+        Args:
+            initials: (Initials) Used for identifying the root joints
+        """
+        super(GuideRootIndex, self).__init__()
+        self.initials = initials
+        # {key: root data} of the roots. Same dictionaries as Initials.get_root_data
+        self.roots = {}
+        # Functions called without arguments when the index needs an update
+        self.listeners = []
+        # {key: MObjectHandle} of the watched joints
+        self._handles = {}
+        # {hash code: [keys]}. Hash codes are not unique, handles are compared
+        self._buckets = {}
+        self._next_key = 0
+        self._attribute_callbacks = {}
+        self._scene_callbacks = []
+        self._dirty = set()
+        self._removed = set()
+        self._is_reset = False
+        self._suspended = 0
+
+    @property
+    def is_dirty(self):
+        return bool(self._dirty) or self._is_reset
+
+    def start(self):
+        """Register the callbacks and index the scene."""
+        if self._scene_callbacks:
+            return
+        self._scene_callbacks = [
+            om.MDGMessage.addNodeAddedCallback(self._on_node_added, "joint"),
+            om.MDGMessage.addNodeRemovedCallback(self._on_node_removed, "joint"),
+            om.MNodeMessage.addNameChangedCallback(
+                om.MObject.kNullObj, self._on_name_changed
+            ),
+        ]
+        for before, after in BULK_SCENE_MESSAGES:
+            self._scene_callbacks.extend(
+                [
+                    om.MSceneMessage.addCallback(before, self._suspend),
+                    om.MSceneMessage.addCallback(after, self._resume),
+                ]
+            )
+        self.rebuild()
+
+    def stop(self):
+        """Remove all the callbacks."""
+        self._remove_attribute_callbacks()
+        if self._scene_callbacks:
+            om.MMessage.removeCallbacks(self._scene_callbacks)
+        self._scene_callbacks = []
+        self.roots = {}
+
+    def rebuild(self):
+        """Index all joints in the scene from scratch."""
+        self._remove_attribute_callbacks()
+        self.roots = {}
+        self._dirty = set()
+        self._removed = set()
+        iterator = om.MItDependencyNodes(om.MFn.kJoint)
+        while not iterator.isDone():
+            key = self._watch(iterator.thisNode())
+            root_data = self._get_root_data(key)
+            if root_data:
+                self.roots[key] = root_data
+            iterator.next()
+        self._is_reset = True
+        self._notify()
+
+    def update(self):
+        """Check the dirty joints again.
+
+        Returns:
+            (Dict) Changes since the last update:
+                reset: (Bool) True if the index is rebuilt. Use the roots as they are
+                added, removed, changed: (List) (key, root data) pairs
+        """
+        changes = {"reset": self._is_reset, "added": [], "removed": [], "changed": []}
+        self._is_reset = False
+        dirty = self._dirty
+        self._dirty = set()
+        for key in dirty:
+            old_data = self.roots.get(key)
+            new_data = None if key in self._removed else self._get_root_data(key)
+            if key in self._removed:
+                self._unwatch(key)
+                self._removed.discard(key)
+            if new_data == old_data:
+                continue
+            if new_data is None:
+                changes["removed"].append((key, self.roots.pop(key)))
+            elif old_data is None:
+                self.roots[key] = new_data
+                changes["added"].append((key, new_data))
+            else:
+                self.roots[key] = new_data
+                changes["changed"].append((key, new_data))
+        return changes
+
+    def find(self, joint_name):
+        """Return the key of the root joint. None if it is not a root."""
+        for key, root_data in self.roots.items():
+            if root_data["root_joint"] == joint_name:
+                return key
+        return None
+
+    def _get_root_data(self, key):
+        handle = self._handles.get(key)
+        if not handle or not handle.isValid():
+            return None
+        name = om.MFnDagNode(handle.object()).partialPathName()
+        return self.initials.get_root_data(name)
+
+    def _get_key(self, mobject):
+        """Return the key of a watched node. None if the node is not watched."""
+        handle = om.MObjectHandle(mobject)
+        for key in self._buckets.get(handle.hashCode(), []):
+            if self._handles[key] == handle:
+                return key
+        return None
+
+    def _watch(self, mobject):
+        key = self._get_key(mobject)
+        if key is None:
+            key = self._next_key
+            self._next_key += 1
+            handle = om.MObjectHandle(mobject)
+            self._handles[key] = handle
+            self._buckets.setdefault(handle.hashCode(), []).append(key)
+        elif not self._handles[key].isValid():
+            # a new node in the memory of a deleted one
+            self._handles[key] = om.MObjectHandle(mobject)
+        if key not in self._attribute_callbacks:
+            callback_id = om.MNodeMessage.addAttributeChangedCallback(
+                mobject, self._on_attribute_changed
+            )
+            self._attribute_callbacks[key] = callback_id
+        return key
+
+    def _unwatch(self, key):
+        handle = self._handles.pop(key, None)
+        if handle is not None:
+            bucket = self._buckets.get(handle.hashCode(), [])
+            if key in bucket:
+                bucket.remove(key)
+            if not bucket:
+                self._buckets.pop(handle.hashCode(), None)
+        callback_id = self._attribute_callbacks.pop(key, None)
+        if callback_id is not None:
+            om.MMessage.removeCallback(callback_id)
+
+    def _remove_attribute_callbacks(self):
+        if self._attribute_callbacks:
+            om.MMessage.removeCallbacks(list(self._attribute_callbacks.values()))
+        self._attribute_callbacks = {}
+        self._handles = {}
+        self._buckets = {}
+
+    def _mark(self, key):
+        was_dirty = self.is_dirty
+        self._dirty.add(key)
+        if not was_dirty:
+            self._notify()
+
+    def _notify(self):
+        for listener in self.listeners:
+            listener()
+
+    def _suspend(self, *_):
+        self._suspended += 1
+
+    def _resume(self, *_):
+        self._suspended = max(0, self._suspended - 1)
+        if not self._suspended:
+            self.rebuild()
+
+    def _on_node_added(self, mobject, *_):
+        if self._suspended:
+            return
+        key = self._watch(mobject)
+        self._removed.discard(key)
+        self._mark(key)
+
+    def _on_node_removed(self, mobject, *_):
+        if self._suspended:
+            return
+        key = self._get_key(mobject)
+        if key is None:
+            return
+        self._removed.add(key)
+        self._mark(key)
+
+    def _on_name_changed(self, mobject, *_):
+        if self._suspended:
+            return
+        key = self._get_key(mobject)
+        if key in self.roots:
+            self._mark(key)
+
+    def _on_attribute_changed(self, message, plug, *_):
+        if self._suspended:
+            return
+        if not message & (
+            om.MNodeMessage.kAttributeSet
+            | om.MNodeMessage.kAttributeAdded
+            | om.MNodeMessage.kAttributeRemoved
+        ):
+            return
+        attribute = plug.partialName(includeNodeName=False, useLongNames=True)
+        if attribute not in WATCHED_ATTRIBUTES:
+            return
+        key = self._get_key(plug.node())
+        if key is not None:
+            self._mark(key)
@@ -10,6 +10,8 @@ from trigger.library import joint
 from trigger.library import connection
 from trigger.library import attribute
 
+from trigger.base import guide_data
+
 from trigger import modules
 
 from trigger.core import filelog
@@ -24,8 +26,13 @@ class Initials(object):
         self.parseSettings()
         self.projectName = "trigger"
 
-        self.module_dict =  {module_name: data["guide"].limb_data for module_name, data in modules.class_data.items()}
+        self.module_dict = {
+            module_name: modules.class_data.get_data(module_name)
+            for module_name in modules.class_data
+        }
         self.valid_limbs = self.module_dict.keys()
+        # joint type lookups for the identify functions
+        self.limb_type_map = joint.get_limb_type_map(self.module_dict)
         self.validRootList = [
             values["members"][0] for values in self.module_dict.values()
         ]
@@ -174,7 +181,10 @@ class Initials(object):
             if cmds.ls(selection=True, type="joint"):
                 j = cmds.ls(selection=True)[-1]
                 try:
-                    if joint.identify(j, self.module_dict)[1] in self.valid_limbs:
+                    limb_type = joint.identify(
+                        j, self.module_dict, self.limb_type_map
+                    )[1]
+                    if limb_type in self.valid_limbs:
                         masterParent = cmds.ls(sl=True)[-1]
                     else:
                         masterParent = None
@@ -449,30 +459,36 @@ class Initials(object):
     def get_scene_roots(self):
         """collects the root joints in the scene and returns the dictionary with properties"""
         all_joints = cmds.ls(type="joint")
-        # get roots
-        guide_roots = [
-            jnt for jnt in all_joints if joint.get_joint_type(jnt) in self.validRootList
-        ]
         roots_dictionary_list = []
-        for jnt in guide_roots:
-            # get module name
-            try:
-                module_name = cmds.getAttr("%s.moduleName" % jnt)
-            except ValueError:
-                continue
-            # get module info
-            j_type, limb, side = joint.identify(jnt, self.module_dict)
-            roots_dictionary_list.append(
-                {
-                    "module_name": module_name,
-                    "side": side,
-                    "root_joint": jnt,
-                    "module_type": limb,
-                }
-            )
-
+        identities = joint.identify_many(
+            all_joints, self.module_dict, self.limb_type_map
+        )
+        for jnt, identity in zip(all_joints, identities):
+            root_data = self.get_root_data(jnt, identity=identity)
+            if root_data:
+                roots_dictionary_list.append(root_data)
         return roots_dictionary_list
 
+    def get_root_data(self, jnt, identity=None):
+        """Returns the properties of the guide root joint. None if the joint is not a root"""
+        # get module info
+        j_type, limb, side = identity or joint.identify(
+            jnt, self.module_dict, self.limb_type_map
+        )
+        if j_type not in self.validRootList:
+            return None
+        # get module name
+        try:
+            module_name = cmds.getAttr("%s.moduleName" % jnt)
+        except ValueError:
+            return None
+        return {
+            "module_name": module_name,
+            "side": side,
+            "root_joint": jnt,
+            "module_type": limb,
+        }
+
     def select_root(self, joint_name):
         cmds.select(joint_name)
 
@@ -500,55 +516,9 @@ class Initials(object):
 
         This is part of guide data collection and this data is going to be used while re-creating guides
         """
+        return guide_data.get_user_attrs(jnt)
 
-        supported_attrs = [
-            "long",
-            "short",
-            "bool",
-            "enum",
-            "float",
-            "double",
-            "string",
-            "typed",
-        ]  # wtf is typed
-        list_of_dicts = []
-        user_attr_list = cmds.listAttr(jnt, userDefined=True)
-        if not user_attr_list:
-            return []
-        for attr in user_attr_list:
-            attr_type = cmds.attributeQuery(attr, node=jnt, at=True)
-            if attr_type not in supported_attrs:
-                continue
-            tmp_dict = {}
-            tmp_dict["attr_name"] = cmds.attributeQuery(attr, node=jnt, ln=True)
-            tmp_dict["attr_type"] = attr_type
-            tmp_dict["nice_name"] = cmds.attributeQuery(attr, node=jnt, nn=True)
-            tmp_dict["default_value"] = cmds.getAttr("%s.%s" % (jnt, attr))
-            if attr_type == "enum":
-                tmp_dict["enum_list"] = cmds.attributeQuery(attr, node=jnt, le=True)[0]
-            elif attr_type == "bool":
-                pass
-            elif attr_type == "typed":
-                ## Wtf is "typed" anyway??
-                tmp_dict["attr_type"] = "string"
-            else:
-                try:
-                    tmp_dict["min_value"] = cmds.attributeQuery(
-                        attr, node=jnt, min=True
-                    )[0]
-                except RuntimeError:
-                    pass
-                try:
-                    tmp_dict["max_value"] = cmds.attributeQuery(
-                        attr, node=jnt, max=True
-                    )[0]
-                except RuntimeError:
-                    pass
-
-            list_of_dicts.append(tmp_dict)
-        return list_of_dicts
-
-    def getWholeLimb(self, node):
+    def getWholeLimb(self, node, identities=None):
         multi_guide_jnts = [
             value["multi_guide"]
             for value in self.module_dict.values()
@@ -556,7 +526,13 @@ class Initials(object):
         ]
         limb_dict = {}
         multiList = []
-        limb_name, limb_type, limb_side = joint.identify(node, self.module_dict)
+        if identities is None:
+            identities = joint.identify_hierarchy(
+                node, self.module_dict, self.limb_type_map
+            )
+        limb_name, limb_type, limb_side = identities.get(node) or joint.identify(
+            node, self.module_dict, self.limb_type_map
+        )
 
         limb_dict[limb_name] = node
         nextNode = node
@@ -568,9 +544,9 @@ class Initials(object):
                 z = False
             failedChildren = 0
             for child in children:
-                child_limb_name, child_limb_type, child_limb_side = joint.identify(
-                    child, self.module_dict
-                )
+                child_limb_name, child_limb_type, child_limb_side = identities.get(
+                    child
+                ) or joint.identify(child, self.module_dict, self.limb_type_map)
                 if (
                     child_limb_name not in self.validRootList
                     and child_limb_type == limb_type
@@ -598,7 +574,9 @@ class Initials(object):
                 log.warning("Select a single root_jnt joint")
         if not cmds.objectType(root_jnt, isType="joint"):
             log.error("root_jnt is not a joint")
-        root_name, root_type, root_side = joint.identify(root_jnt, self.module_dict)
+        root_name, root_type, root_side = joint.identify(
+            root_jnt, self.module_dict, self.limb_type_map
+        )
         if root_name not in self.validRootList:
             log.error("Selected joint is not in the valid Guide Root")
 
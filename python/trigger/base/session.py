@@ -2,16 +2,13 @@ import os
 
 from maya import cmds
 from trigger.library import scene
-from trigger.library import functions
-from trigger.library import attribute
-from trigger.library import joint
-from trigger.library import api
 
 from trigger.core import io
 from trigger.core import filelog
 from trigger.core import compatibility as compat
 
 from trigger.base import initials
+from trigger.base import guide_data
 
 log = filelog.Filelog(logname=__name__, filename="trigger_log")
 
@@ -72,46 +69,7 @@ class Session(object):
 
         flat_jnt_list = list(compat.flatten(all_trigger_joints))
 
-        save_data = []
-
-        for jnt in flat_jnt_list:
-            cmds.select(d=True)
-            tmp_jnt = cmds.joint()
-            functions.align_to(tmp_jnt, jnt, position=True, rotation=True)
-            world_pos = tuple(api.get_world_translation(tmp_jnt))
-            rotation = cmds.getAttr("%s.rotate" % tmp_jnt)[0]
-            joint_orient = cmds.getAttr("%s.jointOrient" % tmp_jnt)[0]
-            # scale = cmds.getAttr("%s.scale" % jnt)[0]
-            scale = (1, 1, 1)
-            side = joint.get_joint_side(jnt)
-            j_type = joint.get_joint_type(jnt)
-            color = cmds.getAttr("%s.overrideColor" % jnt)
-            radius = cmds.getAttr("%s.radius" % jnt)
-            parent = functions.get_parent(jnt)
-            if parent in flat_jnt_list:
-                pass
-            else:
-                parent = None
-            # get all custom attributes
-            # this returns list of dictionaries compatible with create_attribute method in library.functions
-            user_attrs = self.init.get_user_attrs(jnt)
-
-            jnt_dict = {
-                "name": jnt,
-                "position": world_pos,
-                "rotation": rotation,
-                "joint_orient": joint_orient,
-                "scale": scale,
-                "parent": parent,
-                "side": side,
-                "type": j_type,
-                "color": color,
-                "radius": radius,
-                "user_attributes": user_attrs,
-            }
-            save_data.append(jnt_dict)
-            cmds.delete(tmp_jnt)
-        return save_data
+        return guide_data.collect(flat_jnt_list)
 
     def rebuild_guides(self, guides_data):
         """
@@ -125,29 +83,7 @@ class Session(object):
         holder_grp = "%s_refGuides" % self.init.projectName
         if not cmds.objExists(holder_grp):
             holder_grp = cmds.group(name=holder_grp, em=True)
-        for jnt_dict in guides_data:
-            cmds.select(d=True)
-            jnt = cmds.joint(name=jnt_dict.get("name"), p=jnt_dict.get("position"))
-            attribute.create_global_joint_attrs(jnt)
-            cmds.setAttr("%s.rotate" % jnt, *jnt_dict.get("rotation"))
-            cmds.setAttr("%s.jointOrient" % jnt, *jnt_dict.get("joint_orient"))
-            cmds.setAttr("%s.scale" % jnt, *jnt_dict.get("scale"))
-            cmds.setAttr("%s.radius" % jnt, jnt_dict.get("radius"))
-            cmds.setAttr("%s.drawLabel" % jnt, 1)
-            cmds.setAttr("%s.displayLocalAxis" % jnt, 1)
-            cmds.setAttr("%s.overrideEnabled" % jnt, True)
-            cmds.setAttr("%s.overrideColor" % jnt, jnt_dict.get("color"))
-            joint.set_joint_side(jnt, jnt_dict.get("side"))
-            joint.set_joint_type(jnt, jnt_dict.get("type"))
-            property_attrs = jnt_dict.get("user_attributes")
-            for attr_dict in property_attrs:
-                attribute.create_attribute(jnt, attr_dict)
-
-        for jnt_dict in guides_data:
-            if jnt_dict.get("parent"):
-                cmds.parent(jnt_dict.get("name"), jnt_dict.get("parent"))
-            else:
-                cmds.parent(jnt_dict.get("name"), holder_grp)
+        guide_data.rebuild(guides_data, holder_grp)
 
     def reset_scene(self):
         scene.reset()
@@ -0,0 +1,168 @@
+"""Checkpoints for incremental builds.
+
+Each action is fingerprinted from its type, data, enabled state and the files its
+data refers to. Fingerprints are chained, so changing an action invalidates every
+action after it. Scene states saved after the checkpoint actions are recorded in a
+manifest next to the session (.tr) file:
+    <session>_checkpoints/checkpoints.json
+    <session>_checkpoints/<index>_<action>.mb
+
+This module only manages the fingerprints and the manifest. Saving and restoring
+the scenes is done by the actions session.
+"""
+import os
+import json
+import hashlib
+
+from trigger.core import filelog
+from trigger.core import io
+
+LOG = filelog.Filelog(logname=__name__, filename="trigger_log")
+
+MANIFEST_NAME = "checkpoints.json"
+SCENE_EXTENSION = ".mb"
+
+try:
+    STRING_TYPES = (basestring,)
+except NameError:
+    STRING_TYPES = (str,)
+
+
+def collect_paths(data):
+    """Return the sorted existing file and folder paths found in the action data."""
+    paths = set()
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, STRING_TYPES) and value:
+            if os.path.isfile(value):
+                paths.add(os.path.normpath(value))
+                # data files may keep their content in a folder with the same name
+                # e.g. weights.trw => weights/
+                companion = os.path.splitext(value)[0]
+                if os.path.isdir(companion):
+                    paths.add(os.path.normpath(companion))
+            elif os.path.isdir(value):
+                paths.add(os.path.normpath(value))
+    return sorted(paths)
+
+
+def path_signature(path):
+    """Return the size and modification time of the file or all files in the folder."""
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return [[path, stat.st_size, stat.st_mtime]]
+    signature = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for file_name in sorted(files):
+            file_path = os.path.join(root, file_name)
+            stat = os.stat(file_path)
+            signature.append([file_path, stat.st_size, stat.st_mtime])
+    return signature
+
+
+def fingerprint(action, previous=""):
+    """Return the fingerprint of the action.
+
+    Args:
+        action: (Dict) Action dictionary from the actions session
+        previous: (String) Fingerprint of the previous action
+
+    Returns:
+        (String) hex digest
+    """
+    enabled = action.get("enabled", True)
+    content = {"type": action["type"], "enabled": enabled}
+    if enabled:
+        content["data"] = action["data"]
+        content["files"] = [
+            path_signature(path) for path in collect_paths(action["data"])
+        ]
+    digest = hashlib.sha1(previous.encode("utf-8"))
+    digest.update(json.dumps(content, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def chain_fingerprints(actions):
+    """Return the chained fingerprints of the actions list."""
+    fingerprints = []
+    previous = ""
+    for action in actions:
+        previous = fingerprint(action, previous)
+        fingerprints.append(previous)
+    return fingerprints
+
+
+class Checkpoints(object):
+    """Manifest of the saved checkpoint scenes of a session."""
+
+    def __init__(self, session_path):
+        """Initialize.
+
+        Args:
+            session_path: (String) Path of the .tr file
+        """
+        super(Checkpoints, self).__init__()
+        self.folder = "%s_checkpoints" % os.path.splitext(session_path)[0]
+        self.io = io.IO(file_path=os.path.join(self.folder, MANIFEST_NAME))
+        self.manifest = self.io.read() or {}
+
+    def get_scene_path(self, index, action_name):
+        """Return the path of the checkpoint scene for the action."""
+        return os.path.join(
+            self.folder, "%03d_%s%s" % (index, action_name, SCENE_EXTENSION)
+        )
+
+    def find_resume_point(self, actions, fingerprints=None):
+        """Find the last valid checkpoint.
+
+        Args:
+            actions: (List) Action dictionaries
+            fingerprints: (List) Chained fingerprints. Calculated if None
+
+        Returns:
+            (Tuple) Index of the checkpoint action and the scene path.
+                (-1, None) if there is no valid checkpoint
+        """
+        fingerprints = fingerprints or chain_fingerprints(actions)
+        for index in reversed(range(len(actions))):
+            entry = self.manifest.get(actions[index]["name"])
+            if not entry or entry["fingerprint"] != fingerprints[index]:
+                continue
+            if os.path.isfile(entry["scene"]):
+                return index, entry["scene"]
+        return -1, None
+
+    def record(self, index, action_name, action_fingerprint, scene_path):
+        """Record the saved scene and write the manifest."""
+        old_entry = self.manifest.get(action_name)
+        if old_entry and old_entry["scene"] != scene_path:
+            self._remove_file(old_entry["scene"])
+        self.manifest[action_name] = {
+            "index": index,
+            "fingerprint": action_fingerprint,
+            "scene": scene_path,
+        }
+        self.io.write(self.manifest)
+        LOG.info("Checkpoint saved => %s" % scene_path)
+
+    def prune(self, action_names):
+        """Remove the checkpoints of the actions which are not in the given list."""
+        for action_name in list(self.manifest.keys()):
+            if action_name not in action_names:
+                self._remove_file(self.manifest.pop(action_name)["scene"])
+        self.io.write(self.manifest)
+
+    def clear(self):
+        """Remove all the checkpoints."""
+        self.prune([])
+
+    @staticmethod
+    def _remove_file(file_path):
+        if os.path.isfile(file_path):
+            os.remove(file_path)
@@ -1,8 +1,48 @@
 """Logging Module for Trigger"""
 import sys
 import logging
+import logging.handlers
 import os
 import datetime
+import threading
+
+# One buffered handler per log file, shared by all Filelog instances writing into it
+_FILE_HANDLERS = {}
+_LOCK = threading.Lock()
+
+
+def _get_file_handler(file_path, size_cap, capacity):
+    """Return the shared handler of the log file. Creates it at the first call.
+
+    Returns:
+        (Tuple) handler, is_new_file. is_new_file is only True for the call
+            creating the handler of a log file which does not exist yet. The file
+            itself is created at the first flush, so the other instances cannot
+            check it
+    """
+    with _LOCK:
+        handler = _FILE_HANDLERS.get(file_path)
+        is_new_file = False
+        if handler is None:
+            is_new_file = not os.path.isfile(file_path)
+            target = logging.handlers.RotatingFileHandler(
+                file_path, maxBytes=size_cap, backupCount=1, delay=True
+            )
+            # records are kept in the memory and written in batches. Warnings and errors
+            # are written immediately
+            handler = logging.handlers.MemoryHandler(
+                capacity, flushLevel=logging.WARNING, target=target
+            )
+            _FILE_HANDLERS[file_path] = handler
+        return handler, is_new_file
+
+
+def flush_all():
+    """Write all buffered log records to their files."""
+    with _LOCK:
+        handlers = list(_FILE_HANDLERS.values())
+    for handler in handlers:
+        handler.flush()
 
 
 class Filelog(object):
@@ -16,26 +56,38 @@ class Filelog(object):
         date=True,
         time=True,
         size_cap=500000,
+        capacity=200,
         *args,
         **kwargs
     ):
+        """Initialize.
+
+        Args:
+            size_cap: (int) Log file rotates when it gets bigger than size_cap bytes
+            capacity: (int) Number of records buffered before writing them to the file
+        """
         super(Filelog, self).__init__()
         self.fileName = filename if filename else "defaultLog"
         self.fileDir = filedir if filedir else os.path.expanduser("~")
         self.filePath = os.path.join(self.fileDir, "%s.log" % self.fileName)
         self.logName = logname if logname else self.fileName
-        # self.logger = logging.getLogger(self.fileName)
-        self.logger = logging.getLogger(self.logName)
+        # Loggers are per file, not per module.
+        # Modules can write into more than one file
+        # Dots would make the loggers of different files children of each other
+        self.logger = logging.getLogger(
+            "%s.%s" % (__name__, os.path.abspath(self.filePath).replace(".", "_"))
+        )
         self.logger.setLevel(logging.DEBUG)
-        # self.console_handler = ColorHandler()
-        # self.logger.addHandler(ColorHandler())
-        # self.logger.addHandler(logging.StreamHandler())
         self.isDate = date
         self.isTime = time
-        if not os.path.isfile(self.filePath):
+        self._handler, is_new_file = _get_file_handler(
+            self.filePath, size_cap, capacity
+        )
+        with _LOCK:
+            if self._handler not in self.logger.handlers:
+                self.logger.addHandler(self._handler)
+        if is_new_file:
             self._welcome()
-        if self.get_size() > size_cap:
-            self.clear()
 
     def _get_now(self):
         """Return the formatted current date and time."""
@@ -53,97 +105,80 @@ class Filelog(object):
 
     def _welcome(self):
         """Print the welcome message."""
-        self._start_logging()
         self.logger.debug("=" * len(self.logName))
         self.logger.debug(self.logName)
         self.logger.debug("=" * len(self.logName))
         self.logger.debug("")
-        self._end_logging()
 
     def debug(self, msg):
         """Print debug message."""
         stamped_msg = "%sDEBUG : %s" % (self._get_now(), msg)
-        self._start_logging()
         self.logger.debug(stamped_msg)
-        self._end_logging()
 
     def info(self, msg):
         """Print info message."""
         stamped_msg = "%sINFO    : %s" % (self._get_now(), msg)
-        self._start_logging()
         self.logger.info(stamped_msg)
-        self._end_logging()
 
     def warning(self, msg):
         """Print warning message."""
         stamped_msg = "%sWARNING : %s" % (self._get_now(), msg)
-        self._start_logging()
         self.logger.warning(stamped_msg)
-        self._end_logging()
 
     def error(self, msg, proceed=True):
         """Print error message."""
         stamped_msg = "%sERROR   : %s" % (self._get_now(), msg)
-        self._start_logging()
         self.logger.error(stamped_msg)
-        self._end_logging()
         if not proceed:
             raise Exception(msg)
 
     def title(self, msg):
         """Add a title to the log."""
-        self._start_logging()
         self.logger.debug("")
         self.logger.debug("=" * (len(msg)))
         self.logger.debug(msg)
         self.logger.debug("=" * (len(msg)))
-        # self.logger.debug("\n")
-        self._end_logging()
 
     def header(self, msg):
         """Add a header to the log."""
-        self._start_logging()
         self.logger.debug("")
         self.logger.debug(msg)
         self.logger.debug("=" * (len(msg)))
-        # self.logger.debug("\n")
-        self._end_logging()
 
     def seperator(self):
         """Add a separator."""
-        self._start_logging()
         self.logger.debug("")
         self.logger.debug("-" * 30)
-        # self.logger.debug("\n")
-        self._end_logging()
+
+    def flush(self):
+        """Write the buffered records to the log file."""
+        self._handler.flush()
 
     def clear(self):
         """Clear/Reset the log."""
-        if os.path.isfile(self.filePath):
-            os.remove(self.filePath)
+        self._handler.acquire()
+        try:
+            # drop the buffered records and release the file
+            self._handler.buffer = []
+            target = self._handler.target
+            target.acquire()
+            try:
+                if target.stream:
+                    target.stream.close()
+                    target.stream = None
+                if os.path.isfile(self.filePath):
+                    os.remove(self.filePath)
+            finally:
+                target.release()
+        finally:
+            self._handler.release()
         self._welcome()
 
-    def _start_logging(self):
-        """Prepare logger to write into log file."""
-        # file_logger = logging.FileHandler(self.filePath, delay=True)
-        file_logger = logging.FileHandler(self.filePath)
-        # file_logger = FileHandler(self.filePath)
-        self.logger.addHandler(file_logger)
-        # self.logger.addHandler(self.console_handler)
-
-    def _end_logging(self):
-        """Delete handlers once the logging into file finishes."""
-        for handler in self.logger.handlers:
-            # if isinstance(handler, logging.FileHandler):
-            #     self.logger.removeHandler(handler)
-            #     handler.flush()
-            #     handler.close()
-            self.logger.removeHandler(handler)
-            handler.flush()
-            handler.close()
-
     def get_size(self):
         """Return the size of the log file."""
+        self.flush()
+        if not os.path.isfile(self.filePath):
+            return 0
         size = os.path.getsize(self.filePath)
         return size
 
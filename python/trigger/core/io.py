@@ -3,20 +3,51 @@
 :author: Arda Kutlu <ardakutlu@gmail.com>
 """
 import os
+import re
+import gzip
 import json
-import shutil
+import uuid
+import codecs
+import contextlib
 
 from trigger.core import filelog
-from trigger.core import compatibility as compat
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 FILELOG = filelog.Filelog(logname=__name__, filename="trigger_log")
 
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+NUMBER_CHARACTERS = frozenset(".eE+-0123456789")
+COMPRESSION_EXTENSIONS = [".gz", ".zst"]
+
 
 class IO(dict):
     def __init__(
-        self, file_name=None, folder_name=None, root_path=None, file_path=None
+        self,
+        file_name=None,
+        folder_name=None,
+        root_path=None,
+        file_path=None,
+        compact=True,
+        fsync=False,
     ):
+        """Initialize.
+
+        Args:
+            compact: (Bool) Writes json without indentation. Faster and smaller
+            fsync: (Bool) Flushes the written files to the disk before returning
+        """
         super(IO, self).__init__()
+        self.compact = compact
+        self.fsync = fsync
         self.extensions = [
             ".json",
             ".tr",
@@ -47,6 +78,9 @@ class IO(dict):
     def file_path(self, new_path):
         """Set the file path and create the folder if it doesn't exist."""
         name, ext = os.path.splitext(new_path)
+        if ext in COMPRESSION_EXTENSIONS:
+            # compressed files are validated with their inner extension. e.g. .trw.gz
+            name, ext = os.path.splitext(name)
         directory, _ = os.path.split(new_path)
         if not ext:
             FILELOG.error("IO module needs to know the extension")
@@ -69,6 +103,37 @@ class IO(dict):
         else:
             return False
 
+    def stream(self, file_path=None, keys=None, chunk_size=65536):
+        """
+        Yield the items of the json file one by one as they are parsed.
+
+        Only a single item is kept in the memory at a time, so consumers can start
+        working before the whole file is read.
+
+        Args:
+            file_path: (String) if not specified uses the one defined
+            in the class instantiation.
+            keys: (List) Path of the nested container to stream, e.g.
+            ["deformerWeight", "weights"]. Top level container if None.
+            The entries met on the way to the container are yielded as well.
+            chunk_size: (Int) Number of characters read from the file at once
+
+        Yields:
+            (Tuple) key path of the item and the item itself. e.g.
+            (("deformerWeight", "weights", 0), {...})
+        """
+        file_path = file_path if file_path else self.file_path
+        if not os.path.isfile(file_path):
+            FILELOG.error("File cannot be found => %s" % file_path)
+            return
+        with self._open_text(file_path) as f:
+            try:
+                for item in _JsonStream(f, chunk_size).walk(tuple(keys or ())):
+                    yield item
+            except ValueError:
+                FILELOG.error("Corrupted file => %s" % file_path)
+                raise
+
     def write(self, data, file_path=None):
         """
         Write data to file.
@@ -84,13 +149,26 @@ class IO(dict):
         self._dump_json(data, file_path)
         return file_path
 
+    @staticmethod
+    def _open_text(file_path):
+        """Open the (optionally compressed) file for reading text."""
+        ext = os.path.splitext(file_path)[1]
+        if ext == ".gz":
+            return gzip.open(file_path, "rt", encoding="utf-8")
+        if ext == ".zst":
+            if not zstandard:
+                FILELOG.error("zstandard module is required to read %s" % file_path)
+                raise Exception
+            return zstandard.open(file_path, "rt", encoding="utf-8")
+        return codecs.open(file_path, "r", encoding="utf-8")
+
     @staticmethod
     def _load_json(file_path):
         """Load the given json file."""
         if os.path.isfile(file_path):
             try:
-                with open(file_path, "r") as f:
-                    data = json.load(f)
+                with IO._open_text(file_path) as f:
+                    data = json.loads(f.read())
                     return data
             except ValueError:
                 FILELOG.error("Corrupted file => %s" % file_path)
@@ -98,15 +176,29 @@ class IO(dict):
         else:
             FILELOG.error("File cannot be found => %s" % file_path)
 
-    @staticmethod
-    def _dump_json(data, file_path):
-        """Save the data to the json file."""
-        name, ext = os.path.splitext(compat.encode(file_path))
-        temp_file = "{0}.tmp".format(name)
-        with open(temp_file, "w") as f:
-            json.dump(data, f, indent=4)
-        shutil.copyfile(temp_file, file_path)
-        os.remove(temp_file)
+    def _dump_json(self, data, file_path):
+        """Save the data to the json file.
+
+        The data is written to a temporary file first and moved over the target,
+        so the file is either completely written or untouched.
+        """
+        payload = dumps(data, compact=self.compact)
+        ext = os.path.splitext(file_path)[1]
+        with atomic_write(file_path, fsync=self.fsync) as f:
+            if ext == ".gz":
+                with gzip.GzipFile(
+                    filename=os.path.basename(file_path), mode="wb", fileobj=f
+                ) as gz:
+                    gz.write(payload)
+            elif ext == ".zst":
+                if not zstandard:
+                    FILELOG.error(
+                        "zstandard module is required to write %s" % file_path
+                    )
+                    raise Exception
+                f.write(zstandard.ZstdCompressor().compress(payload))
+            else:
+                f.write(payload)
 
     @staticmethod
     def folder_check(checkpath):
@@ -125,3 +217,185 @@ class IO(dict):
 
     def _dump_ini(self, file_path):
         pass
+
+
+def dumps(data, compact=True):
+    """Serialize the data to json bytes.
+
+    Compact data is serialized with orjson if it is available.
+
+    Args:
+        data: <data> Json serializable data
+        compact: (Bool) If False, indents the data for readability
+
+    Returns:
+        (Bytes) utf-8 encoded json
+    """
+    if not compact:
+        return json.dumps(data, indent=4).encode("utf-8")
+    if orjson:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson is stricter on the types. Use the standard library
+            pass
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _replace(source, destination):
+    """Move the source over the destination in a single step where possible."""
+    try:
+        os.replace(source, destination)
+    except AttributeError:
+        # python 2
+        if os.path.exists(destination):
+            os.remove(destination)
+        os.rename(source, destination)
+
+
+def _fsync_directory(directory):
+    """Flush the directory entry of a renamed file. Not supported on Windows."""
+    try:
+        handle = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(handle)
+    except OSError:
+        pass
+    finally:
+        os.close(handle)
+
+
+@contextlib.contextmanager
+def atomic_write(file_path, fsync=False):
+    """Open a temporary binary file next to the file_path and move it over when done.
+
+    If anything goes wrong while writing, the target file stays untouched.
+
+    Args:
+        file_path: (String) Target file path
+        fsync: (Bool) Flush the file and the directory to the disk
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    temp_file = "%s.%s.tmp" % (file_path, uuid.uuid4().hex[:8])
+    try:
+        with open(temp_file, "wb") as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        _replace(temp_file, file_path)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    if fsync:
+        _fsync_directory(directory)
+
+
+class _JsonStream(object):
+    """Incremental json reader which decodes a single value at a time."""
+
+    def __init__(self, file_obj, chunk_size=65536):
+        self._file = file_obj
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size):
+        """Read more data into the buffer. Returns False at the end of the file."""
+        if self._eof:
+            return False
+        chunk = self._file.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        # drop the consumed part
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill(self._chunk_size):
+                return ""
+
+    def expect(self, char):
+        """Consume the next non-whitespace character which must be char."""
+        found = self.peek()
+        if found != char:
+            raise ValueError("Expecting '%s', found '%s'" % (char, found))
+        self._pos += 1
+
+    def decode(self):
+        """Decode and return the next value."""
+        size = self._chunk_size
+        while True:
+            self.peek()
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                # value is not complete yet. Read bigger chunks each time to keep
+                # it linear
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # numbers and literals may continue in the next chunk. A number cut
+            # at "1." or "2.5e" decodes as a shorter number ending before the cut
+            is_number = isinstance(value, (int, float)) and not isinstance(
+                value, bool
+            )
+            is_cut = end == len(self._buffer) or (
+                is_number and self._buffer[end] in NUMBER_CHARACTERS
+            )
+            if is_cut and self._fill(size):
+                size *= 2
+                continue
+            self._pos = end
+            return value
+
+    def entries(self):
+        """Yield the keys (or indices) of the container at the current position.
+
+        The value of each entry must be consumed before asking for the next one.
+        """
+        opening = self.peek()
+        if opening not in ("{", "["):
+            raise ValueError("Expecting a container, found '%s'" % opening)
+        closing = "}" if opening == "{" else "]"
+        self._pos += 1
+        if self.peek() == closing:
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            if opening == "{":
+                key = self.decode()
+                self.expect(":")
+            else:
+                key = index
+            yield key
+            index += 1
+            char = self.peek()
+            self._pos += 1
+            if char == closing:
+                return
+            if char != ",":
+                raise ValueError("Expecting ',' delimiter, found '%s'" % char)
+
+    def walk(self, keys, path=()):
+        """Yield (path, value) pairs down to the container at the keys path."""
+        for key in self.entries():
+            if keys and key == keys[0] and self.peek() in ("{", "["):
+                for item in self.walk(keys[1:], path + (key,)):
+                    yield item
+            else:
+                yield path + (key,), self.decode()
@@ -0,0 +1,224 @@
+"""Build profiler for action sessions.
+
+Records the duration of each phase (init, feed, action) of each action during a
+build, optionally with a cProfile capture per action. Reports are written next to
+the session (.tr) file:
+    <session>_build_report.json: Timings of the last build
+    <session>_build_report.csv: Same timings as a table
+    <session>_build_history.csv: Timings of all builds. One row per action per build
+    <session>_profiles/<action>.prof: cProfile captures if enabled
+"""
+import os
+import csv
+import time
+import datetime
+import cProfile
+import contextlib
+
+from trigger.core import filelog
+from trigger.core import io
+
+LOG = filelog.Filelog(logname=__name__, filename="trigger_log")
+
+HISTORY_FIELDS = [
+    "build",
+    "date",
+    "action",
+    "type",
+    "init",
+    "feed",
+    "action_time",
+    "total",
+    "status",
+]
+
+
+class BuildProfiler(object):
+    """Collects structured timings of a build."""
+
+    def __init__(
+        self,
+        cprofile=False,
+        regression_threshold=1.25,
+        regression_minimum=0.5,
+        history_depth=10,
+    ):
+        """Initialize.
+
+        Args:
+            cprofile: (Bool) Captures a cProfile for each action
+            regression_threshold: (Float) An action is flagged as regressed if it takes
+                longer than its median in the history multiplied by this value
+            regression_minimum: (Float) Differences smaller than this (in seconds)
+                are ignored
+            history_depth: (Int) Number of previous builds used for the comparison
+        """
+        super(BuildProfiler, self).__init__()
+        self.cprofile = cprofile
+        self.regression_threshold = regression_threshold
+        self.regression_minimum = regression_minimum
+        self.history_depth = history_depth
+        self.build_id = None
+        self.start_time = None
+        self.total = 0.0
+        self.records = []
+        self._profiles = {}
+
+    def start(self):
+        """Start a new build."""
+        self.build_id = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.start_time = time.time()
+        self.total = 0.0
+        self.records = []
+        self._profiles = {}
+
+    def finish(self):
+        """Finish the build."""
+        if self.start_time is not None:
+            self.total = time.time() - self.start_time
+
+    def _get_record(self, action):
+        """Return the record of the action. Creates if doesn't exist."""
+        for record in self.records:
+            if record["action"] == action["name"]:
+                return record
+        record = {
+            "action": action["name"],
+            "type": action["type"],
+            "init": 0.0,
+            "feed": 0.0,
+            "action_time": 0.0,
+            "total": 0.0,
+            "status": "success",
+        }
+        self.records.append(record)
+        return record
+
+    @contextlib.contextmanager
+    def measure(self, action, phase):
+        """Measure the phase of the given action.
+
+        Args:
+            action: (Dict) Action dictionary from the actions session
+            phase: (String) "init", "feed" or "action"
+        """
+        record = self._get_record(action)
+        profile = None
+        if self.cprofile:
+            profile = self._profiles.setdefault(action["name"], cProfile.Profile())
+            profile.enable()
+        start = time.time()
+        try:
+            yield
+        except Exception:
+            record["status"] = "failed at %s" % phase
+            raise
+        finally:
+            elapsed = time.time() - start
+            if profile:
+                profile.disable()
+            key = "action_time" if phase == "action" else phase
+            record[key] += elapsed
+            record["total"] += elapsed
+
+    def report(self):
+        """Return the timings of the build as dictionary."""
+        return {
+            "build": self.build_id,
+            "total": self.total,
+            "actions": sorted(self.records, key=lambda x: x["total"], reverse=True),
+        }
+
+    def write_report(self, session_path):
+        """Write the report, history and profiles next to the session file.
+
+        Args:
+            session_path: (String) Path of the .tr file
+
+        Returns:
+            (Dict) The report including the regressed actions
+        """
+        base_path = os.path.splitext(session_path)[0]
+        history_path = "%s_build_history.csv" % base_path
+        report = self.report()
+        report["regressions"] = self.find_regressions(self.read_history(history_path))
+        for regression in report["regressions"]:
+            LOG.warning(
+                "%(action)s took %(total).2f seconds. "
+                "Median of previous builds is %(median).2f" % regression
+            )
+
+        io.IO(file_path="%s_build_report.json" % base_path).write(report)
+        self._write_csv("%s_build_report.csv" % base_path, report["actions"])
+        self._append_history(history_path)
+
+        if self._profiles:
+            profile_dir = "%s_profiles" % base_path
+            io.IO.folder_check(profile_dir)
+            for action_name, profile in self._profiles.items():
+                profile.dump_stats(os.path.join(profile_dir, "%s.prof" % action_name))
+        return report
+
+    @staticmethod
+    def _write_csv(file_path, records):
+        fields = ["action", "type", "init", "feed", "action_time", "total", "status"]
+        with open(file_path, "w") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, lineterminator="\n")
+            writer.writeheader()
+            for record in records:
+                writer.writerow(record)
+
+    def _append_history(self, history_path):
+        is_new = not os.path.isfile(history_path)
+        date = datetime.datetime.fromtimestamp(self.start_time).isoformat()
+        with open(history_path, "a") as f:
+            writer = csv.DictWriter(f, fieldnames=HISTORY_FIELDS, lineterminator="\n")
+            if is_new:
+                writer.writeheader()
+            for record in self.records:
+                row = dict(record, build=self.build_id, date=date)
+                writer.writerow(row)
+
+    @staticmethod
+    def read_history(history_path):
+        """Return the history rows as list of dictionaries."""
+        if not os.path.isfile(history_path):
+            return []
+        with open(history_path, "r") as f:
+            return list(csv.DictReader(f))
+
+    def find_regressions(self, history):
+        """Compare the current timings with the previous builds.
+
+        Args:
+            history: (List) Rows returned by read_history()
+
+        Returns:
+            (List) Dictionaries of regressed actions with their current total and
+                the median of the previous builds
+        """
+        previous = {}
+        for row in history:
+            if row.get("status") != "success":
+                continue
+            previous.setdefault(row["action"], []).append(float(row["total"]))
+
+        regressions = []
+        for record in self.records:
+            totals = previous.get(record["action"], [])[-self.history_depth:]
+            if not totals or record["status"] != "success":
+                continue
+            totals = sorted(totals)
+            median = totals[len(totals) // 2]
+            if (
+                record["total"] > median * self.regression_threshold
+                and record["total"] - median > self.regression_minimum
+            ):
+                regressions.append(
+                    {
+                        "action": record["action"],
+                        "total": record["total"],
+                        "median": median,
+                    }
+                )
+        return regressions
@@ -0,0 +1,185 @@
+"""Lazy plugin registry for actions and modules.
+
+Plugin files are found by parsing their source instead of importing them. The
+class of a plugin is imported only when it is first asked for. Default data
+dictionaries (ACTION_DATA, LIMB_DATA) are read from the source as literals, so
+listing the plugins and their defaults does not import any of them.
+
+Parsed results are cached in a manifest file inside the plugin package and only
+the changed files are parsed again.
+"""
+import os
+import ast
+import glob
+import json
+import importlib
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from trigger.core import filelog
+from trigger.core import io
+
+LOG = filelog.Filelog(logname=__name__, filename="trigger_log")
+
+MANIFEST_NAME = "_manifest.json"
+
+
+def _base_name(node):
+    """Return the name of the base class node. e.g. 'Weights' for weights.Weights"""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def scan_plugin(file_path, base_classes, data_name):
+    """Parse the plugin file without importing it.
+
+    Args:
+        file_path: (String) Path of the python file
+        base_classes: (List) Names of the base classes which make a plugin
+        data_name: (String) Name of the module level default data dictionary
+
+    Returns:
+        (Dict) Manifest entry of the file
+    """
+    module_name = os.path.splitext(os.path.basename(file_path))[0]
+    with open(file_path, "rb") as f:
+        tree = ast.parse(f.read(), file_path)
+    data = None
+    is_literal = False
+    is_plugin = False
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            if any(isinstance(t, ast.Name) and t.id == data_name for t in node.targets):
+                try:
+                    data = ast.literal_eval(node.value)
+                    is_literal = True
+                except ValueError:
+                    data = None
+                    is_literal = False
+        elif isinstance(node, ast.ClassDef):
+            bases = [_base_name(base) for base in node.bases]
+            # classes inheriting other plugins follow the naming rule instead
+            if (
+                set(bases).intersection(base_classes)
+                or node.name == module_name.capitalize()
+            ):
+                # the data at the time the class is defined
+                is_plugin = True
+                break
+    stat = os.stat(file_path)
+    return {
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "is_plugin": is_plugin,
+        "data": data,
+        "is_literal": is_literal,
+    }
+
+
+class PluginRegistry(Mapping):
+    """Read-only {plugin name: plugin} mapping which imports the plugins on demand."""
+
+    def __init__(
+        self,
+        package_name,
+        package_folder,
+        resolver,
+        base_classes,
+        data_name,
+        data_getter,
+    ):
+        """Initialize.
+
+        Args:
+            package_name: (String) e.g. "trigger.actions"
+            package_folder: (String) Folder of the package
+            resolver: (Function) Returns the plugin from the imported python module
+            base_classes: (List) Names of the base classes which make a plugin
+            data_name: (String) Name of the default data dictionary in the plugin files
+            data_getter: (Function) Returns the default data from the resolved plugin.
+                Used if the data cannot be read from the source.
+        """
+        super(PluginRegistry, self).__init__()
+        self.package_name = package_name
+        self.package_folder = package_folder
+        self.resolver = resolver
+        self.base_classes = base_classes
+        self.data_name = data_name
+        self.data_getter = data_getter
+        self.manifest_path = os.path.join(package_folder, MANIFEST_NAME)
+        self._plugins = {}
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        """Read the manifest and update the entries of the changed files."""
+        manifest = {}
+        if os.path.isfile(self.manifest_path):
+            try:
+                with open(self.manifest_path, "r") as f:
+                    manifest = json.load(f)
+            except ValueError:
+                manifest = {}
+
+        current = {}
+        for file_path in sorted(glob.glob(os.path.join(self.package_folder, "*.py"))):
+            file_name = os.path.basename(file_path)
+            if file_name.startswith("_"):
+                continue
+            module_name = file_name[:-3]
+            stat = os.stat(file_path)
+            entry = manifest.get(module_name)
+            if (
+                not entry
+                or entry["mtime"] != stat.st_mtime
+                or entry["size"] != stat.st_size
+            ):
+                entry = scan_plugin(file_path, self.base_classes, self.data_name)
+            current[module_name] = entry
+        if current != manifest:
+            try:
+                with io.atomic_write(self.manifest_path) as f:
+                    f.write(io.dumps(current, compact=False))
+            except (IOError, OSError):
+                # read-only installation. Parsing the files next time is fine.
+                pass
+        return {name: entry for name, entry in current.items() if entry["is_plugin"]}
+
+    def __getitem__(self, name):
+        if name not in self.manifest:
+            raise KeyError(name)
+        if name not in self._plugins:
+            module = importlib.import_module("%s.%s" % (self.package_name, name))
+            plugin = self.resolver(module)
+            if not plugin:
+                LOG.error(
+                    "%s.%s does not define a valid plugin" % (self.package_name, name)
+                )
+                raise KeyError(name)
+            self._plugins[name] = plugin
+        return self._plugins[name]
+
+    def __iter__(self):
+        return iter(sorted(self.manifest))
+
+    def __len__(self):
+        return len(self.manifest)
+
+    def __contains__(self, name):
+        return name in self.manifest
+
+    def is_loaded(self, name):
+        """Return True if the plugin is imported already."""
+        return name in self._plugins
+
+    def get_data(self, name):
+        """Return the default data of the plugin without importing it if possible."""
+        entry = self.manifest[name]
+        if entry["is_literal"]:
+            return entry["data"]
+        return self.data_getter(self[name])
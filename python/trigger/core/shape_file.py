@@ -0,0 +1,185 @@
+"""Sparse blendshape delta file format.
+
+Stores a shape pack as the changed vertex indices and their deltas per target
+instead of full meshes. The file is a numpy .npz container (zip archive) with:
+    - header: JSON encoded list of the targets and the shape information
+    - <n>_indices / <n>_deltas: vertex index and double precision (x, y, z)
+      delta arrays per target
+    - base_points: point positions of the neutral shape (optional)
+
+Each target in the header has:
+    name: (String) Name of the target
+    target: (String) Name of the base target if this is an inbetween. None for bases
+    value: (Float) Weight value the target is reached at. 1.0 for bases
+    combination: (List) Names of the targets driving a combination. None otherwise
+
+Members of the archive are only decompressed when they are accessed, so readers
+can load just the targets they need.
+"""
+import os
+import json
+
+import numpy as np
+
+from trigger.core import filelog
+from trigger.core.io import IO, atomic_write
+
+FILELOG = filelog.Filelog(logname=__name__, filename="trigger_log")
+
+EXTENSION = ".trsz"
+VERSION = 1
+
+
+def is_shape_file(file_path):
+    """Return True if the file path is a sparse shape file."""
+    return os.path.splitext(file_path)[1] == EXTENSION
+
+
+def sparsify(deltas, tolerance=1e-5):
+    """Return the indices and deltas of the vertices moving more than tolerance.
+
+    Args:
+        deltas: (numpy.ndarray) (vertex count, 3) dense delta array
+        tolerance: (Float) Smaller deltas on all axes are dropped
+
+    Returns:
+        (tuple) numpy index array and (n, 3) numpy delta array
+    """
+    deltas = np.asarray(deltas, dtype=np.float64).reshape(-1, 3)
+    indices = np.flatnonzero(np.any(np.abs(deltas) > tolerance, axis=1))
+    return indices, deltas[indices]
+
+
+def write(
+    targets, file_path, vertex_count, base_points=None, info=None, compress=True
+):
+    """Write the targets to a sparse shape file.
+
+    Args:
+        targets: (List) Target dictionaries. Besides the header keys (see module
+            docstring) each has either "deltas" as a dense (vertex count, 3) array
+            or "indices" and "deltas" as sparse arrays
+        file_path: (String) Path of the file. Must end with .trsz
+        vertex_count: (int) Vertex count of the neutral shape
+        base_points: (numpy.ndarray) Optional (vertex count, 3) neutral points
+        info: (Dict) Optional extra information stored in the header. e.g. the
+            name of the source blendshape node
+        compress: (bool) Compress the arrays.
+
+    Returns:
+        (String) Path of the file
+    """
+    if not is_shape_file(file_path):
+        FILELOG.error("Sparse shape files must have %s extension" % EXTENSION)
+        raise ValueError("Invalid extension => %s" % file_path)
+    IO.folder_check(file_path)
+
+    header = {
+        "version": VERSION,
+        "vertex_count": vertex_count,
+        "info": info or {},
+        "targets": [],
+    }
+    arrays = {}
+    for nmb, target in enumerate(targets):
+        if "indices" in target:
+            indices = np.asarray(target["indices"])
+            deltas = np.asarray(target["deltas"], dtype=np.float64).reshape(-1, 3)
+        else:
+            indices, deltas = sparsify(target["deltas"])
+        if len(indices) != len(deltas):
+            FILELOG.error("Indices and deltas of %s do not match" % target["name"])
+            raise ValueError("Invalid target => %s" % target["name"])
+        arrays["%i_indices" % nmb] = indices.astype(np.int32)
+        # full precision, so the stored shapes match the sculpts exactly
+        arrays["%i_deltas" % nmb] = deltas
+        header["targets"].append(
+            {
+                "name": target["name"],
+                "target": target.get("target"),
+                "value": target.get("value", 1.0),
+                "combination": target.get("combination"),
+            }
+        )
+    if base_points is not None:
+        arrays["base_points"] = np.asarray(base_points, dtype=np.float64).reshape(-1, 3)
+    arrays["header"] = np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8)
+
+    with atomic_write(file_path) as f:
+        if compress:
+            np.savez_compressed(f, **arrays)
+        else:
+            np.savez(f, **arrays)
+    return file_path
+
+
+class ShapeFile(object):
+    """Lazy reader for the sparse shape files."""
+
+    def __init__(self, file_path):
+        """Open the file. Only the header is read."""
+        super(ShapeFile, self).__init__()
+        if not os.path.isfile(file_path):
+            FILELOG.error("File cannot be found => %s" % file_path)
+            raise IOError("File cannot be found => %s" % file_path)
+        self.file_path = file_path
+        self._archive = np.load(file_path, allow_pickle=False)
+        self.header = json.loads(self._archive["header"].tobytes().decode("utf-8"))
+        self._keys = {x["name"]: nmb for nmb, x in enumerate(self.header["targets"])}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the archive."""
+        self._archive.close()
+
+    @property
+    def vertex_count(self):
+        """Vertex count of the neutral shape."""
+        return self.header["vertex_count"]
+
+    @property
+    def targets(self):
+        """Header dictionaries of all targets in the order they are written."""
+        return [dict(x) for x in self.header["targets"]]
+
+    @property
+    def names(self):
+        """Names of all targets."""
+        return [x["name"] for x in self.header["targets"]]
+
+    def get_arrays(self, name):
+        """Return the vertex index and (n, 3) delta arrays of the target."""
+        try:
+            nmb = self._keys[name]
+        except KeyError:
+            raise KeyError("%s is not in %s" % (name, self.file_path))
+        return (
+            self._archive["%i_indices" % nmb].astype(np.intp),
+            self._archive["%i_deltas" % nmb].astype(np.float64),
+        )
+
+    def get_deltas(self, name):
+        """Return the dense (vertex count, 3) delta array of the target."""
+        indices, deltas = self.get_arrays(name)
+        dense = np.zeros((self.vertex_count, 3))
+        dense[indices] = deltas
+        return dense
+
+    def get_base_points(self):
+        """Return the neutral points. None if the file doesn't have them."""
+        if "base_points" not in self._archive.files:
+            return None
+        return self._archive["base_points"]
+
+    def get_points(self, name):
+        """Return the point positions of the target. Needs the base points."""
+        base_points = self.get_base_points()
+        if base_points is None:
+            FILELOG.error("%s has no base points" % self.file_path)
+            raise ValueError("No base points => %s" % self.file_path)
+        return base_points + self.get_deltas(name)
@@ -0,0 +1,232 @@
+"""Binary weight file format.
+
+Compressed alternative to the cmds.deformerWeights JSON files. The file is a
+numpy .npz container (zip archive) with:
+    - header: JSON encoded deformerWeight dictionary without the point lists
+    - <n>_indices / <n>_values: vertex index and weight arrays per influence
+    - dq_weights: DQ blend weights of skinClusters (optional)
+
+Members of the archive are only decompressed when they are accessed, so readers
+can load just the influences they need.
+"""
+import os
+import json
+
+import numpy as np
+
+from trigger.core import filelog
+from trigger.core.io import IO, atomic_write
+from trigger.objects import weight_matrix
+
+FILELOG = filelog.Filelog(logname=__name__, filename="trigger_log")
+
+EXTENSION = ".trwz"
+VERSION = 1
+
+
+def is_weight_file(file_path):
+    """Return True if the file path is a binary weight file."""
+    return os.path.splitext(file_path)[1] == EXTENSION
+
+
+def write(data, file_path, sparse=True, compress=True):
+    """Write the deformerWeight dictionary to a binary weight file.
+
+    Args:
+        data: (dict) Dictionary matching cmds.deformerWeights JSON output
+        file_path: (String) Path of the binary file. Must end with .trwz
+        sparse: (bool) If True, weights equal to the defaultValue of the influence
+            are not written. Same as cmds.deformerWeights does.
+        compress: (bool) Compress the arrays.
+
+    Returns:
+        (String) Path of the file
+    """
+    if not is_weight_file(file_path):
+        FILELOG.error("Binary weight files must have %s extension" % EXTENSION)
+        raise ValueError("Invalid extension => %s" % file_path)
+    IO.folder_check(file_path)
+
+    header = {"version": VERSION, "influences": []}
+    header.update(
+        {
+            key: value
+            for key, value in data.items()
+            if key not in ("deformerWeight", "DQ_weights")
+        }
+    )
+    header["deformerWeight"] = {
+        key: value
+        for key, value in data["deformerWeight"].items()
+        if key != "weights"
+    }
+    arrays = {}
+    header_weights = []
+    for nmb, weights in enumerate(data["deformerWeight"]["weights"]):
+        indices, values = weight_matrix.points_to_arrays(weights["points"])
+        if sparse:
+            mask = values != weights.get("defaultValue", 0.0)
+            indices, values = indices[mask], values[mask]
+        arrays["%i_indices" % nmb] = indices.astype(np.int32)
+        arrays["%i_values" % nmb] = values
+        header_weights.append(
+            {key: value for key, value in weights.items() if key != "points"}
+        )
+        header["influences"].append(weights.get("source"))
+    header["deformerWeight"]["weights"] = header_weights
+    if "DQ_weights" in data:
+        arrays["dq_weights"] = np.asarray(data["DQ_weights"], dtype=np.float64)
+    arrays["header"] = np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8)
+
+    with atomic_write(file_path) as f:
+        if compress:
+            np.savez_compressed(f, **arrays)
+        else:
+            np.savez(f, **arrays)
+    return file_path
+
+
+def read(file_path, influences=None):
+    """Read the binary weight file into a deformerWeight dictionary.
+
+    Args:
+        file_path: (String) Path of the binary file
+        influences: (list) Only read these influences. All if None
+
+    Returns:
+        (dict) Dictionary matching cmds.deformerWeights JSON output
+    """
+    with WeightFile(file_path) as weight_file:
+        return weight_file.to_deformer_weight(influences=influences)
+
+
+def json_to_binary(json_path, binary_path=None, remove_source=False):
+    """Convert a deformerWeight JSON file to a binary weight file.
+
+    Args:
+        json_path: (String) Path of the JSON file
+        binary_path: (String) Path of the binary file. Uses the same name with
+            .trwz extension if not defined
+        remove_source: (bool) Delete the JSON file after the conversion
+
+    Returns:
+        (String) Path of the binary file
+    """
+    binary_path = binary_path or "%s%s" % (os.path.splitext(json_path)[0], EXTENSION)
+    data = IO(file_path=json_path).read()
+    if not data:
+        FILELOG.error("Cannot read weights file => %s" % json_path)
+        raise ValueError("Cannot read weights file => %s" % json_path)
+    write(data, binary_path)
+    if remove_source:
+        os.remove(json_path)
+    return binary_path
+
+
+def binary_to_json(binary_path, json_path=None):
+    """Convert a binary weight file to a deformerWeight JSON file.
+
+    Args:
+        binary_path: (String) Path of the binary file
+        json_path: (String) Path of the JSON file. Uses the same name with
+            .json extension if not defined
+
+    Returns:
+        (String) Path of the JSON file
+    """
+    json_path = json_path or "%s.json" % os.path.splitext(binary_path)[0]
+    return IO(file_path=json_path).write(read(binary_path))
+
+
+class WeightFile(object):
+    """Lazy reader for the binary weight files."""
+
+    def __init__(self, file_path):
+        """Open the file. Only the header is read."""
+        super(WeightFile, self).__init__()
+        if not os.path.isfile(file_path):
+            FILELOG.error("File cannot be found => %s" % file_path)
+            raise IOError("File cannot be found => %s" % file_path)
+        self.file_path = file_path
+        self._archive = np.load(file_path, allow_pickle=False)
+        self.header = json.loads(self._archive["header"].tobytes().decode("utf-8"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the archive."""
+        self._archive.close()
+
+    @property
+    def influences(self):
+        """Names of the influences stored in the file."""
+        return list(self.header["influences"])
+
+    @property
+    def vertex_count(self):
+        """Vertex count of the shape."""
+        return self.header["deformerWeight"]["shapes"][0]["size"]
+
+    def _influence_key(self, influence):
+        try:
+            return self.header["influences"].index(influence)
+        except ValueError:
+            raise KeyError("%s is not in %s" % (influence, self.file_path))
+
+    def get_arrays(self, influence):
+        """Return the vertex index and weight arrays of the influence."""
+        nmb = self._influence_key(influence)
+        return (
+            self._archive["%i_indices" % nmb].astype(np.intp),
+            self._archive["%i_values" % nmb],
+        )
+
+    def get_points(self, influence):
+        """Return the weights of the influence as deformerWeight point dictionaries."""
+        indices, values = self.get_arrays(influence)
+        return [
+            {"index": index, "value": value}
+            for index, value in zip(indices.tolist(), values.tolist())
+        ]
+
+    def header_data(self, influences=None):
+        """Return the deformerWeight dictionary with empty point lists.
+
+        Useful for reading the deformer information without touching the weights.
+        """
+        data = json.loads(json.dumps(self.header))
+        data.pop("version", None)
+        data.pop("influences", None)
+        weights_list = data["deformerWeight"]["weights"]
+        if influences:
+            weights_list = [x for x in weights_list if x.get("source") in influences]
+        for weights in weights_list:
+            weights["points"] = []
+        data["deformerWeight"]["weights"] = weights_list
+        return data
+
+    def to_deformer_weight(self, influences=None):
+        """Return the deformerWeight dictionary for the given influences. All if None."""
+        data = self.header_data(influences=influences)
+        for weights in data["deformerWeight"]["weights"]:
+            weights["points"] = self.get_points(weights.get("source"))
+        if "dq_weights" in self._archive.files:
+            data["DQ_weights"] = self.get_dq_weights().tolist()
+        return data
+
+    def get_dq_weights(self):
+        """Return the DQ blend weights array. None if the file doesn't have them."""
+        if "dq_weights" not in self._archive.files:
+            return None
+        return self._archive["dq_weights"]
+
+    def to_matrix(self, influences=None):
+        """Return the weights of the given influences as a WeightMatrix. All if None."""
+        influences = influences or self.influences
+        return weight_matrix.WeightMatrix.from_arrays(
+            self.vertex_count, influences, [self.get_arrays(x) for x in influences]
+        )
@@ -1,11 +1,175 @@
-"""Module to ease the arithmetic operations"""
+"""Module to ease the arithmetic operations
+
+The nodes are created in bulk if the functions are called inside a
+graph_builder.GraphBuilder context.
+
+Inside an ExpressionCache context, operations with only constant inputs return
+the computed value instead of creating a node and an operation repeated with the
+same inputs returns the output plug of the existing node:
+
+    with arithmetic.ExpressionCache() as cache:
+        arithmetic.multiply(2, 3)  # 6.0
+        arithmetic.add("cont.tx", 1)  # add.output1D
+        arithmetic.add("cont.tx", 1)  # add.output1D again
+    cache.report()
+
+Only the unnamed calls returning plugs are folded or reused. Nodes asked with
+return_plug=False or with an explicit name are always created and never shared
+with other calls, as their callers may edit them afterwards.
+"""
+import math
 
 from maya import cmds
 from trigger.core import compatibility as compat
 from trigger.core import filelog
+from trigger.library import graph_builder
 
 LOG = filelog.Filelog(logname=__name__, filename="trigger_log")
 
+_CACHES = []
+
+CONDITIONS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+}
+
+
+class ExpressionCache(object):
+    """Constant folding and reuse of the identical operations."""
+
+    def __init__(self):
+        super(ExpressionCache, self).__init__()
+        # {(operation, inputs): output plug(s)}
+        self.expressions = {}
+        # {operation: [folded, reused, nodes saved]}
+        self.counts = {}
+
+    def __enter__(self):
+        _CACHES.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _CACHES.remove(self)
+        return False
+
+    def find(self, operation, inputs, fold=None, fold_inputs=None, node_count=1):
+        """Return the folded value or the existing output. None if not found.
+
+        Args:
+            operation: (String) Name of the operation including its settings
+            inputs: (List) Values or plugs of the operation
+            fold: (Function) Computes the result from the inputs. Returns None
+                if it cannot be computed
+            fold_inputs: (List) Inputs which must be constant for folding.
+                Defaults to all inputs
+            node_count: (Int) Number of nodes the operation creates
+        """
+        if fold_inputs is None:
+            fold_inputs = inputs
+        if fold and not any(compat.is_string(x) for x in fold_inputs):
+            value = fold(*inputs)
+            if value is not None:
+                self._count(operation, 0, node_count)
+                return value
+        output = self.expressions.get(_get_key(operation, inputs))
+        if output is None:
+            return None
+        plug = output[0] if isinstance(output, list) else output
+        if not graph_builder.node_exists(plug.split(".")[0]):
+            return None
+        self._count(operation, 1, node_count)
+        return output
+
+    def add(self, operation, inputs, output):
+        self.expressions[_get_key(operation, inputs)] = output
+
+    def _count(self, operation, index, node_count):
+        counts = self.counts.setdefault(operation.split(":")[0], [0, 0, 0])
+        counts[index] += 1
+        counts[2] += node_count
+
+    def report(self):
+        """Log and return the number of nodes saved.
+
+        Returns:
+            (Dict) folded, reused and nodes_saved totals. 'operations' holds
+                the same values per operation
+        """
+        operations = {
+            name: {"folded": folded, "reused": reused, "nodes_saved": saved}
+            for name, (folded, reused, saved) in self.counts.items()
+        }
+        report = {
+            "folded": sum(x["folded"] for x in operations.values()),
+            "reused": sum(x["reused"] for x in operations.values()),
+            "nodes_saved": sum(x["nodes_saved"] for x in operations.values()),
+            "operations": operations,
+        }
+        LOG.info(
+            "Expression cache saved %i nodes (%i folded, %i reused)"
+            % (report["nodes_saved"], report["folded"], report["reused"])
+        )
+        return report
+
+
+def get_cache():
+    """Return the active ExpressionCache or None."""
+    return _CACHES[-1] if _CACHES else None
+
+
+def _get_key(operation, inputs):
+    key = []
+    for value in inputs:
+        if compat.is_string(value):
+            key.append(value)
+        elif isinstance(value, (int, float)):
+            key.append(float(value))
+        else:
+            # matrices
+            key.append(str(value))
+    return operation, tuple(key)
+
+
+def _is_cacheable(return_plug, name, default_name):
+    """Return True if the operation can be folded or shared.
+
+    Named nodes and the nodes returned with return_plug=False belong to the
+    caller, who may edit them afterwards.
+    """
+    return return_plug and name == default_name
+
+
+def _find_expression(operation, inputs, cacheable, **kwargs):
+    cache = get_cache()
+    if not cache or not cacheable:
+        return None
+    return cache.find(operation, inputs, **kwargs)
+
+
+def _add_expression(operation, inputs, cacheable, output):
+    cache = get_cache()
+    if cache and cacheable:
+        cache.add(operation, inputs, output)
+
+
+def _sum(*values):
+    return float(sum(values))
+
+
+def _divide(a, b):
+    return a / float(b) if b else None
+
+
+def _power(a, b):
+    try:
+        return math.pow(a, b)
+    except (ValueError, OverflowError):
+        return None
+
 
 def add(a=None, b=None, value_list=None, return_plug=True, name="add"):
     """
@@ -28,14 +192,21 @@ def add(a=None, b=None, value_list=None, return_plug=True, name="add"):
         else:
             value_list = [a, b]
 
-    add_node = cmds.createNode("plusMinusAverage", name=name)
-    cmds.setAttr("{}.operation".format(add_node), 1)
+    # order of the inputs does not change the sum
+    inputs = sorted(value_list, key=str)
+    cacheable = _is_cacheable(return_plug, name, "add")
+    result = _find_expression("add", inputs, cacheable, fold=_sum)
+    if result is not None:
+        return result
+    add_node = graph_builder.create_node("plusMinusAverage", name=name)
+    graph_builder.set_value("{}.operation".format(add_node), 1)
     for nmb, value in enumerate(value_list):
         if compat.is_string(value):
-            cmds.connectAttr(value, "%s.input1D[%i]" % (add_node, nmb))
+            graph_builder.connect(value, "%s.input1D[%i]" % (add_node, nmb))
         else:
-            cmds.setAttr("%s.input1D[%i]" % (add_node, nmb), value)
+            graph_builder.set_value("%s.input1D[%i]" % (add_node, nmb), value)
 
+    _add_expression("add", inputs, cacheable, "{}.output1D".format(add_node))
     if return_plug:
         return "{}.output1D".format(add_node)
     else:
@@ -63,14 +234,23 @@ def subtract(a=None, b=None, value_list=None, return_plug=True, name="subtract")
         else:
             value_list = [a, b]
 
-    subtract_node = cmds.createNode("plusMinusAverage", name=name)
-    cmds.setAttr("{}.operation".format(subtract_node), 2)
+    cacheable = _is_cacheable(return_plug, name, "subtract")
+    result = _find_expression(
+        "subtract", value_list, cacheable, fold=lambda x, *y: x - _sum(*y)
+    )
+    if result is not None:
+        return result
+    subtract_node = graph_builder.create_node("plusMinusAverage", name=name)
+    graph_builder.set_value("{}.operation".format(subtract_node), 2)
     for nmb, value in enumerate(value_list):
         if compat.is_string(value):
-            cmds.connectAttr(value, "%s.input1D[%i]" % (subtract_node, nmb))
+            graph_builder.connect(value, "%s.input1D[%i]" % (subtract_node, nmb))
         else:
-            cmds.setAttr("%s.input1D[%i]" % (subtract_node, nmb), value)
+            graph_builder.set_value("%s.input1D[%i]" % (subtract_node, nmb), value)
 
+    _add_expression(
+        "subtract", value_list, cacheable, "{}.output1D".format(subtract_node)
+    )
     if return_plug:
         return "{}.output1D".format(subtract_node)
     else:
@@ -89,14 +269,20 @@ def multiply(a, b, return_plug=True, name="multiply"):
     Returns:
         String: Output plug or node
     """
+    inputs = sorted([a, b], key=str)
+    cacheable = _is_cacheable(return_plug, name, "multiply")
+    result = _find_expression("multiply", inputs, cacheable, fold=lambda x, y: x * y)
+    if result is not None:
+        return result
     # if the version is 2026 and above use the new name for the node
-    mult_node = cmds.createNode(compat.MULT_NODE_NAME, name=name)
+    mult_node = graph_builder.create_node(compat.MULT_NODE_NAME, name=name)
 
     for nmb, value in enumerate([a, b]):
         if compat.is_string(value):
-            cmds.connectAttr(value, "%s.input%i" % (mult_node, nmb + 1))
+            graph_builder.connect(value, "%s.input%i" % (mult_node, nmb + 1))
         else:
-            cmds.setAttr("%s.input%i" % (mult_node, nmb + 1), value)
+            graph_builder.set_value("%s.input%i" % (mult_node, nmb + 1), value)
+    _add_expression("multiply", inputs, cacheable, "%s.output" % mult_node)
     if return_plug:
         return "%s.output" % mult_node
     else:
@@ -115,13 +301,18 @@ def divide(a, b, return_plug=True, name="divide"):
     Returns:
         String: Output plug or node
     """
-    div_node = cmds.createNode("multiplyDivide", name=name)
-    cmds.setAttr("%s.operation" % div_node, 2)
+    cacheable = _is_cacheable(return_plug, name, "divide")
+    result = _find_expression("divide", [a, b], cacheable, fold=_divide)
+    if result is not None:
+        return result
+    div_node = graph_builder.create_node("multiplyDivide", name=name)
+    graph_builder.set_value("%s.operation" % div_node, 2)
     for nmb, value in enumerate([a, b]):
         if compat.is_string(value):
-            cmds.connectAttr(value, "%s.input%iX" % (div_node, nmb + 1))
+            graph_builder.connect(value, "%s.input%iX" % (div_node, nmb + 1))
         else:
-            cmds.setAttr("%s.input%iX" % (div_node, nmb + 1), value)
+            graph_builder.set_value("%s.input%iX" % (div_node, nmb + 1), value)
+    _add_expression("divide", [a, b], cacheable, "%s.outputX" % div_node)
     if return_plug:
         return "%s.outputX" % div_node
     else:
@@ -140,13 +331,18 @@ def power(a, b, return_plug=True, name="power"):
     Returns:
         String: Output plug or node
     """
-    power_node = cmds.createNode("multiplyDivide", name=name)
-    cmds.setAttr("%s.operation" % power_node, 3)
+    cacheable = _is_cacheable(return_plug, name, "power")
+    result = _find_expression("power", [a, b], cacheable, fold=_power)
+    if result is not None:
+        return result
+    power_node = graph_builder.create_node("multiplyDivide", name=name)
+    graph_builder.set_value("%s.operation" % power_node, 3)
     for nmb, value in enumerate([a, b]):
         if compat.is_string(value):
-            cmds.connectAttr(value, "%s.input%iX" % (power_node, nmb + 1))
+            graph_builder.connect(value, "%s.input%iX" % (power_node, nmb + 1))
         else:
-            cmds.setAttr("%s.input%iX" % (power_node, nmb + 1), value)
+            graph_builder.set_value("%s.input%iX" % (power_node, nmb + 1), value)
+    _add_expression("power", [a, b], cacheable, "%s.outputX" % power_node)
     if return_plug:
         return "%s.outputX" % power_node
     else:
@@ -165,11 +361,7 @@ def abs(a, return_plug=True, name="absolute"):
         String: Output plug or node
     """
     p2_p = power(a, 2, name="pow2_%s" % name)
-    abs_p = power(p2_p, 0.5, name=name)
-    if return_plug:
-        return abs_p
-    else:
-        return abs_p.split(".")[0]
+    return power(p2_p, 0.5, return_plug=return_plug, name=name)
 
 
 def invert(a, return_plug=True, name="invert"):
@@ -195,11 +387,16 @@ def reverse(a, return_plug=True, name="reverse"):
     Returns:
         String: Output plug or node
     """
-    reverse_node = cmds.createNode("reverse", name=name)
+    cacheable = _is_cacheable(return_plug, name, "reverse")
+    result = _find_expression("reverse", [a], cacheable, fold=lambda x: 1.0 - x)
+    if result is not None:
+        return result
+    reverse_node = graph_builder.create_node("reverse", name=name)
     if compat.is_string(a):
-        cmds.connectAttr(a, "%s.inputX" % reverse_node)
+        graph_builder.connect(a, "%s.inputX" % reverse_node)
     else:
-        cmds.setAttr("%s.inputX" % reverse_node, a)
+        graph_builder.set_value("%s.inputX" % reverse_node, a)
+    _add_expression("reverse", [a], cacheable, "%s.outputX" % reverse_node)
     if return_plug:
         return "%s.outputX" % reverse_node
     else:
@@ -218,19 +415,27 @@ def clamp(a, minimum=0, maximum=1, return_plug=True, name="clamp"):
     Returns:
         String: Output plug or node
     """
-    clamp_node = cmds.createNode("clamp", name=name)
+    inputs = [a, minimum, maximum]
+    cacheable = _is_cacheable(return_plug, name, "clamp")
+    result = _find_expression(
+        "clamp", inputs, cacheable, fold=lambda x, y, z: min(max(x, y), z)
+    )
+    if result is not None:
+        return result
+    clamp_node = graph_builder.create_node("clamp", name=name)
     if compat.is_string(a):
-        cmds.connectAttr(a, "%s.inputR" % clamp_node)
+        graph_builder.connect(a, "%s.inputR" % clamp_node)
     else:
-        cmds.setAttr("%s.inputR" % clamp_node, a)
+        graph_builder.set_value("%s.inputR" % clamp_node, a)
     if compat.is_string(minimum):
-        cmds.connectAttr(minimum, "%s.minR" % clamp_node)
+        graph_builder.connect(minimum, "%s.minR" % clamp_node)
     else:
-        cmds.setAttr("%s.minR" % clamp_node, minimum)
+        graph_builder.set_value("%s.minR" % clamp_node, minimum)
     if compat.is_string(maximum):
-        cmds.connectAttr(maximum, "%s.maxR" % clamp_node)
+        graph_builder.connect(maximum, "%s.maxR" % clamp_node)
     else:
-        cmds.setAttr("%s.maxR" % clamp_node, maximum)
+        graph_builder.set_value("%s.maxR" % clamp_node, maximum)
+    _add_expression("clamp", inputs, cacheable, "%s.outputR" % clamp_node)
     if return_plug:
         return "%s.outputR" % clamp_node
     else:
@@ -249,19 +454,27 @@ def switch(a, b, switch_value, return_plug=True, name="switch"):
     Returns:
         String: Output plug or node
     """
-    switch_node = cmds.createNode("blendTwoAttr", name=name)
+    inputs = [a, b, switch_value]
+    cacheable = _is_cacheable(return_plug, name, "switch")
+    result = _find_expression(
+        "switch", inputs, cacheable, fold=lambda x, y, z: x + (y - x) * z
+    )
+    if result is not None:
+        return result
+    switch_node = graph_builder.create_node("blendTwoAttr", name=name)
     if compat.is_string(a):
-        cmds.connectAttr(a, "%s.input[0]" % switch_node)
+        graph_builder.connect(a, "%s.input[0]" % switch_node)
     else:
-        cmds.setAttr("%s.input[0]" % switch_node, a)
+        graph_builder.set_value("%s.input[0]" % switch_node, a)
     if compat.is_string(b):
-        cmds.connectAttr(b, "%s.input[1]" % switch_node)
+        graph_builder.connect(b, "%s.input[1]" % switch_node)
     else:
-        cmds.setAttr("%s.input[1]" % switch_node, b)
+        graph_builder.set_value("%s.input[1]" % switch_node, b)
     if compat.is_string(switch_value):
-        cmds.connectAttr(switch_value, "%s.attributesBlender" % switch_node)
+        graph_builder.connect(switch_value, "%s.attributesBlender" % switch_node)
     else:
-        cmds.setAttr("%s.attributesBlender" % switch_node, switch_value)
+        graph_builder.set_value("%s.attributesBlender" % switch_node, switch_value)
+    _add_expression("switch", inputs, cacheable, "%s.output" % switch_node)
     if return_plug:
         return "%s.output" % switch_node
     else:
@@ -296,28 +509,46 @@ def if_else(
         msg = "Operation must be one of the following: {}".format(operation_dict.keys())
         LOG.error(msg)
         raise ValueError(msg)
-    condition_node = cmds.createNode("condition", name=name)
-    cmds.setAttr("{}.operation".format(condition_node), operation_dict.get(operation))
+    # the condition is known if both terms are constant. Result can still be a plug
+    operation_name = "condition:%s" % operation
+    inputs = [first_term, second_term, if_true, if_false]
+    cacheable = _is_cacheable(return_plug, name, "condition")
+    result = _find_expression(
+        operation_name,
+        inputs,
+        cacheable,
+        fold=lambda x, y, t, f: t if CONDITIONS[operation](x, y) else f,
+        fold_inputs=[first_term, second_term],
+    )
+    if result is not None:
+        return result
+    condition_node = graph_builder.create_node("condition", name=name)
+    graph_builder.set_value(
+        "{}.operation".format(condition_node), operation_dict.get(operation)
+    )
     if compat.is_string(first_term):
-        cmds.connectAttr(first_term, "{}.firstTerm".format(condition_node))
+        graph_builder.connect(first_term, "{}.firstTerm".format(condition_node))
     else:
-        cmds.setAttr("{}.firstTerm".format(condition_node), first_term)
+        graph_builder.set_value("{}.firstTerm".format(condition_node), first_term)
 
     if compat.is_string(second_term):
-        cmds.connectAttr(second_term, "{}.secondTerm".format(condition_node))
+        graph_builder.connect(second_term, "{}.secondTerm".format(condition_node))
     else:
-        cmds.setAttr("{}.secondTerm".format(condition_node), second_term)
+        graph_builder.set_value("{}.secondTerm".format(condition_node), second_term)
 
     if compat.is_string(if_true):
-        cmds.connectAttr(if_true, "{}.colorIfTrueR".format(condition_node))
+        graph_builder.connect(if_true, "{}.colorIfTrueR".format(condition_node))
     else:
-        cmds.setAttr("{}.colorIfTrueR".format(condition_node), if_true)
+        graph_builder.set_value("{}.colorIfTrueR".format(condition_node), if_true)
 
     if compat.is_string(if_false):
-        cmds.connectAttr(if_false, "{}.colorIfFalseR".format(condition_node))
+        graph_builder.connect(if_false, "{}.colorIfFalseR".format(condition_node))
     else:
-        cmds.setAttr("{}.colorIfFalseR".format(condition_node), if_false)
+        graph_builder.set_value("{}.colorIfFalseR".format(condition_node), if_false)
 
+    _add_expression(
+        operation_name, inputs, cacheable, "{}.outColorR".format(condition_node)
+    )
     if return_plug:
         return "{}.outColorR".format(condition_node)
     else:
@@ -334,14 +565,25 @@ def multiply_matrix(matrices_list, return_plug=True, name="multMatrix"):
     Returns:
         String: Output plug or node
     """
-    mult_matrix_node = cmds.createNode("multMatrix", name=name)
+    cacheable = _is_cacheable(return_plug, name, "multMatrix")
+    result = _find_expression("multiply_matrix", matrices_list, cacheable)
+    if result is not None:
+        return result
+    mult_matrix_node = graph_builder.create_node("multMatrix", name=name)
     for index, matrix in enumerate(matrices_list):
         if compat.is_string(matrix):
-            cmds.connectAttr(matrix, "%s.matrixIn[%i]" % (mult_matrix_node, index))
+            graph_builder.connect(
+                matrix, "%s.matrixIn[%i]" % (mult_matrix_node, index)
+            )
         else:
-            cmds.setAttr(
-                "%s.matrixIn[%i]" % (mult_matrix_node, index), matrix, type="matrix"
+            graph_builder.set_value(
+                "%s.matrixIn[%i]" % (mult_matrix_node, index),
+                matrix,
+                value_type="matrix",
             )
+    _add_expression(
+        "multiply_matrix", matrices_list, cacheable, "%s.matrixSum" % mult_matrix_node
+    )
     if return_plug:
         return "%s.matrixSum" % mult_matrix_node
     else:
@@ -358,19 +600,25 @@ def decompose_matrix(matrix, return_plug=True, name="decomposeMatrix"):
     Returns:
         String: Output plug or node
     """
-    decompose_matrix_node = cmds.createNode("decomposeMatrix", name=name)
+    cacheable = _is_cacheable(return_plug, name, "decomposeMatrix")
+    result = _find_expression("decompose_matrix", [matrix], cacheable)
+    if result is not None:
+        return list(result)
+    decompose_matrix_node = graph_builder.create_node("decomposeMatrix", name=name)
     if compat.is_string(matrix):
-        cmds.connectAttr(matrix, "%s.inputMatrix" % decompose_matrix_node)
+        graph_builder.connect(matrix, "%s.inputMatrix" % decompose_matrix_node)
     else:
-        cmds.setAttr(
-            "{}.inputMatrix".format(decompose_matrix_node), matrix, type="matrix"
+        graph_builder.set_value(
+            "{}.inputMatrix".format(decompose_matrix_node), matrix, value_type="matrix"
         )
+    output_plugs = [
+        "{}.outputTranslate".format(decompose_matrix_node),
+        "{}.outputRotate".format(decompose_matrix_node),
+        "{}.outputScale".format(decompose_matrix_node),
+    ]
+    _add_expression("decompose_matrix", [matrix], cacheable, output_plugs)
     if return_plug:
-        return [
-            "{}.outputTranslate".format(decompose_matrix_node),
-            "{}.outputRotate".format(decompose_matrix_node),
-            "{}.outputScale".format(decompose_matrix_node),
-        ]
+        return list(output_plugs)
     else:
         return decompose_matrix_node
 
@@ -385,17 +633,24 @@ def average_matrix(matrices_list, return_plug=True, name="averageMatrix"):
     Returns:
         String: Output plug or node
     """
-    average_matrix_node = cmds.createNode("wtAddMatrix", name=name)
+    inputs = sorted(matrices_list, key=str)
+    cacheable = _is_cacheable(return_plug, name, "averageMatrix")
+    result = _find_expression("average_matrix", inputs, cacheable)
+    if result is not None:
+        return result
+    average_matrix_node = graph_builder.create_node("wtAddMatrix", name=name)
     average_value = 1.0 / len(matrices_list)
     for index, matrix in enumerate(matrices_list):
-        cmds.connectAttr(
+        graph_builder.connect(
             matrix, "{0}.wtMatrix[{1}].matrixIn".format(average_matrix_node, index)
         )
-        cmds.setAttr(
+        graph_builder.set_value(
             "{0}.wtMatrix[{1}].weightIn".format(average_matrix_node, index),
             average_value,
         )
+    output_plug = "{}.matrixSum".format(average_matrix_node)
+    _add_expression("average_matrix", inputs, cacheable, output_plug)
     if return_plug:
-        return "{}.matrixSum".format(average_matrix_node)
+        return output_plug
     else:
         return average_matrix_node
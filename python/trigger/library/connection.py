@@ -10,6 +10,7 @@ from trigger.library import api
 from trigger.library import interface
 from trigger.library import attribute
 from trigger.library import arithmetic as op
+from trigger.library import graph_builder
 from maya import cmds
 
 validate.plugin("matrixNodes")
@@ -203,8 +204,10 @@ def matrixConstraint(
     parent_of_driven = parents[0] if parents else None
     next_index = -1
 
-    mult_matrix = cmds.createNode("multMatrix", name="{}_multMatrix".format(prefix))
-    decompose_matrix = cmds.createNode(
+    mult_matrix = graph_builder.create_node(
+        "multMatrix", name="{}_multMatrix".format(prefix)
+    )
+    decompose_matrix = graph_builder.create_node(
         "decomposeMatrix", name="{}_decomposeMatrix".format(prefix)
     )
 
@@ -220,46 +223,50 @@ def matrixConstraint(
     if maintainOffset:
         driven_world_matrix = api.get_mdag_path(driven).inclusiveMatrix()
         if is_multi:
-            driver_world_matrix = OpenMaya.MMatrix(cmds.getAttr(out_plug))
+            # same as the average node output, which may not be created yet
+            driver_world_matrix = OpenMaya.MMatrix()
+            for driver in drivers:
+                driver_world_matrix += api.get_mdag_path(driver).inclusiveMatrix()
+            driver_world_matrix *= 1.0 / len(drivers)
         else:
             driver_world_matrix = api.get_mdag_path(drivers).inclusiveMatrix()
         local_offset = driven_world_matrix * driver_world_matrix.inverse()
         next_index += 1
-        cmds.setAttr(
+        graph_builder.set_value(
             "{0}.matrixIn[{1}]".format(mult_matrix, next_index),
             local_offset,
-            type="matrix",
+            value_type="matrix",
         )
 
     next_index += 1
-    cmds.connectAttr(out_plug, "{0}.matrixIn[{1}]".format(mult_matrix, next_index))
+    graph_builder.connect(out_plug, "{0}.matrixIn[{1}]".format(mult_matrix, next_index))
 
-    cmds.connectAttr(
+    graph_builder.connect(
         "{}.matrixSum".format(mult_matrix), "{}.inputMatrix".format(decompose_matrix)
     )
 
     if source_parent_cutoff:
         next_index += 1
-        cmds.connectAttr(
+        graph_builder.connect(
             "{}.worldInverseMatrix".format(source_parent_cutoff),
             "{0}.matrixIn[{1}]".format(mult_matrix, next_index),
         )
 
     if parent_of_driven:
         next_index += 1
-        cmds.connectAttr(
+        graph_builder.connect(
             "{}.worldInverseMatrix[0]".format(parent_of_driven),
             "{0}.matrixIn[{1}]".format(mult_matrix, next_index),
         )
 
     if not skipTranslate:
-        cmds.connectAttr(
+        graph_builder.connect(
             "{}.outputTranslate".format(decompose_matrix), "{}.translate".format(driven)
         )
     else:
         for attr in "XYZ":
             if attr.lower() not in skipTranslate and attr.upper() not in skipTranslate:
-                cmds.connectAttr(
+                graph_builder.connect(
                     "{0}.outputTranslate{1}".format(decompose_matrix, attr),
                     "{0}.translate{1}".format(driven, attr),
                 )
@@ -274,58 +281,60 @@ def matrixConstraint(
             joint_orientation = cmds.getAttr("{}.jointOrient".format(driven))[0]
 
             # create the compensation node strand
-            rotation_compose = cmds.createNode(
+            rotation_compose = graph_builder.create_node(
                 "composeMatrix", name="{}_rotateComposeMatrix".format(prefix)
             )
-            rotation_first_mult_matrix = cmds.createNode(
+            rotation_first_mult_matrix = graph_builder.create_node(
                 "multMatrix", name="{}_firstRotateMultMatrix".format(prefix)
             )
-            rotation_inverse_matrix = cmds.createNode(
+            rotation_inverse_matrix = graph_builder.create_node(
                 "inverseMatrix", name="{}_rotateInverseMatrix".format(prefix)
             )
-            rotation_sec_mult_matrix = cmds.createNode(
+            rotation_sec_mult_matrix = graph_builder.create_node(
                 "multMatrix", name="{}_secRotateMultMatrix".format(prefix)
             )
-            rotation_decompose_matrix = cmds.createNode(
+            rotation_decompose_matrix = graph_builder.create_node(
                 "decomposeMatrix", name="{}_rotateDecomposeMatrix".format(prefix)
             )
 
             # set values and make connections for rotation strand
-            cmds.setAttr("{}.inputRotate".format(rotation_compose), *joint_orientation)
-            cmds.connectAttr(
+            graph_builder.set_value(
+                "{}.inputRotate".format(rotation_compose), joint_orientation
+            )
+            graph_builder.connect(
                 "{}.outputMatrix".format(rotation_compose),
                 "{0}.matrixIn[{1}]".format(rotation_first_mult_matrix, rot_index),
             )
 
             if parent_of_driven:
                 rot_index += 1
-                cmds.connectAttr(
+                graph_builder.connect(
                     "{}.worldMatrix[0]".format(parent_of_driven),
                     "{0}.matrixIn[{1}]".format(rotation_first_mult_matrix, rot_index),
                 )
-            cmds.connectAttr(
+            graph_builder.connect(
                 "{}.matrixSum".format(rotation_first_mult_matrix),
                 "{}.inputMatrix".format(rotation_inverse_matrix),
             )
 
-            cmds.connectAttr(
+            graph_builder.connect(
                 out_plug,
                 "{0}.matrixIn[{1}]".format(rotation_sec_mult_matrix, second_index),
             )
 
             if source_parent_cutoff:
                 second_index += 1
-                cmds.connectAttr(
+                graph_builder.connect(
                     "{}.worldInverseMatrix".format(source_parent_cutoff),
                     "{0}.matrixIn[{1}]".format(rotation_sec_mult_matrix, second_index),
                 )
 
             second_index += 1
-            cmds.connectAttr(
+            graph_builder.connect(
                 "{}.outputMatrix".format(rotation_inverse_matrix),
                 "{0}.matrixIn[{1}]".format(rotation_sec_mult_matrix, second_index),
             )
-            cmds.connectAttr(
+            graph_builder.connect(
                 "{}.matrixSum".format(rotation_sec_mult_matrix),
                 "{}.inputMatrix".format(rotation_decompose_matrix),
             )
@@ -335,27 +344,29 @@ def matrixConstraint(
 
         # it All rotation attrs will be connected?
         if not skipRotate:
-            cmds.connectAttr(rotation_output_plug, "{}.rotate".format(driven))
+            graph_builder.connect(rotation_output_plug, "{}.rotate".format(driven))
         else:
             for attr in "XYZ":
                 if attr.lower() not in skipRotate and attr.upper() not in skipRotate:
-                    cmds.connectAttr(
+                    graph_builder.connect(
                         "{0}{1}".format(rotation_output_plug, attr),
                         "{0}.rotate{1}".format(driven, attr),
                     )
 
     if not skipScale:
-        cmds.connectAttr(
+        graph_builder.connect(
             "{}.outputScale".format(decompose_matrix), "{}.scale".format(driven)
         )
     else:
         for attr in "XYZ":
             if attr.lower() not in skipScale and attr.upper() not in skipScale:
-                cmds.connectAttr(
+                graph_builder.connect(
                     "{0}.outputScale{1}".format(decompose_matrix, attr),
                     "{0}.scale{1}".format(driven, attr),
                 )
 
+    # the driven transform is queried by the following constraints and offsets
+    graph_builder.flush()
     return mult_matrix, decompose_matrix, average_node
 
 
@@ -398,6 +409,8 @@ def matrix_switch(
         skipScale="xyz",
         source_parent_cutoff=None,
     )
+    # the dump nodes are queried and deleted. They must exist
+    graph_builder.flush()
     attribute.disconnect_attr(dump, attr="inputMatrix")
     cmds.delete(dump)
     mult_matrix_b, dump, _ = matrixConstraint(
@@ -410,21 +423,23 @@ def matrix_switch(
         skipScale="xyz",
         source_parent_cutoff=None,
     )
+    graph_builder.flush()
     attribute.disconnect_attr(dump, attr="inputMatrix")
     cmds.delete(dump)
 
-    wt_add_matrix = cmds.createNode(
+    wt_add_matrix = graph_builder.create_node(
         "wtAddMatrix", name="{0}_{1}_wtAdd".format(parent_a, parent_b)
     )
-    cmds.connectAttr(
+    graph_builder.connect(
         "{}.matrixSum".format(mult_matrix_a),
         "{}.wtMatrix[0].matrixIn".format(wt_add_matrix),
     )
-    cmds.connectAttr(
+    graph_builder.connect(
         "{}.matrixSum".format(mult_matrix_b),
         "{}.wtMatrix[1].matrixIn".format(wt_add_matrix),
     )
 
+    graph_builder.flush()
     attribute.drive_attrs(
         control_attribute,
         "{}.wtMatrix[0].weightIn".format(wt_add_matrix),
@@ -440,14 +455,14 @@ def matrix_switch(
         force=False,
     )
     if source_parent_cutoff:
-        mult_matrix_cutoff = cmds.createNode(
+        mult_matrix_cutoff = graph_builder.create_node(
             "multMatrix", name="{0}_{1}_multMatrixCutoff".format(parent_a, parent_b)
         )
-        cmds.connectAttr(
+        graph_builder.connect(
             "{}.matrixSum".format(wt_add_matrix),
             "{}.matrixIn[0]".format(mult_matrix_cutoff),
         )
-        cmds.connectAttr(
+        graph_builder.connect(
             "{}.worldInverseMatrix".format(source_parent_cutoff),
             "{}.matrixIn[1]".format(mult_matrix_cutoff),
         )
@@ -455,21 +470,21 @@ def matrix_switch(
     else:
         out_plug = "{}.matrixSum".format(wt_add_matrix)
 
-    decompose_node = cmds.createNode(
+    decompose_node = graph_builder.create_node(
         "decomposeMatrix", name="{0}_{1}_decompose_switch".format(parent_a, parent_b)
     )
-    cmds.connectAttr(out_plug, "%s.inputMatrix" % decompose_node)
+    graph_builder.connect(out_plug, "%s.inputMatrix" % decompose_node)
 
     if position:
-        cmds.connectAttr(
+        graph_builder.connect(
             "{}.outputTranslate".format(decompose_node), "{}.translate".format(child)
         )
     if rotation:
-        cmds.connectAttr(
+        graph_builder.connect(
             "{}.outputRotate".format(decompose_node), "{}.rotate".format(child)
         )
     if scale:
-        cmds.connectAttr(
+        graph_builder.connect(
             "{}.outputScale".format(decompose_node), "{}.scale".format(child)
         )
 
@@ -744,46 +759,54 @@ def connect_mirror(node1, node2, mirror_axis="X"):
     mirror_axis = mirror_axis.replace("-", "")
 
     # nodes Translate
-    rvs_node_t = cmds.createNode("reverse")
-    minus_op_t = cmds.createNode("plusMinusAverage")
-    cmds.setAttr("%s.operation" % minus_op_t, 2)
-    cmds.connectAttr("{}.translate".format(node1), "{}.input".format(rvs_node_t))
-    cmds.connectAttr("{}.output".format(rvs_node_t), "{}.input3D[0]".format(minus_op_t))
-    cmds.setAttr("{}.input3D[1]".format(minus_op_t), 1, 1, 1)
+    rvs_node_t = graph_builder.create_node("reverse", name="reverse")
+    minus_op_t = graph_builder.create_node(
+        "plusMinusAverage", name="plusMinusAverage"
+    )
+    graph_builder.set_value("%s.operation" % minus_op_t, 2)
+    graph_builder.connect("{}.translate".format(node1), "{}.input".format(rvs_node_t))
+    graph_builder.connect(
+        "{}.output".format(rvs_node_t), "{}.input3D[0]".format(minus_op_t)
+    )
+    graph_builder.set_value("{}.input3D[1]".format(minus_op_t), [1, 1, 1])
     # nodes Rotate
-    rvs_node_r = cmds.createNode("reverse")
-    minus_op_r = cmds.createNode("plusMinusAverage")
-    cmds.setAttr("%s.operation" % minus_op_r, 2)
-    cmds.connectAttr("{}.rotate".format(node1), "{}.input".format(rvs_node_r))
-    cmds.connectAttr("{}.output".format(rvs_node_r), "{}.input3D[0]".format(minus_op_r))
+    rvs_node_r = graph_builder.create_node("reverse", name="reverse")
+    minus_op_r = graph_builder.create_node(
+        "plusMinusAverage", name="plusMinusAverage"
+    )
+    graph_builder.set_value("%s.operation" % minus_op_r, 2)
+    graph_builder.connect("{}.rotate".format(node1), "{}.input".format(rvs_node_r))
+    graph_builder.connect(
+        "{}.output".format(rvs_node_r), "{}.input3D[0]".format(minus_op_r)
+    )
 
-    cmds.setAttr("%s.input3D[1]" % minus_op_r, 1, 1, 1)
+    graph_builder.set_value("%s.input3D[1]" % minus_op_r, [1, 1, 1])
 
     # Translate
 
     if mirror_axis == "X":
-        cmds.connectAttr("{}.output3Dx".format(minus_op_t), "{}.tx".format(node2))
-        cmds.connectAttr("{}.ty".format(node1), "{}.ty".format(node2))
-        cmds.connectAttr("{}.tz".format(node1), "{}.tz".format(node2))
-        cmds.connectAttr("{}.rx".format(node1), "{}.rx".format(node2))
-        cmds.connectAttr("{}.output3Dy".format(minus_op_r), "{}.ry".format(node2))
-        cmds.connectAttr("{}.output3Dz".format(minus_op_r), "{}.rz".format(node2))
+        graph_builder.connect("{}.output3Dx".format(minus_op_t), "{}.tx".format(node2))
+        graph_builder.connect("{}.ty".format(node1), "{}.ty".format(node2))
+        graph_builder.connect("{}.tz".format(node1), "{}.tz".format(node2))
+        graph_builder.connect("{}.rx".format(node1), "{}.rx".format(node2))
+        graph_builder.connect("{}.output3Dy".format(minus_op_r), "{}.ry".format(node2))
+        graph_builder.connect("{}.output3Dz".format(minus_op_r), "{}.rz".format(node2))
 
     if mirror_axis == "Y":
-        cmds.connectAttr("{}.tx".format(node1), "{}.tx".format(node2))
-        cmds.connectAttr("{}.output3Dy".format(minus_op_t), "{}.ty".format(node2))
-        cmds.connectAttr("{}.tz".format(node1), "{}.tz".format(node2))
-        cmds.connectAttr("{}.output3Dx".format(minus_op_r), "{}.rx".format(node2))
-        cmds.connectAttr("{}.ry".format(node1), "{}.ry".format(node2))
-        cmds.connectAttr("{}.output3Dz".format(minus_op_r), "{}.rz".format(node2))
+        graph_builder.connect("{}.tx".format(node1), "{}.tx".format(node2))
+        graph_builder.connect("{}.output3Dy".format(minus_op_t), "{}.ty".format(node2))
+        graph_builder.connect("{}.tz".format(node1), "{}.tz".format(node2))
+        graph_builder.connect("{}.output3Dx".format(minus_op_r), "{}.rx".format(node2))
+        graph_builder.connect("{}.ry".format(node1), "{}.ry".format(node2))
+        graph_builder.connect("{}.output3Dz".format(minus_op_r), "{}.rz".format(node2))
 
     if mirror_axis == "Z":
-        cmds.connectAttr("{}.tx".format(node1), "{}.tx".format(node2))
-        cmds.connectAttr("{}.ty".format(node1), "{}.ty".format(node2))
-        cmds.connectAttr("{}.output3Dz".format(minus_op_t), "{}.tz".format(node2))
-        cmds.connectAttr("{}.rx".format(node1), "{}.rx".format(node2))
-        cmds.connectAttr("{}.output3Dy".format(minus_op_r), "{}.ry".format(node2))
-        cmds.connectAttr("{}.output3Dz".format(minus_op_r), "{}.rz".format(node2))
+        graph_builder.connect("{}.tx".format(node1), "{}.tx".format(node2))
+        graph_builder.connect("{}.ty".format(node1), "{}.ty".format(node2))
+        graph_builder.connect("{}.output3Dz".format(minus_op_t), "{}.tz".format(node2))
+        graph_builder.connect("{}.rx".format(node1), "{}.rx".format(node2))
+        graph_builder.connect("{}.output3Dy".format(minus_op_r), "{}.ry".format(node2))
+        graph_builder.connect("{}.output3Dz".format(minus_op_r), "{}.rz".format(node2))
 
 
 def matrix_constrain_localised(
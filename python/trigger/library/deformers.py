@@ -1,10 +1,16 @@
 """Collection of deformer related functions"""
+import re
 
+import numpy as np
 from maya import cmds
+from maya.api import OpenMaya as om
+from maya.api import OpenMayaAnim as oma
+
 from trigger.core.decorators import undo, keepselection
 from trigger.library import functions, transform, attribute
 from trigger.library import naming
 from trigger.core import compatibility as compat
+from trigger.core import shape_file
 
 from trigger.core import filelog
 
@@ -68,39 +74,11 @@ def get_influencers(deformer):
     return cmds.aliasAttr(deformer, q=True)[::2]
 
 
-@undo
-def connect_bs_targets(
-    driver_attr,
-    targets_dictionary,
-    driver_range=None,
-    force_new=False,
-    front_of_chain=True,
-    bs_node_name=None,
-):
-    """Creates or adds Blendshape target and connects them into the same controller attribute
+def prepare_driver_attr(driver_attr, driver_range, custom_range=False):
+    """Create or extend the driver attribute. Returns the plug to drive the targets.
 
-    Args:
-        driver_attr (String): driver attribute which controls. tooth_ctrl.gumRetract
-        targets_dictionary (Dict): Dictionary for the targets.
-                    Format: {<base>: <target_blendShape>}
-                    Example: {
-                        "face_mesh": "faceGumRetract",
-                        "meniscus": "meniscusGumRetract",
-                    }
-        driver_range (List): If defined, remaps the driver attribute. Example: [0, 100]
-        force_new (Bool): If True, a new blendshape will be created for each mesh even though there are existing ones.
-        front_of_chain: Created blendshapes will be added front of the chain. Default True
-        bs_node_name: If a new blendshape node will be created it will take this name. If a blendshape node with this
-                        name exists, it will use that one.
+    If custom_range is True, the driver is remapped from driver_range to 0-1.
     """
-    if not bs_node_name:
-        bs_node_name = naming.unique_name("trigger_blendShape")
-    if driver_range:
-        custom_range = True
-    else:
-        custom_range = False
-        driver_range = [0, 1]
-
     # check the driver, create a float attr if not present
     ch_node, ch_attr = driver_attr.split(".")
     assert cmds.objExists(ch_node), (
@@ -135,6 +113,43 @@ def connect_bs_targets(
         cmds.setAttr("{0}.outputMax".format(remap_node), 1)
         cmds.connectAttr(driver_attr, "{0}.inputValue".format(remap_node))
         driver_attr = "{0}.outValue".format(remap_node)
+    return driver_attr
+
+
+@undo
+def connect_bs_targets(
+    driver_attr,
+    targets_dictionary,
+    driver_range=None,
+    force_new=False,
+    front_of_chain=True,
+    bs_node_name=None,
+):
+    """Creates or adds Blendshape target and connects them into the same controller attribute
+
+    Args:
+        driver_attr (String): driver attribute which controls. tooth_ctrl.gumRetract
+        targets_dictionary (Dict): Dictionary for the targets.
+                    Format: {<base>: <target_blendShape>}
+                    Example: {
+                        "face_mesh": "faceGumRetract",
+                        "meniscus": "meniscusGumRetract",
+                    }
+        driver_range (List): If defined, remaps the driver attribute. Example: [0, 100]
+        force_new (Bool): If True, a new blendshape will be created for each mesh even though there are existing ones.
+        front_of_chain: Created blendshapes will be added front of the chain. Default True
+        bs_node_name: If a new blendshape node will be created it will take this name. If a blendshape node with this
+                        name exists, it will use that one.
+    """
+    if not bs_node_name:
+        bs_node_name = naming.unique_name("trigger_blendShape")
+    if driver_range:
+        custom_range = True
+    else:
+        custom_range = False
+        driver_range = [0, 1]
+
+    driver_attr = prepare_driver_attr(driver_attr, driver_range, custom_range)
 
     bs_attrs = []
     for base, target_shape in targets_dictionary.items():
@@ -281,13 +296,447 @@ def cluster(mesh):
     return _cluster, cluster_handle
 
 
+def get_bs_target_map(bs_node):
+    """Return the {target name: weight index} dictionary of the blendshape node.
+
+    Collected with a single alias query, so look ups do not touch the node again.
+    """
+    aliases = cmds.aliasAttr(bs_node, q=True) or []
+    target_map = {}
+    for alias, attr in zip(aliases[::2], aliases[1::2]):
+        match = re.match(r"(?:weight|w)\[(\d+)\]$", attr)
+        if match:
+            target_map[alias] = int(match.group(1))
+    return target_map
+
+
 def get_bs_index_by_name(bs_node, target_name):
-    attr = bs_node + ".w[{}]"
-    weight_count = cmds.blendShape(bs_node, q=True, wc=True)
-    for index in range(weight_count):
-        if cmds.aliasAttr(attr.format(index), q=True) == target_name:
-            return index
-    return -1
+    return get_bs_target_map(bs_node).get(target_name, -1)
+
+
+class BlendshapeBuilder(object):
+    """Adds many targets to a single blendShape node in bulk.
+
+    Target deltas are computed from the point arrays and written straight into
+    the inputTargetItem data with a single modifier. Targets are not connected
+    to the meshes they are created from. Targets with a different vertex count
+    than the base fall back to the blendShape command.
+
+        builder = BlendshapeBuilder("face_mesh", name="face_blendShape")
+        builder.add_targets(["jawOpen", "smileL", "smileR"])
+        builder.add_inbetweens([("jawOpen50", "jawOpen", 0.5)])
+    """
+
+    def __init__(self, base, name="trigger_blendShape", front_of_chain=True):
+        """Use the blendShape node with the name or create it on the base mesh.
+
+        Args:
+            base: (String) Base mesh
+            name: (String) Name of the blendShape node
+            front_of_chain: (Bool) Newly created nodes are added front of the chain
+        """
+        super(BlendshapeBuilder, self).__init__()
+        self.base = base
+        if cmds.objExists(name):
+            self.node = name
+        else:
+            self.node = cmds.blendShape(base, foc=front_of_chain, name=name)[0]
+        self.targets = get_bs_target_map(self.node)
+        used_indices = cmds.getAttr("%s.weight" % self.node, multiIndices=True) or []
+        self._next_index = max(list(self.targets.values()) + used_indices + [-1]) + 1
+        self._base_points = None
+        geometry_indices = cmds.blendShape(self.node, q=True, geometryIndices=True)
+        self._geometry_index = geometry_indices[0] if geometry_indices else 0
+
+    def get_index(self, target_name):
+        """Return the weight index of the target. -1 if it does not exist."""
+        return self.targets.get(target_name, -1)
+
+    def add_targets(self, meshes, tolerance=1e-5):
+        """Add the meshes as new targets named after the meshes.
+
+        Args:
+            meshes: (List) Target meshes
+            tolerance: (Float) Smaller deltas are not stored
+
+        Returns:
+            (List) Weight indices of the targets
+        """
+        indices = [self._add_weight(mesh) for mesh in meshes]
+        self._write(
+            [(mesh, index, 1.0) for mesh, index in zip(meshes, indices)],
+            tolerance=tolerance,
+        )
+        return indices
+
+    def add_inbetweens(self, inbetweens, tolerance=1e-5):
+        """Add the meshes as inbetweens of the existing targets.
+
+        Args:
+            inbetweens: (List) (mesh, target name, value) items. e.g.
+                [("jawOpen50", "jawOpen", 0.5)]
+            tolerance: (Float) Smaller deltas are not stored
+        """
+        items = [
+            (mesh, self._get_existing_index(target_name), value)
+            for mesh, target_name, value in inbetweens
+        ]
+        self._write(items, tolerance=tolerance)
+
+    def add_sparse_targets(self, targets):
+        """Add targets from vertex indices and deltas. No meshes are needed.
+
+        Args:
+            targets: (List) Dictionaries with "name", "indices" and "deltas" keys.
+                Inbetweens have the base target name under "target" and the
+                weight value under "value". See core.shape_file
+
+        Returns:
+            (List) Weight indices of the targets
+        """
+        modifier = om.MDGModifier()
+        weight_indices = []
+        for target in targets:
+            if target.get("target"):
+                index = self._get_existing_index(target["target"])
+            else:
+                index = self._add_weight(target["name"])
+            self._queue_deltas(
+                modifier,
+                index,
+                target.get("value", 1.0),
+                target["indices"],
+                target["deltas"],
+            )
+            weight_indices.append(index)
+        modifier.doIt()
+        return weight_indices
+
+    def get_base_points(self):
+        """Return the points of the base geometry as it goes in the node."""
+        if self._base_points is None:
+            selection_list = om.MSelectionList()
+            selection_list.add(self.node)
+            geometry_filter = oma.MFnGeometryFilter(selection_list.getDependNode(0))
+            input_geometry = geometry_filter.getInputGeometry()[0]
+            self._base_points = _to_array(om.MFnMesh(input_geometry).getPoints())
+        return self._base_points
+
+    def get_sparse_deltas(self, index, value=1.0):
+        """Return the stored vertex indices and deltas of the target item.
+
+        Args:
+            index: (int) Weight index of the target
+            value: (Float) Weight value of the item. 1.0 for the base target
+
+        Returns:
+            (tuple) numpy index array and (n, 3) numpy delta array
+        """
+        item_plug = self.get_item_plug(index, value)
+        selection_list = om.MSelectionList()
+        selection_list.add("%s.inputPointsTarget" % item_plug)
+        selection_list.add("%s.inputComponentsTarget" % item_plug)
+        try:
+            points = om.MFnPointArrayData(selection_list.getPlug(0).asMObject()).array()
+            component_list = om.MFnComponentListData(
+                selection_list.getPlug(1).asMObject()
+            )
+        except RuntimeError:
+            # nothing is stored on the item
+            return np.zeros(0, dtype=np.intp), np.zeros((0, 3))
+        indices = []
+        for nmb in range(component_list.length()):
+            component = om.MFnSingleIndexedComponent(component_list.get(nmb))
+            indices.extend(component.getElements())
+        return np.array(indices, dtype=np.intp), _to_array(points).reshape(-1, 3)
+
+    def get_items(self, index):
+        """Return the weight values of the items of the target. e.g. [0.5, 1.0]"""
+        item_indices = cmds.getAttr(
+            "%s.inputTarget[%i].inputTargetGroup[%i].inputTargetItem"
+            % (self.node, self._geometry_index, index),
+            multiIndices=True,
+        )
+        return [(x - 5000) * 0.001 for x in item_indices or []]
+
+    def _add_weight(self, name):
+        index = self._next_index
+        self._next_index += 1
+        cmds.setAttr("%s.weight[%i]" % (self.node, index), 0)
+        cmds.aliasAttr(name, "%s.weight[%i]" % (self.node, index))
+        self.targets[name] = index
+        return index
+
+    def _get_existing_index(self, target_name):
+        index = self.get_index(target_name)
+        if index == -1:
+            msg = "%s is not a target of %s" % (target_name, self.node)
+            log.error(msg)
+            raise Exception(msg)
+        return index
+
+    def get_item_plug(self, index, value):
+        """Return the inputTargetItem plug name of the target item."""
+        return "%s.inputTarget[%i].inputTargetGroup[%i].inputTargetItem[%i]" % (
+            self.node,
+            self._geometry_index,
+            index,
+            5000 + int(round(value * 1000)),
+        )
+
+    def _queue_deltas(self, modifier, index, value, indices, deltas):
+        """Queue writing the sparse deltas of the target item into the modifier."""
+        component_fn = om.MFnSingleIndexedComponent()
+        component = component_fn.create(om.MFn.kMeshVertComponent)
+        component_fn.addElements(np.asarray(indices, dtype=np.intp).tolist())
+        component_data_fn = om.MFnComponentListData()
+        component_data = component_data_fn.create()
+        component_data_fn.add(component)
+        points_data = om.MFnPointArrayData().create(
+            om.MPointArray([om.MPoint(*x) for x in np.asarray(deltas).tolist()])
+        )
+
+        item_plug = self.get_item_plug(index, value)
+        selection_list = om.MSelectionList()
+        selection_list.add("%s.inputPointsTarget" % item_plug)
+        selection_list.add("%s.inputComponentsTarget" % item_plug)
+        modifier.newPlugValue(selection_list.getPlug(0), points_data)
+        modifier.newPlugValue(selection_list.getPlug(1), component_data)
+
+    def _write(self, items, tolerance=1e-5):
+        """Write the deltas of the (mesh, weight index, value) items."""
+        base_points = self.get_base_points()
+        modifier = om.MDGModifier()
+        for mesh, index, value in items:
+            selection_list = om.MSelectionList()
+            selection_list.add(mesh)
+            mesh_points = _to_array(
+                om.MFnMesh(selection_list.getDagPath(0)).getPoints()
+            )
+            if mesh_points.shape != base_points.shape:
+                log.warning(
+                    "%s has a different vertex count than %s" % (mesh, self.base)
+                )
+                cmds.blendShape(
+                    self.node,
+                    edit=True,
+                    ib=value != 1.0,
+                    t=(self.base, index, mesh, value),
+                )
+                continue
+            deltas = mesh_points - base_points
+            vertices = np.flatnonzero(np.any(np.abs(deltas) > tolerance, axis=1))
+            self._queue_deltas(modifier, index, value, vertices, deltas[vertices])
+        modifier.doIt()
+
+
+def _to_array(points):
+    return np.array([(point.x, point.y, point.z) for point in points])
+
+
+def _get_mesh_points(mesh):
+    selection_list = om.MSelectionList()
+    selection_list.add(mesh)
+    return _to_array(om.MFnMesh(selection_list.getDagPath(0)).getPoints())
+
+
+def _get_combination_inputs(bs_node, index):
+    """Return the target names driving the weight through a combinationShape node."""
+    combination_nodes = cmds.listConnections(
+        "%s.weight[%i]" % (bs_node, index),
+        source=True,
+        destination=False,
+        type="combinationShape",
+    )
+    if not combination_nodes:
+        return None
+    input_plugs = cmds.listConnections(
+        "%s.inputWeight" % combination_nodes[0],
+        source=True,
+        destination=False,
+        plugs=True,
+    )
+    return [
+        plug.split(".", 1)[1]
+        for plug in input_plugs or []
+        if plug.split(".", 1)[0] == bs_node
+    ] or None
+
+
+def export_blendshape(bs_node, file_path, tolerance=1e-5):
+    """Write the targets of the blendShape node to a sparse shape file.
+
+    Inbetweens are named after their base targets and values. e.g. jawOpen50
+    Targets connected to meshes are read from the meshes.
+
+    Args:
+        bs_node: (String) blendShape node
+        file_path: (String) Path of the .trsz file
+        tolerance: (Float) Smaller deltas are not stored
+
+    Returns:
+        (String) Path of the file
+    """
+    base = cmds.blendShape(bs_node, q=True, geometry=True)[0]
+    builder = BlendshapeBuilder(base, name=bs_node)
+    base_points = builder.get_base_points()
+    targets = []
+    inbetweens = []
+    for name, index in sorted(builder.targets.items(), key=lambda x: x[1]):
+        combination = _get_combination_inputs(bs_node, index)
+        for value in builder.get_items(index):
+            item_plug = builder.get_item_plug(index, value)
+            live_targets = cmds.listConnections(
+                "%s.inputGeomTarget" % item_plug, source=True, destination=False
+            )
+            if live_targets:
+                indices, deltas = shape_file.sparsify(
+                    _get_mesh_points(live_targets[0]) - base_points, tolerance
+                )
+            else:
+                indices, deltas = builder.get_sparse_deltas(index, value)
+            if abs(value - 1.0) < 1e-4:
+                targets.append(
+                    {
+                        "name": name,
+                        "combination": combination,
+                        "indices": indices,
+                        "deltas": deltas,
+                    }
+                )
+            else:
+                inbetweens.append(
+                    {
+                        "name": "%s%i" % (name, int(round(value * 100))),
+                        "target": name,
+                        "value": value,
+                        "indices": indices,
+                        "deltas": deltas,
+                    }
+                )
+    return shape_file.write(
+        targets + inbetweens,
+        file_path,
+        len(base_points),
+        base_points=base_points,
+        info={"blendshape": bs_node, "base": base},
+    )
+
+
+def export_shapes(neutral, shapes_group, file_path, tolerance=1e-5):
+    """Write the meshes under the group to a sparse shape file.
+
+    Meshes are named like the Morph action expects:
+        <target><digits>: Inbetween of the target at digits percent. e.g. jawOpen50
+        <target>_<target>: Combination sculpt. The deltas of the targets are
+            subtracted, so only the corrective delta is stored
+        <target>_<target>_<digits>: Inbetween of the combination at digits
+            percent. Like Morph, the last target is subtracted at that weight
+
+    Args:
+        neutral: (String) Neutral mesh
+        shapes_group: (String) Group holding the target meshes
+        file_path: (String) Path of the .trsz file
+        tolerance: (Float) Smaller deltas are not stored
+
+    Returns:
+        (String) Path of the file
+    """
+    base_points = _get_mesh_points(neutral)
+    all_deltas = {}
+    for mesh in functions.get_meshes(shapes_group):
+        points = _get_mesh_points(mesh)
+        if points.shape != base_points.shape:
+            log.warning("%s has a different vertex count than %s" % (mesh, neutral))
+            continue
+        all_deltas[mesh.split("|")[-1]] = points - base_points
+
+    targets = []
+    inbetweens = []
+    for name, deltas in all_deltas.items():
+        target = {"name": name}
+        parts = name.split("_")
+        inbetween = re.match(r"(.*?)([0-9]+)$", name)
+        if len(parts) > 2 and parts[-1].isdigit():
+            combination = "_".join(parts[:-1])
+            if combination not in all_deltas or not all(
+                part in all_deltas for part in parts[:-1]
+            ):
+                log.warning(
+                    "%s is skipped. Combination inbetweens need the %s combination "
+                    "and its targets" % (name, combination)
+                )
+                continue
+            target["target"] = combination
+            target["value"] = int(parts[-1]) * 0.01
+            # same delta as Morph.create_combination_delta
+            deltas = (
+                deltas
+                - np.sum([all_deltas[part] for part in parts[:-2]], axis=0)
+                - all_deltas[parts[-2]] * target["value"]
+            )
+        elif len(parts) > 1 and all(part in all_deltas for part in parts):
+            target["combination"] = parts
+            deltas = deltas - np.sum([all_deltas[part] for part in parts], axis=0)
+        elif inbetween and inbetween.group(1) in all_deltas:
+            target["target"] = inbetween.group(1)
+            target["value"] = int(inbetween.group(2)) * 0.01
+        target["indices"], target["deltas"] = shape_file.sparsify(deltas, tolerance)
+        (inbetweens if target.get("target") else targets).append(target)
+    return shape_file.write(
+        targets + inbetweens,
+        file_path,
+        len(base_points),
+        base_points=base_points,
+        info={"neutral": neutral, "group": shapes_group},
+    )
+
+
+def load_shape_file(file_path, base, name="trigger_blendShape", combinations=True):
+    """Fill a blendShape node with the targets of a sparse shape file.
+
+    Args:
+        file_path: (String) Path of the .trsz file
+        base: (String) Mesh to create the blendShape node on
+        name: (String) Name of the blendShape node. Existing nodes are extended
+        combinations: (Bool) Drive the combination targets with combinationShape
+            nodes
+
+    Returns:
+        (BlendshapeBuilder) Builder of the filled node. Holds the target indices
+    """
+    builder = BlendshapeBuilder(base, name=name)
+    with shape_file.ShapeFile(file_path) as shapes:
+        if shapes.vertex_count != len(builder.get_base_points()):
+            msg = "%s and %s have different vertex counts" % (file_path, base)
+            log.error(msg)
+            raise Exception(msg)
+        targets = shapes.targets
+        for target in targets:
+            target["indices"], target["deltas"] = shapes.get_arrays(target["name"])
+    # base targets must exist before their inbetweens
+    targets.sort(key=lambda x: bool(x["target"]))
+    builder.add_sparse_targets(targets)
+
+    if combinations:
+        for target in targets:
+            parts = target["combination"]
+            if not parts or not all(part in builder.targets for part in parts):
+                continue
+            combination_node = cmds.createNode(
+                "combinationShape", name="cmb_%s" % target["name"]
+            )
+            for nmb, part in enumerate(parts):
+                cmds.connectAttr(
+                    "%s.%s" % (builder.node, part),
+                    "%s.inputWeight[%i]" % (combination_node, nmb),
+                )
+            cmds.connectAttr(
+                "%s.outputWeight" % combination_node,
+                "%s.%s" % (builder.node, target["name"]),
+                force=True,
+            )
+    return builder
 
 
 @keepselection
@@ -0,0 +1,386 @@
+"""Batched node network construction for the arithmetic and connection helpers.
+
+Inside a GraphBuilder context the helpers queue the node creation, connections
+and attribute values instead of running a command for each of them. The queue is
+committed in bulk with API modifiers when the context exits, inside a single
+undoable command.
+
+    with graph_builder.GraphBuilder():
+        plug = arithmetic.multiply("cont.tx", 2)
+        arithmetic.add(plug, "cont.ty", name="sum")
+
+Node names are reserved while queueing, so the returned nodes and plugs can be
+used by other queued operations right away. Anything querying the queued nodes
+(getAttr, listConnections, delete...) has to call flush() first.
+
+Outside of a GraphBuilder the functions run the regular commands.
+
+Prepared modifiers (e.g. a MDagModifier creating a hierarchy) can be queued with
+add_modifier() to commit them in the same undoable command.
+"""
+import os
+
+from maya import cmds
+from maya.api import OpenMaya as om
+
+from trigger.core import filelog
+
+LOG = filelog.Filelog(logname=__name__, filename="trigger_log")
+
+COMMIT_COMMAND = "triggerCommitGraph"
+
+INTEGER_TYPES = [
+    om.MFnNumericData.kByte,
+    om.MFnNumericData.kChar,
+    om.MFnNumericData.kShort,
+    om.MFnNumericData.kInt,
+]
+
+# stack of the active builders. Nested contexts share the outermost builder
+_ACTIVE = []
+# builder being committed by the commit command
+_COMMITTING = None
+_DAG_TYPES = {}
+
+
+def maya_useNewAPI():
+    """Plugin uses the Maya Python API 2.0."""
+
+
+def get_active():
+    """Return the active GraphBuilder or None."""
+    return _ACTIVE[-1] if _ACTIVE else None
+
+
+def create_node(node_type, name):
+    """Create or queue a node.
+
+    Args:
+        node_type: (String) Type of the node
+        name: (String) Name of the node. Made unique like createNode does
+
+    Returns:
+        (String) Name of the node
+    """
+    builder = get_active()
+    if builder:
+        return builder.create_node(node_type, name)
+    return cmds.createNode(node_type, name=name)
+
+
+def connect(source, destination, force=False):
+    """Connect or queue the connection of two plugs.
+
+    Plugs are "node.attr" strings or (MObject, attribute name) pairs like in
+    set_value().
+    """
+    builder = get_active()
+    if builder:
+        builder.connect(source, destination, force=force)
+    else:
+        cmds.connectAttr(source, destination, force=force)
+
+
+def set_value(plug, value, value_type=None):
+    """Set or queue the value of a plug.
+
+    Args:
+        plug: (String or Tuple) e.g. "node.attr". (MObject, attribute name) pairs
+            find the plug on the node object. Needed for the nodes created by
+            queued modifiers, since they may not get the requested name. Only
+            supported in a GraphBuilder
+        value: (Float, List, MMatrix or MObject) Lists set the child plugs of
+            compound attributes like cmds.setAttr("node.translate", 1, 2, 3) does.
+            MObjects are data objects. They are only supported in a GraphBuilder
+        value_type: (String) Only "matrix" is needed. Other types are found from
+            the attribute
+    """
+    builder = get_active()
+    if builder:
+        builder.set_value(plug, value, value_type=value_type)
+    elif value_type:
+        cmds.setAttr(plug, value, type=value_type)
+    elif isinstance(value, (list, tuple)):
+        cmds.setAttr(plug, *value)
+    else:
+        cmds.setAttr(plug, value)
+
+
+def flush():
+    """Commit the queue of the active builder if there is one."""
+    builder = get_active()
+    if builder:
+        builder.commit()
+
+
+def node_exists(name):
+    """Return True if the node exists or is queued in the active builder."""
+    builder = get_active()
+    if builder and name in builder.reserved_names:
+        return True
+    return cmds.objExists(name)
+
+
+def is_dag_type(node_type):
+    """Return True if the node type is a DAG node."""
+    if node_type not in _DAG_TYPES:
+        inherited = cmds.nodeType(node_type, isTypeName=True, inherited=True) or []
+        _DAG_TYPES[node_type] = "dagNode" in inherited
+    return _DAG_TYPES[node_type]
+
+
+def _get_plug(plug_name):
+    if isinstance(plug_name, tuple):
+        node, attribute = plug_name
+        try:
+            return om.MFnDependencyNode(node).findPlug(attribute, False)
+        except RuntimeError:
+            msg = "Plug %s does not exist" % attribute
+            LOG.error(msg)
+            raise Exception(msg)
+    selection_list = om.MSelectionList()
+    try:
+        selection_list.add(plug_name)
+        return selection_list.getPlug(0)
+    except (RuntimeError, TypeError):
+        msg = "Plug %s does not exist" % plug_name
+        LOG.error(msg)
+        raise Exception(msg)
+
+
+def _queue_value(modifier, plug, value, value_type=None):
+    """Queue the API equivalent of cmds.setAttr in the modifier."""
+    if value_type == "matrix" or isinstance(value, om.MMatrix):
+        data = om.MFnMatrixData().create(om.MMatrix(value))
+        modifier.newPlugValue(plug, data)
+        return
+    if isinstance(value, om.MObject):
+        # prepared data objects. e.g. nurbsCurve data
+        modifier.newPlugValue(plug, value)
+        return
+    if isinstance(value, (list, tuple)):
+        for index, child_value in enumerate(value):
+            _queue_value(modifier, plug.child(index), child_value)
+        return
+
+    attribute = plug.attribute()
+    if attribute.hasFn(om.MFn.kUnitAttribute):
+        # cmds uses the ui units, the plugs use the internal units
+        unit_type = om.MFnUnitAttribute(attribute).unitType()
+        if unit_type == om.MFnUnitAttribute.kAngle:
+            modifier.newPlugValueMAngle(plug, om.MAngle(value, om.MAngle.uiUnit()))
+        elif unit_type == om.MFnUnitAttribute.kDistance:
+            modifier.newPlugValueMDistance(
+                plug, om.MDistance(value, om.MDistance.uiUnit())
+            )
+        elif unit_type == om.MFnUnitAttribute.kTime:
+            modifier.newPlugValueMTime(plug, om.MTime(value, om.MTime.uiUnit()))
+        else:
+            modifier.newPlugValueDouble(plug, value)
+    elif attribute.hasFn(om.MFn.kEnumAttribute):
+        modifier.newPlugValueInt(plug, int(value))
+    elif attribute.hasFn(om.MFn.kTypedAttribute):
+        modifier.newPlugValueString(plug, value)
+    elif attribute.hasFn(om.MFn.kNumericAttribute):
+        numeric_type = om.MFnNumericAttribute(attribute).numericType()
+        if numeric_type == om.MFnNumericData.kBoolean:
+            modifier.newPlugValueBool(plug, bool(value))
+        elif numeric_type in INTEGER_TYPES:
+            modifier.newPlugValueInt(plug, int(value))
+        else:
+            modifier.newPlugValueDouble(plug, float(value))
+    else:
+        msg = "Cannot set the value of %s in a graph builder" % plug.name()
+        LOG.error(msg)
+        raise Exception(msg)
+
+
+class GraphBuilder(object):
+    """Context which queues the node networks and creates them in bulk."""
+
+    def __init__(self):
+        super(GraphBuilder, self).__init__()
+        self.nodes = []
+        self.connections = []
+        self.values = []
+        self.modifiers = []
+        self.reserved_names = set()
+        self._is_joined = False
+
+    def __enter__(self):
+        if _ACTIVE:
+            # join the outer builder. It may have queued the nodes used here
+            self._is_joined = True
+            return _ACTIVE[-1]
+        _ensure_plugin()
+        cmds.undoInfo(openChunk=True, chunkName="GraphBuilder")
+        _ACTIVE.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._is_joined:
+            return False
+        _ACTIVE.remove(self)
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.clear()
+        finally:
+            cmds.undoInfo(closeChunk=True)
+        return False
+
+    @property
+    def queue_size(self):
+        return (
+            len(self.nodes)
+            + len(self.connections)
+            + len(self.values)
+            + len(self.modifiers)
+        )
+
+    def create_node(self, node_type, name):
+        """Queue a DG node. DAG nodes are created right away after a flush."""
+        if is_dag_type(node_type):
+            self.commit()
+            return cmds.createNode(node_type, name=name)
+        name = self._get_unique_name(name)
+        self.reserved_names.add(name)
+        self.nodes.append((node_type, name))
+        return name
+
+    def connect(self, source, destination, force=False):
+        self.connections.append((source, destination, force))
+
+    def set_value(self, plug, value, value_type=None):
+        self.values.append((plug, value, value_type))
+
+    def add_modifier(self, modifier):
+        """Queue a prepared modifier. They run in order, before the queued nodes."""
+        self.modifiers.append(modifier)
+
+    def clear(self):
+        self.nodes = []
+        self.connections = []
+        self.values = []
+        self.modifiers = []
+        self.reserved_names = set()
+
+    def commit(self):
+        """Create everything in the queue with one undoable command."""
+        global _COMMITTING
+        if not self.queue_size:
+            return
+        _COMMITTING = self
+        try:
+            getattr(cmds, COMMIT_COMMAND)()
+        finally:
+            _COMMITTING = None
+            self.clear()
+
+    def execute(self):
+        """Run the queue with modifiers. Called by the commit command.
+
+        Returns:
+            (List) Modifiers in the order they are executed. Needed for undo.
+        """
+        done = []
+        try:
+            for modifier in self.modifiers:
+                modifier.doIt()
+                done.append(modifier)
+        except Exception:
+            for modifier in reversed(done):
+                modifier.undoIt()
+            raise
+
+        node_modifier = om.MDGModifier()
+        for node_type, name in self.nodes:
+            node_modifier.renameNode(node_modifier.createNode(node_type), name)
+        try:
+            node_modifier.doIt()
+        except Exception:
+            for modifier in reversed(done):
+                modifier.undoIt()
+            raise
+
+        # plugs of the new nodes can be found once they exist
+        plug_modifier = om.MDGModifier()
+        try:
+            for plug_name, value, value_type in self.values:
+                _queue_value(plug_modifier, _get_plug(plug_name), value, value_type)
+            for source, destination, force in self.connections:
+                destination_plug = _get_plug(destination)
+                existing = destination_plug.source()
+                if force and not existing.isNull:
+                    plug_modifier.disconnect(existing, destination_plug)
+                plug_modifier.connect(_get_plug(source), destination_plug)
+            plug_modifier.doIt()
+        except Exception:
+            node_modifier.undoIt()
+            for modifier in reversed(done):
+                modifier.undoIt()
+            raise
+        return done + [node_modifier, plug_modifier]
+
+    def _get_unique_name(self, name):
+        """Return the name createNode would give."""
+        if not self._is_taken(name):
+            return name
+        base_name = name.rstrip("0123456789")
+        index = 1
+        while self._is_taken("%s%i" % (base_name, index)):
+            index += 1
+        return "%s%i" % (base_name, index)
+
+    def _is_taken(self, name):
+        return name in self.reserved_names or cmds.objExists(name)
+
+
+class CommitGraphCommand(om.MPxCommand):
+    """Undoable command running the queue of the committing GraphBuilder."""
+
+    def __init__(self):
+        super(CommitGraphCommand, self).__init__()
+        self.modifiers = []
+
+    @staticmethod
+    def creator():
+        return CommitGraphCommand()
+
+    def doIt(self, args):
+        # the plugin is a separate copy of this module. The state is in the package one
+        from trigger.library import graph_builder
+
+        if graph_builder._COMMITTING is None:
+            raise RuntimeError(
+                "%s can only be called by a GraphBuilder" % COMMIT_COMMAND
+            )
+        self.modifiers = graph_builder._COMMITTING.execute()
+
+    def redoIt(self):
+        for modifier in self.modifiers:
+            modifier.doIt()
+
+    def undoIt(self):
+        for modifier in reversed(self.modifiers):
+            modifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+
+def initializePlugin(plugin):
+    om.MFnPlugin(plugin).registerCommand(COMMIT_COMMAND, CommitGraphCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    om.MFnPlugin(plugin).deregisterCommand(COMMIT_COMMAND)
+
+
+def _ensure_plugin():
+    """Load this module as a plugin to register the commit command."""
+    if hasattr(cmds, COMMIT_COMMAND):
+        return
+    plugin_path = "%s.py" % os.path.splitext(os.path.abspath(__file__))[0]
+    cmds.loadPlugin(plugin_path, quiet=True)
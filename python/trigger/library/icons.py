@@ -1,10 +1,114 @@
-"""Module to create icons for rigging purposes."""
+"""Module to create icons for rigging purposes.
+
+The icon shapes are used as data: each icon is a list of curves with their CV
+positions, knots, degree and form. Scale and normal alignment are applied to the
+CVs with matrices and the curves are created directly with all their shapes in
+a single GraphBuilder commit.
+
+The shape data of an icon is taken from the shape library file (icons.json next
+to this module). The builder methods below are only the fallback for the icons
+missing in the file. Their output is captured once and kept for the session.
+The icons based on the circle command are not in the file yet, running
+export_shape_data() in Maya writes all of them.
+
+Icons with deformers or attributes (DYNAMIC_ICONS) always use their builders.
+"""
 
 # pylint: disable=too-many-lines
 
+import os
+
 from maya import cmds
+from maya.api import OpenMaya as om
+
+from trigger.core import io
+from trigger.core import filelog
 from trigger.library import functions
 from trigger.library import naming
+from trigger.library import graph_builder
+
+LOG = filelog.Filelog(logname=__name__, filename="trigger_log")
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icons.json")
+DYNAMIC_ICONS = ["FkikSwitch", "DropCircleX"]
+
+# {icon type: [curve dictionaries]}
+SHAPE_DATA = {}
+# {normal: rotation matrix of align_to_normal}
+_NORMAL_MATRICES = {}
+
+
+def load_shape_data(file_path=DATA_FILE):
+    """Add the icon shapes in the library file to the shape data."""
+    if os.path.isfile(file_path):
+        SHAPE_DATA.update(io.IO(file_path=file_path).read() or {})
+    return SHAPE_DATA
+
+
+def get_curve_data(dag_path):
+    """Return the curve dictionary of the nurbs curve shape in world space."""
+    fn_curve = om.MFnNurbsCurve(dag_path)
+    return {
+        "degree": fn_curve.degree,
+        "form": fn_curve.form,
+        "knots": list(fn_curve.knots()),
+        "points": [
+            [point.x, point.y, point.z]
+            for point in fn_curve.cvPositions(om.MSpace.kWorld)
+        ],
+    }
+
+
+def get_normal_matrix(normal):
+    """Return the rotation align_to_normal gives to an icon for the normal."""
+    normal = tuple(float(x) for x in normal)
+    if normal not in _NORMAL_MATRICES:
+        # computed by the function itself once, so the aim result is the same
+        node = cmds.createNode("transform", name="tempNormalAlign", skipSelect=True)
+        functions.align_to_normal(node, normal)
+        selection_list = om.MSelectionList()
+        selection_list.add(node)
+        _NORMAL_MATRICES[normal] = selection_list.getDagPath(0).inclusiveMatrix()
+        cmds.delete(node)
+    return _NORMAL_MATRICES[normal]
+
+
+def _get_unique_name(name, reserved_names, counter_suffix=False):
+    """Return the name the node would get. Reserved names count as existing.
+
+    Args:
+        name: (String) Requested name
+        reserved_names: (Set) Names given in the same batch
+        counter_suffix: (Bool) Count up from the full name like naming.unique_name
+            instead of replacing the trailing digits like the create commands
+    """
+    if name not in reserved_names and not cmds.objExists(name):
+        return name
+    base_name = name if counter_suffix else name.rstrip("0123456789")
+    index = 1
+    while "%s%i" % (base_name, index) in reserved_names or cmds.objExists(
+        "%s%i" % (base_name, index)
+    ):
+        index += 1
+    return "%s%i" % (base_name, index)
+
+
+def _create_curve_data(curve_data, matrix):
+    """Return a nurbsCurve data object with the CVs transformed by the matrix."""
+    points = om.MPointArray(
+        [om.MPoint(*point) * matrix for point in curve_data["points"]]
+    )
+    data_object = om.MFnNurbsCurveData().create()
+    om.MFnNurbsCurve().create(
+        points,
+        curve_data["knots"],
+        curve_data["degree"],
+        curve_data["form"],
+        False,
+        False,
+        data_object,
+    )
+    return data_object
 
 
 class Icon(object):
@@ -51,6 +155,122 @@ class Icon(object):
         normal=(0, 1, 0),
     ):
         """Creates an icon of given type."""
+        if icon_type not in DYNAMIC_ICONS:
+            return self.create_icons(
+                [
+                    {
+                        "icon_type": icon_type,
+                        "icon_name": icon_name,
+                        "scale": scale,
+                        "location": location,
+                        "normal": normal,
+                    }
+                ]
+            )[0]
+        return self._build_icon(icon_type, icon_name, scale, location, normal)
+
+    def create_icons(self, icons):
+        """
+        Creates many icons in one pass
+
+        Args:
+            icons: (List) Dictionaries with the create_icon arguments. e.g.
+                [{"icon_type": "Circle", "icon_name": "L_cont", "normal": (1, 0, 0)}]
+
+        Returns: (List) (controller, reverse node) tuples in the same order. The
+            reverse node is only created by the FkikSwitch icon
+
+        """
+        results = [None] * len(icons)
+        reserved_names = set()
+        with graph_builder.GraphBuilder() as builder:
+            dag_modifier = om.MDagModifier()
+            for nmb, icon in enumerate(icons):
+                icon_type = icon.get("icon_type")
+                self._validate(icon_type)
+                if icon_type in DYNAMIC_ICONS:
+                    continue
+                icon_name = _get_unique_name(
+                    icon.get("icon_name") or "{}_cont".format(icon_type),
+                    reserved_names,
+                )
+                reserved_names.add(icon_name)
+                transform = dag_modifier.createNode("transform")
+                dag_modifier.renameNode(transform, icon_name)
+
+                matrix = om.MTransformationMatrix()
+                matrix.setScale(icon.get("scale", (1, 1, 1)), om.MSpace.kTransform)
+                matrix = matrix.asMatrix() * get_normal_matrix(
+                    icon.get("normal", (0, 1, 0))
+                )
+                for shape_nmb, curve_data in enumerate(self.get_shape_data(icon_type)):
+                    shape_name = "{}Shape".format(icon_name)
+                    if shape_nmb:
+                        shape_name = _get_unique_name(
+                            shape_name, reserved_names, counter_suffix=True
+                        )
+                    reserved_names.add(shape_name)
+                    shape = dag_modifier.createNode("nurbsCurve", transform)
+                    dag_modifier.renameNode(shape, shape_name)
+                    graph_builder.set_value(
+                        "%s.cached" % shape_name,
+                        _create_curve_data(curve_data, matrix),
+                    )
+                if icon.get("location"):
+                    graph_builder.set_value(
+                        "%s.translate" % icon_name, list(icon["location"])
+                    )
+                results[nmb] = (icon_name, None)
+            builder.add_modifier(dag_modifier)
+            # the controllers are used right after
+            builder.commit()
+
+        for nmb, icon in enumerate(icons):
+            if results[nmb] is None:
+                results[nmb] = self._build_icon(
+                    icon.get("icon_type"),
+                    icon.get("icon_name"),
+                    icon.get("scale", (1, 1, 1)),
+                    icon.get("location"),
+                    icon.get("normal", (0, 1, 0)),
+                )
+        return results
+
+    def get_shape_data(self, icon_type):
+        """
+        Returns the curves of the icon as data
+
+        Args:
+            icon_type: (String) Icon type. Must not be one of the DYNAMIC_ICONS
+
+        Returns: (List) Curve dictionaries with degree, form, knots and points
+
+        """
+        if icon_type not in SHAPE_DATA:
+            load_shape_data()
+        if icon_type not in SHAPE_DATA:
+            # builder output before the scale and normal alignment
+            cont = self.icon_dictionary[icon_type](name="tempIconCapture")
+            shapes = []
+            for shape in functions.get_shapes(cont, full_path=True):
+                selection_list = om.MSelectionList()
+                selection_list.add(shape)
+                shapes.append(get_curve_data(selection_list.getDagPath(0)))
+            cmds.delete(cont)
+            SHAPE_DATA[icon_type] = shapes
+        return SHAPE_DATA[icon_type]
+
+    def export_shape_data(self, file_path=DATA_FILE):
+        """Write the shape data of all data driven icons to the library file."""
+        data = {
+            icon_type: self.get_shape_data(icon_type)
+            for icon_type in self.get_icons_list()
+            if icon_type not in DYNAMIC_ICONS
+        }
+        io.IO(file_path=file_path).write(data)
+        return file_path
+
+    def _validate(self, icon_type):
         if icon_type not in (self.get_icons_list()):
             raise Exception(
                 "This icon is not available. Valid Icons are:\n  {}".format(
@@ -58,6 +278,17 @@ class Icon(object):
                 )
             )
 
+    def _build_icon(
+        self,
+        icon_type,
+        icon_name=None,
+        scale=(1, 1, 1),
+        location=None,
+        normal=(0, 1, 0),
+    ):
+        """Creates the icon with its builder method."""
+        self._validate(icon_type)
+
         icon_name = icon_name or "{}_cont".format(icon_type)
 
         rvs_con = None
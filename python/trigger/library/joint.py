@@ -186,26 +186,105 @@ def orient_joints(
     cmds.setAttr("{0}.jointOrient".format(joint_list[-1]), 0, 0, 0)
 
 
-def identify(joint, modules_dictionary):
+def get_limb_type_map(modules_dictionary):
+    """Return {joint type: limb type} map of the modules dictionary.
+
+    Building the map goes through all the members, so the owners of a modules
+    dictionary build it once and pass it to the identify functions. If a joint
+    type is a member of more than one limb, the last one wins as before.
+
+    Args:
+        modules_dictionary: (Dictionary) {limb type: limb data}
+
+    Returns: (Dictionary)
+    """
+    return {
+        member: limb_type
+        for limb_type, value in modules_dictionary.items()
+        for member in value["members"]
+    }
+
+
+def identify(joint, modules_dictionary, limb_type_map=None):
     """Identify joints for Trigger
     Args:
         joint: (String) Joint to query
         modules_dictionary: (Dictionary)
+        limb_type_map: (Dictionary) get_limb_type_map of the modules_dictionary.
+            Built from the modules_dictionary if not given
 
     Returns: (Tuple) joint_type, limb_type, side
 
     """
-    # define values as no
-    limb_type = "N/A"
+    if limb_type_map is None:
+        limb_type_map = get_limb_type_map(modules_dictionary)
     joint_type = get_joint_type(joint)
-
-    for key, value in modules_dictionary.items():
-        limb_type = key if joint_type in value["members"] else limb_type
-
+    limb_type = limb_type_map.get(joint_type, "N/A")
     side = get_joint_side(joint)
     return joint_type, limb_type, side
 
 
+def _identify_node(fn_node, limb_type_map):
+    """Identify the joint attached to the MFnDependencyNode without using cmds."""
+    type_int = fn_node.findPlug("type", False).asInt()
+    if type_int == 18:
+        joint_type = fn_node.findPlug("otherType", False).asString()
+    else:
+        joint_type = JOINT_TYPE_DICT.get(type_int)
+    side = JOINT_SIDE_DICT.get(fn_node.findPlug("side", False).asInt())
+    return joint_type, limb_type_map.get(joint_type, "N/A"), side
+
+
+def identify_many(joints, modules_dictionary, limb_type_map=None):
+    """Identify many joints in a single API pass
+    Args:
+        joints: (List) Joints to query
+        modules_dictionary: (Dictionary)
+        limb_type_map: (Dictionary) get_limb_type_map of the modules_dictionary.
+            Built from the modules_dictionary if not given
+
+    Returns: (List) (joint_type, limb_type, side) tuples in the order of the joints
+
+    """
+    if limb_type_map is None:
+        limb_type_map = get_limb_type_map(modules_dictionary)
+    selection_list = OpenMaya.MSelectionList()
+    for jnt in joints:
+        selection_list.add(jnt)
+    fn_node = OpenMaya.MFnDependencyNode()
+    result = []
+    for index in range(selection_list.length()):
+        fn_node.setObject(selection_list.getDependNode(index))
+        result.append(_identify_node(fn_node, limb_type_map))
+    return result
+
+
+def identify_hierarchy(root, modules_dictionary, limb_type_map=None):
+    """Identify the root and all the joints below it in a single API pass
+    Args:
+        root: (String) Top joint of the hierarchy
+        modules_dictionary: (Dictionary)
+        limb_type_map: (Dictionary) get_limb_type_map of the modules_dictionary.
+            Built from the modules_dictionary if not given
+
+    Returns: (Dictionary) {joint name: (joint_type, limb_type, side)}. Names are
+        the same as the ones returned by cmds.listRelatives
+
+    """
+    if limb_type_map is None:
+        limb_type_map = get_limb_type_map(modules_dictionary)
+    root_path = OpenMaya.MSelectionList().add(root).getDagPath(0)
+    iterator = OpenMaya.MItDag(OpenMaya.MItDag.kDepthFirst, OpenMaya.MFn.kJoint)
+    iterator.reset(root_path, OpenMaya.MItDag.kDepthFirst, OpenMaya.MFn.kJoint)
+    fn_node = OpenMaya.MFnDependencyNode()
+    result = {}
+    while not iterator.isDone():
+        fn_node.setObject(iterator.currentItem())
+        result[iterator.partialPathName()] = _identify_node(fn_node, limb_type_map)
+        iterator.next()
+    return result
+
+
 def get_rig_axes(joint):
     """Gets the axis information from the joint.
     Args:
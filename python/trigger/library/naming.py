@@ -1,11 +1,15 @@
 import os
 import re
 import glob
+import fnmatch
 import itertools
-from bisect import bisect_left
+from bisect import bisect_left, bisect_right
 from maya import cmds
 import uuid
 
+# {directory: (mtime, (file names, {version pattern: sorted versions}))}
+_LISTING_CACHE = {}
+
 
 # TODO: update the unique_name function to accept suffix to ignore
 def unique_name(name, return_counter=False, suffix=None):
@@ -140,9 +144,11 @@ def increment(file_path, force_version=True):
     )
 
 
-def get_all_versions(file_path):
-    """Checks the disk and returns all existing versions of a file in a list"""
+def _get_version_pattern(file_path):
+    """Return the directory and the glob pattern of all versions of the file.
 
+    None if the file name has no version.
+    """
     file_dir, file_name_with_ext = os.path.split(file_path)
     file_name, file_ext = os.path.splitext(file_name_with_ext)
 
@@ -150,18 +156,99 @@ def get_all_versions(file_path):
     if not version:
         return None
 
-    stripped_name = (
-        file_name
-        if not version
-        else file_name.replace("_v%s" % (str(version).zfill(3)), "_v{0}")
-    )
-    files_on_server = glob.glob(
-        os.path.join(file_dir, "{0}{1}".format(stripped_name.format("*"), file_ext))
-    )
-    if not files_on_server:
+    stripped_name = file_name.replace("_v%s" % (str(version).zfill(3)), "_v{0}")
+    return file_dir, "{0}{1}".format(stripped_name.format("*"), file_ext)
+
+
+def _get_listing(file_dir):
+    """Return the cached listing of the directory. Re-listed when its mtime changes.
+
+    Returns: (Tuple) file names and {pattern: sorted versions} dictionary. None
+        if the directory cannot be read
+    """
+    file_dir = file_dir or os.curdir
+    try:
+        mtime = os.stat(file_dir).st_mtime
+    except OSError:
+        _LISTING_CACHE.pop(file_dir, None)
+        return None
+    cached = _LISTING_CACHE.get(file_dir)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        names = os.listdir(file_dir)
+    except OSError:
+        return None
+    listing = (names, {})
+    _LISTING_CACHE[file_dir] = (mtime, listing)
+    return listing
+
+
+def _get_versions(file_dir, pattern, listing=None):
+    """Return the sorted versions matching the pattern in the directory.
+
+    Args:
+        file_dir: (String) Directory of the files
+        pattern: (String) Glob pattern of the file names
+        listing: (Tuple) Optional. Listing of the directory if it is already taken
+    """
+    listing = listing or _get_listing(file_dir)
+    if listing is None:
+        return []
+    names, versions = listing
+    if pattern not in versions:
+        # glob skips the hidden files
+        versions[pattern] = sorted(
+            resolve_version(name)
+            for name in fnmatch.filter(names, pattern)
+            if not name.startswith(".")
+        )
+    return versions[pattern]
+
+
+def clear_version_cache():
+    """Forget all directory listings used for the version queries."""
+    _LISTING_CACHE.clear()
+
+
+def get_all_versions(file_path):
+    """Checks the disk and returns all existing versions of a file in a list"""
+
+    version_pattern = _get_version_pattern(file_path)
+    if not version_pattern:
+        return None
+    all_versions = _get_versions(*version_pattern)
+    if not all_versions:
         return None
+    return list(all_versions)
+
 
-    return sorted(list(map(resolve_version, files_on_server)))
+def get_latest_versions(file_paths):
+    """
+    Resolves the latest existing versions of many files.
+
+    Each directory is listed once.
+
+    Args:
+        file_paths: (List) File paths
+
+    Returns: (List) Latest version numbers in the same order. None for the files
+        without any versions on disk
+
+    """
+    listings = {}
+    latest_versions = []
+    for file_path in file_paths:
+        version_pattern = _get_version_pattern(file_path)
+        if not version_pattern:
+            latest_versions.append(None)
+            continue
+        file_dir, pattern = version_pattern
+        if file_dir not in listings:
+            listings[file_dir] = _get_listing(file_dir)
+        all_versions = _get_versions(file_dir, pattern, listing=listings[file_dir])
+        latest_versions.append(all_versions[-1] if all_versions else None)
+    return latest_versions
 
 
 def get_next_version(file_path):
@@ -171,21 +258,16 @@ def get_next_version(file_path):
     all_versions = get_all_versions(file_path)
     if not all_versions:
         return file_path
+    uid = bisect_left(all_versions, current_version)
     # if the given file path version does exist:
-    if current_version in all_versions:
-        uid = all_versions.index(current_version)
-        if uid != len(all_versions) - 1:
-            next_version = all_versions[uid + 1]
-        else:
+    if uid < len(all_versions) and all_versions[uid] == current_version:
+        uid = bisect_right(all_versions, current_version)
+        if uid >= len(all_versions):
             return file_path
     # if the given file path version is not in the disk
-    else:
-        uid = bisect_left(all_versions, current_version)
-        if uid != len(all_versions) - 1:
-            next_version = all_versions[uid]
-        else:
-            return file_path
-    return resolve_file_path(file_path=file_path, new_version=next_version)
+    elif uid >= len(all_versions) - 1:
+        return file_path
+    return resolve_file_path(file_path=file_path, new_version=all_versions[uid])
 
 
 def get_previous_version(file_path):
@@ -195,21 +277,10 @@ def get_previous_version(file_path):
     all_versions = get_all_versions(file_path)
     if not all_versions:
         return file_path
-    # if the given file path version does exist:
-    if current_version in all_versions:
-        uid = all_versions.index(current_version)
-        if uid != 0:
-            prev_version = all_versions[uid - 1]
-        else:
-            return file_path
-    # if the given file path version is not in the disk
-    else:
-        uid = bisect_left(all_versions, current_version)
-        if uid != 0:
-            prev_version = all_versions[uid - 1]
-        else:
-            return file_path
-    return resolve_file_path(file_path=file_path, new_version=prev_version)
+    uid = bisect_left(all_versions, current_version)
+    if uid == 0:
+        return file_path
+    return resolve_file_path(file_path=file_path, new_version=all_versions[uid - 1])
 
 
 def is_latest_version(file_path):
@@ -218,13 +289,7 @@ def is_latest_version(file_path):
     all_versions = get_all_versions(file_path)
     if not all_versions:
         return False
-    if current_version not in all_versions:
-        return False
-    uid = all_versions.index(current_version)
-    if uid == len(all_versions) - 1:
-        return True
-    else:
-        return False
+    return all_versions[-1] == current_version
 
 
 def get_uuid(prefix="uuid", short=True, no_dashes=True):
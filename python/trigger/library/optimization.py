@@ -1,9 +1,46 @@
 """Collection of methods aiming to optimize the scene and rig itself"""
+import time
 
 from maya import cmds
+from trigger.core import compatibility as compat
+from trigger.core import filelog
 from trigger.library import arithmetic as ar
 from trigger.library.naming import convert_to_ranged_format
 
+LOG = filelog.Filelog(logname=__name__, filename="trigger_log")
+
+# utility nodes which are safe to delete when nothing reads their outputs
+UTILITY_NODE_TYPES = [
+    "plusMinusAverage",
+    "multiplyDivide",
+    compat.ADD_NODE_NAME,
+    compat.MULT_NODE_NAME,
+    "reverse",
+    "clamp",
+    "condition",
+    "blendTwoAttr",
+    "blendColors",
+    "setRange",
+    "remapValue",
+    "distanceBetween",
+    "unitConversion",
+    "multMatrix",
+    "decomposeMatrix",
+    "composeMatrix",
+    "inverseMatrix",
+    "wtAddMatrix",
+    "pickMatrix",
+    "fourByFourMatrix",
+]
+
+# {node type: (variable inputs, constant input, output)} of the nodes applying
+# a constant factor or offset. Chains of them can be merged into one node
+CHAIN_NODE_TYPES = {
+    "unitConversion": (["input"], "conversionFactor", "output"),
+    compat.MULT_NODE_NAME: (["input1", "input2"], None, "output"),
+    compat.ADD_NODE_NAME: (["input1", "input2"], None, "output"),
+}
+
 
 def switch_connections(
     switch, override_switch, kill_nodes, switch_on_visibles, switch_on_invisibles
@@ -94,3 +131,213 @@ def set_deformer_influence(deformer, vertex_ids):
     # convert the vetex ids to the custom format
     ranged_string_list = convert_to_ranged_format(vertex_ids, prefix="vtx")
     cmds.setAttr("{}.inputComponents".format(group_parts_node), len(ranged_string_list), *ranged_string_list, type="componentList")
+
+
+def get_node_count():
+    """Return the number of dependency nodes in the scene."""
+    return len(cmds.ls())
+
+
+def get_evaluation_plugs():
+    """Return the plugs pulled by the viewport during playback.
+
+    Deformed meshes and the world matrices of the transforms.
+    """
+    plugs = ["%s.outMesh" % x for x in cmds.ls(type="mesh", noIntermediate=True)]
+    plugs.extend(["%s.worldMatrix" % x for x in cmds.ls(type="transform")])
+    return plugs
+
+
+def get_frame_range(start=None, end=None):
+    """Return the given frame range, or the playback range for undefined ends."""
+    if start is None:
+        start = cmds.playbackOptions(query=True, minTime=True)
+    if end is None:
+        end = cmds.playbackOptions(query=True, maxTime=True)
+    return int(start), int(end)
+
+
+def measure_playback(start=None, end=None, plugs=None, time_nodes=False):
+    """Evaluate the frame range and measure the speed.
+
+    Works in batch mode as well. The plugs are evaluated for every frame instead
+    of drawing the viewport. Everything is dirtied on each frame, so a rig without
+    animation is evaluated fully, as if all the controls are animated.
+
+    Args:
+        start: (Int) First frame. Playback start if None
+        end: (Int) Last frame. Playback end if None
+        plugs: (List) Plugs to evaluate. Defaults to get_evaluation_plugs()
+        time_nodes: (Bool) Collect the compute time of each node with dgtimer
+
+    Returns:
+        (Dict) fps, frames, seconds and node_times {node: seconds} if time_nodes
+    """
+    start, end = get_frame_range(start, end)
+    plugs = plugs or get_evaluation_plugs()
+    frames = list(range(start, end + 1))
+    original_frame = cmds.currentTime(query=True)
+    if time_nodes:
+        cmds.dgtimer(on=True, reset=True)
+    start_time = time.time()
+    try:
+        for frame in frames:
+            cmds.currentTime(frame, update=False)
+            cmds.dgdirty(allPlugs=True)
+            if plugs:
+                cmds.dgeval(plugs)
+    finally:
+        seconds = time.time() - start_time
+        if time_nodes:
+            cmds.dgtimer(off=True)
+        cmds.currentTime(original_frame, update=False)
+    result = {
+        "fps": len(frames) / seconds if seconds else 0.0,
+        "frames": len(frames),
+        "seconds": seconds,
+    }
+    if time_nodes:
+        result["node_times"] = {
+            node: cmds.dgtimer(
+                node, query=True, timerMetric="compute", timerType="self"
+            )
+            for node in cmds.ls(dependencyNodes=True)
+        }
+    return result
+
+
+def find_expensive_nodes(node_times, count=10):
+    """Return the (node, seconds) pairs of the slowest nodes."""
+    ordered = sorted(node_times.items(), key=lambda item: item[1], reverse=True)
+    return [item for item in ordered[:count] if item[1] > 0]
+
+
+def find_dead_nodes(node_types=None):
+    """Return the utility nodes which no other node reads from.
+
+    Nodes feeding only the dead nodes are dead as well.
+
+    Args:
+        node_types: (List) Node types to check. Defaults to UTILITY_NODE_TYPES
+
+    Returns:
+        (List) Dead nodes
+    """
+    node_types = node_types or UTILITY_NODE_TYPES
+    existing_types = [x for x in node_types if x in cmds.allNodeTypes()]
+    candidates = set(cmds.ls(type=existing_types) or [])
+    candidates.difference_update(cmds.ls(candidates, referencedNodes=True) or [])
+    dead = set()
+    checked = True
+    while checked:
+        checked = False
+        for node in candidates.difference(dead):
+            if cmds.lockNode(node, query=True, lock=True)[0]:
+                continue
+            consumers = set(
+                cmds.listConnections(node, source=False, destination=True) or []
+            )
+            if not consumers.difference(dead, [node]):
+                dead.add(node)
+                checked = True
+    return sorted(dead)
+
+
+def delete_dead_nodes(node_types=None):
+    """Delete the utility nodes without consumers. Returns the deleted nodes."""
+    dead_nodes = find_dead_nodes(node_types)
+    if dead_nodes:
+        cmds.delete(dead_nodes)
+    LOG.info("%i dead nodes deleted" % len(dead_nodes))
+    return dead_nodes
+
+
+def _get_constant(node, variable_inputs, constant_input):
+    """Return the connected input and the constant value of a chain node.
+
+    Returns:
+        (Tuple) input plug, constant attribute. None if the node does not
+            have one connected and one constant input
+    """
+    connected = []
+    for attr in variable_inputs:
+        source = cmds.listConnections(
+            "%s.%s" % (node, attr), source=True, destination=False, plugs=True
+        )
+        if source:
+            connected.append(attr)
+    if len(connected) != 1:
+        return None
+    if constant_input:
+        constant_attr = constant_input
+        if cmds.listConnections("%s.%s" % (node, constant_attr), source=True):
+            return None
+    else:
+        constant_attr = [x for x in variable_inputs if x not in connected][0]
+    return connected[0], constant_attr
+
+
+def merge_node_chains(chain_types=None):
+    """Merge the chains of the nodes applying constant factors or offsets.
+
+    e.g. unitConversion (x 0.017) => unitConversion (x 57.29) becomes a single
+    unitConversion (x 1.0). Same for multDoubleLinear and addDoubleLinear with
+    a constant input.
+
+    Args:
+        chain_types: (Dict) Same as CHAIN_NODE_TYPES. Defaults to it
+
+    Returns:
+        (List) Deleted nodes
+    """
+    chain_types = chain_types or CHAIN_NODE_TYPES
+    merged = []
+    for node_type, (variable_inputs, constant_input, output) in chain_types.items():
+        if node_type not in cmds.allNodeTypes():
+            continue
+        is_additive = node_type == compat.ADD_NODE_NAME
+        for node in cmds.ls(type=node_type):
+            if node in merged:
+                continue
+            # merge the upstream nodes into this one until the chain ends
+            while True:
+                inputs = _get_constant(node, variable_inputs, constant_input)
+                if not inputs:
+                    break
+                input_attr, constant_attr = inputs
+                upstream = cmds.listConnections(
+                    "%s.%s" % (node, input_attr), source=True, destination=False
+                )[0]
+                if cmds.nodeType(upstream) != node_type:
+                    break
+                if cmds.lockNode(upstream, query=True, lock=True)[0]:
+                    break
+                consumers = cmds.listConnections(
+                    "%s.%s" % (upstream, output), source=False, destination=True
+                )
+                if consumers != [node]:
+                    break
+                upstream_inputs = _get_constant(
+                    upstream, variable_inputs, constant_input
+                )
+                if not upstream_inputs:
+                    break
+                upstream_input, upstream_constant = upstream_inputs
+                value = cmds.getAttr("%s.%s" % (node, constant_attr))
+                upstream_value = cmds.getAttr("%s.%s" % (upstream, upstream_constant))
+                if is_additive:
+                    value += upstream_value
+                else:
+                    value *= upstream_value
+                source_plug = cmds.listConnections(
+                    "%s.%s" % (upstream, upstream_input),
+                    source=True,
+                    destination=False,
+                    plugs=True,
+                )[0]
+                cmds.setAttr("%s.%s" % (node, constant_attr), value)
+                cmds.connectAttr(source_plug, "%s.%s" % (node, input_attr), force=True)
+                cmds.delete(upstream)
+                merged.append(upstream)
+    LOG.info("%i chained nodes merged" % len(merged))
+    return merged
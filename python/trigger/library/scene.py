@@ -13,3 +13,28 @@ def reset():
     # set the camera matrix
     cmds.xform("persp", worldSpace=True, matrix=camera_matrix)
     cmds.setAttr("perspShape.centerOfInterest", center_of_interest)
+
+
+def save_checkpoint(file_path):
+    """Export the whole scene to the file without renaming the current scene."""
+    cmds.file(
+        file_path,
+        exportAll=True,
+        type="mayaBinary",
+        preserveReferences=True,
+        force=True,
+    )
+    return file_path
+
+
+def load_checkpoint(file_path):
+    """Reset the scene and import the checkpoint file into it."""
+    reset()
+    cmds.file(
+        file_path,
+        i=True,
+        type="mayaBinary",
+        preserveReferences=True,
+        mergeNamespacesOnClash=True,
+        ignoreVersion=True,
+    )
@@ -4,6 +4,7 @@ from maya import cmds
 from trigger.core import compatibility as compat
 from trigger.library import functions, attribute, transform, connection
 from trigger.library import arithmetic as op
+from trigger.library import graph_builder
 from trigger.library import naming
 
 
@@ -688,7 +689,7 @@ def make_stretchy_ik(
         name="condition_length",
     )
 
-    cmds.connectAttr(condition_length_p, "%s.tx" % end_loc)
+    graph_builder.connect(condition_length_p, "%s.tx" % end_loc)
 
     # STRETCHING PART
     # soft_distance = cmds.createNode("distanceBetween", name="distanceSoft_%s" % name)
@@ -724,7 +725,7 @@ def make_stretchy_ik(
             name=naming.parse([name, "stretchy", "squash"], suffix="blend"),
         )
         # cmds.connectAttr(squash_mult_p, "%s.color1R" %squash_blend_node)
-        cmds.connectAttr(switch_p, "%s.color1R" % squash_blend_node)
+        graph_builder.connect(switch_p, "%s.color1R" % squash_blend_node)
         # Stretch limit
         # clamp_node = cmds.createNode("clamp", name="stretchLimit_%s" % name)
         clamp_node = cmds.createNode(
@@ -733,9 +734,9 @@ def make_stretchy_ik(
         max_distance_p = op.add(
             "%s.stretchLimit" % end_controller, "%s.initialDistance" % jnt
         )
-        cmds.connectAttr(sum1_p, "%s.inputR" % clamp_node)
-        cmds.connectAttr(max_distance_p, "%s.maxR" % clamp_node)
-        cmds.connectAttr(sum1_p, "%s.minR" % clamp_node)
+        graph_builder.connect(sum1_p, "%s.inputR" % clamp_node)
+        graph_builder.connect(max_distance_p, "%s.maxR" % clamp_node)
+        graph_builder.connect(sum1_p, "%s.minR" % clamp_node)
         ##
         cmds.connectAttr("%s.outputR" % clamp_node, "%s.color2R" % squash_blend_node)
         cmds.connectAttr("%s.squash" % end_controller, "%s.blender" % squash_blend_node)
@@ -746,7 +747,7 @@ def make_stretchy_ik(
             output_x_p = op.invert("%s.outputR" % squash_blend_node, name="side_invert")
         else:
             output_x_p = "%s.outputR" % squash_blend_node
-        cmds.connectAttr(output_x_p, "%s.tx" % jnt)
+        graph_builder.connect(output_x_p, "%s.tx" % jnt)
 
     for x in ik_handle:
         connection.matrixConstraint(
@@ -757,4 +758,6 @@ def make_stretchy_ik(
         )
 
     # connection.matrixConstraint(soft_blend_loc, ik_handle, mo=False, source_parent_cutoff=source_parent_cutoff)
+    # the limbs query the joint connections made here
+    graph_builder.flush()
     return soft_blend_loc, root_loc, distance_start_loc, distance_end_loc
@@ -8,6 +8,7 @@ from trigger.library import attribute
 from trigger.library import api
 from trigger.library import connection
 from trigger.library import arithmetic as op
+from trigger.library import graph_builder
 from trigger.objects.ribbon import Ribbon
 from trigger.objects.controller import Controller
 from trigger.objects import measure
@@ -884,8 +885,10 @@ class Arm(ModuleCore):
             "decomposeMatrix",
             name=naming.parse([self.module_name, "IK", "trans"], suffix="decompose"),
         )
-        cmds.connectAttr(average_matrix_ik_p, "%s.inputMatrix" % decompose_ik_rot)
-        cmds.connectAttr(mult_matrix_ik_low_p, "%s.inputMatrix" % decompose_ik_trans)
+        graph_builder.connect(average_matrix_ik_p, "%s.inputMatrix" % decompose_ik_rot)
+        graph_builder.connect(
+            mult_matrix_ik_low_p, "%s.inputMatrix" % decompose_ik_trans
+        )
         cmds.connectAttr(
             "%s.outputRotate" % decompose_ik_rot, "%s.rotate" % self.midLockBridge_IK
         )
@@ -913,8 +916,10 @@ class Arm(ModuleCore):
             "decomposeMatrix",
             name=naming.parse([self.module_name, "FK", "trans"], suffix="decompose"),
         )
-        cmds.connectAttr(average_matrix_fk_p, "%s.inputMatrix" % decompose_fk_rot)
-        cmds.connectAttr(mult_matrix_fk_low_p, "%s.inputMatrix" % decompose_fk_trans)
+        graph_builder.connect(average_matrix_fk_p, "%s.inputMatrix" % decompose_fk_rot)
+        graph_builder.connect(
+            mult_matrix_fk_low_p, "%s.inputMatrix" % decompose_fk_trans
+        )
         cmds.connectAttr(
             "%s.outputRotate" % decompose_fk_rot, "%s.rotate" % self.midLockBridge_FK
         )
@@ -1080,8 +1085,8 @@ class Arm(ModuleCore):
         lower_pin_divided_p = op.divide(
             lower_pin_distance.plug, "%s.sx" % self.scaleHook
         )
-        cmds.connectAttr(upper_pin_divided_p, "%s.color1R" % pin_blender)
-        cmds.connectAttr(lower_pin_divided_p, "%s.color1G" % pin_blender)
+        graph_builder.connect(upper_pin_divided_p, "%s.color1R" % pin_blender)
+        graph_builder.connect(lower_pin_divided_p, "%s.color1G" % pin_blender)
 
         # hijack the joints translate X
         low_output_plug = connection.connections(
@@ -1119,7 +1124,7 @@ class Arm(ModuleCore):
                 mult_p = op.multiply(
                     initial_distance, "{0}.{1}".format(self.handIkCont.name, scale_attr)
                 )
-                cmds.connectAttr(mult_p, "%s.initialDistance" % jnt)
+                graph_builder.connect(mult_p, "%s.initialDistance" % jnt)
 
         connection.matrix_switch(
             self.j_ik_rp_up,
@@ -79,6 +79,42 @@ class Controller(object):
         #     self._side = "center"
         #     self._tier = tier or "primary"
 
+    @classmethod
+    def create_many(cls, definitions):
+        """
+        Creates many controllers with a single batch of icons
+
+        Args:
+            definitions: (List) Dictionaries of the Controller arguments. e.g.
+                [{"name": "L_hand_cont", "shape": "Cube", "side": "L"}]
+
+        Returns: (List) Controller objects in the same order
+
+        """
+        icon_handler = Icon()
+        new_definitions = [
+            x for x in definitions if not cmds.objExists(x.get("name", "cont"))
+        ]
+        icons = icon_handler.create_icons(
+            [
+                {
+                    "icon_type": x.get("shape", "Circle"),
+                    "icon_name": x.get("name", "cont"),
+                    "scale": x.get("scale", (1, 1, 1)),
+                    "normal": x.get("normal", (0, 1, 0)),
+                    "location": x.get("pos"),
+                }
+                for x in new_definitions
+            ]
+        )
+        names = {id(x): cont for x, (cont, _) in zip(new_definitions, icons)}
+        controllers = []
+        for definition in definitions:
+            kwargs = dict(definition)
+            kwargs["name"] = names.get(id(definition), definition.get("name", "cont"))
+            controllers.append(cls(**kwargs))
+        return controllers
+
     @property
     def line_width(self):
         return self._line_width
@@ -0,0 +1,312 @@
+"""Precomputed vertex correspondence between two meshes.
+
+Each target vertex is bound to a few source vertices with barycentric weights.
+The binding is a sparse (target vertices x source vertices) matrix where every
+row has the same number of entries, so it is kept as two dense
+(target vertices x entries) arrays of source indices and weights. Pushing shape
+deltas through the binding is a single vectorized product for any number of
+shapes.
+
+This module has no Maya dependency. Collecting the bindings from the meshes is
+done by the callers.
+"""
+
+import hashlib
+
+import numpy as np
+
+from trigger.core import io
+
+
+def get_key(*arrays, **settings):
+    """Return a hash identifying the given arrays and settings.
+
+    Args:
+        *arrays: (numpy.ndarray) e.g. the point positions and triangles of the meshes
+        **settings: Values affecting the binding. e.g. mode="uv"
+
+    Returns:
+        (String) Hex digest
+    """
+    digest = hashlib.sha1()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str(array.shape).encode("utf-8"))
+        digest.update(array.tobytes())
+    for key in sorted(settings):
+        digest.update(("%s=%s" % (key, settings[key])).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _get_weights(offset, edge_a, edge_b, inverse):
+    """Return the barycentric weights of the offsets from the third corners."""
+    offset_x, offset_y = offset[..., 0], offset[..., 1]
+    weight_a = (offset_x * edge_b[..., 1] - offset_y * edge_b[..., 0]) * inverse
+    weight_b = (edge_a[..., 0] * offset_y - edge_a[..., 1] * offset_x) * inverse
+    return weight_a, weight_b, 1.0 - weight_a - weight_b
+
+
+def _clamp_weights(weights):
+    weights = np.clip(weights, 0.0, None)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def _get_entries(counts):
+    """Return the position of each repeated item in its run, e.g. [0, 1, 0, 1, 2]."""
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+class _TriangleGrid(object):
+    """Uniform grid of the triangles binned by their bounding boxes.
+
+    A triangle containing a point always overlaps the cell of the point, so only
+    the triangles of that cell need to be tested.
+    """
+
+    def __init__(self, triangles, triangle_ids, max_resolution=1024):
+        lower = triangles[triangle_ids].min(axis=1)
+        upper = triangles[triangle_ids].max(axis=1)
+        self.minimum = lower.min(axis=0)
+        extent = np.maximum(upper.max(axis=0) - self.minimum, 1e-12)
+        # about one cell per triangle
+        self.cell_size = max(np.sqrt(np.prod(extent) / len(triangle_ids)), 1e-12)
+        self.resolution = np.clip(
+            np.ceil(extent / self.cell_size).astype(np.intp), 1, max_resolution
+        )
+        self.cell_size = np.maximum(self.cell_size, extent / self.resolution)
+
+        low_cells = self._get_cells(lower)
+        spans = self._get_cells(upper) - low_cells + 1
+        counts = spans[:, 0] * spans[:, 1]
+        entries = _get_entries(counts)
+        span_x = np.repeat(spans[:, 0], counts)
+        cell_x = np.repeat(low_cells[:, 0], counts) + entries % span_x
+        cell_y = np.repeat(low_cells[:, 1], counts) + entries // span_x
+        cells = cell_y * self.resolution[0] + cell_x
+        # stable sort keeps the triangles of a cell in index order
+        order = np.argsort(cells, kind="stable")
+        self.triangle_ids = np.repeat(triangle_ids, counts)[order]
+        self.cell_starts = np.searchsorted(
+            cells[order], np.arange(np.prod(self.resolution) + 1)
+        )
+
+    def _get_cells(self, points):
+        cells = np.floor((points - self.minimum) / self.cell_size).astype(np.intp)
+        return np.clip(cells, 0, self.resolution - 1)
+
+    def get_candidates(self, points):
+        """Return the (point index, triangle index) pairs to test.
+
+        Pairs are ordered by point and triangle index.
+        """
+        cells = self._get_cells(points)
+        flat_cells = cells[:, 1] * self.resolution[0] + cells[:, 0]
+        starts = self.cell_starts[flat_cells]
+        counts = self.cell_starts[flat_cells + 1] - starts
+        # points outside the grid have no candidates
+        outside = np.any(
+            (points < self.minimum)
+            | (points > self.minimum + self.cell_size * self.resolution),
+            axis=1,
+        )
+        counts[outside] = 0
+        entries = _get_entries(counts)
+        point_ids = np.repeat(np.arange(len(points)), counts)
+        return point_ids, self.triangle_ids[np.repeat(starts, counts) + entries]
+
+    def get_nearby(self, point):
+        """Return the triangles in the closest cells having any around the point.
+
+        The cells one step further are included as well, since the closest
+        triangle may overlap a neighbouring cell only.
+        """
+        cell_x, cell_y = self._get_cells(point[None, :])[0]
+        radius = 0
+        while True:
+            candidates = self._get_window(cell_x, cell_y, radius)
+            if len(candidates) or radius >= self.resolution.max():
+                break
+            radius = max(1, radius * 2)
+        return self._get_window(cell_x, cell_y, radius + 1)
+
+    def _get_window(self, cell_x, cell_y, radius):
+        """Return the triangles of the cells in the square around the cell."""
+        x_range = np.clip([cell_x - radius, cell_x + radius], 0, self.resolution[0] - 1)
+        y_range = np.clip([cell_y - radius, cell_y + radius], 0, self.resolution[1] - 1)
+        # the cells of a row are contiguous
+        row_cells = np.arange(y_range[0], y_range[1] + 1) * self.resolution[0]
+        starts = self.cell_starts[row_cells + x_range[0]]
+        ends = self.cell_starts[row_cells + x_range[1] + 1]
+        return np.unique(
+            np.concatenate([self.triangle_ids[a:b] for a, b in zip(starts, ends)])
+        )
+
+
+def triangle_barycentrics(points, triangles, chunk_size=512):
+    """Find the containing triangle of each 2D point.
+
+    The triangles are binned in a grid, so each point is only tested against the
+    triangles around it. Points outside all triangles (e.g. on UV seams) use the
+    closest of the nearby triangles in barycentric terms and their coordinates
+    are clamped into it.
+
+    Args:
+        points: (numpy.ndarray) (n, 2) point positions
+        triangles: (numpy.ndarray) (t, 3, 2) corner positions of the triangles
+        chunk_size: (int) Number of points tested at once
+
+    Returns:
+        (tuple) (n,) triangle index array and (n, 3) barycentric weight array
+    """
+    points = np.asarray(points, dtype=np.float64)
+    triangles = np.asarray(triangles, dtype=np.float64)
+    origin = triangles[:, 2]
+    edge_a = triangles[:, 0] - origin
+    edge_b = triangles[:, 1] - origin
+    determinant = edge_a[:, 0] * edge_b[:, 1] - edge_a[:, 1] * edge_b[:, 0]
+    # degenerate triangles never contain a point
+    valid = np.abs(determinant) > 1e-12
+    inverse = np.where(valid, 1.0 / np.where(valid, determinant, 1.0), 0.0)
+
+    if not np.any(valid):
+        raise ValueError("All triangles are degenerate")
+
+    triangle_ids = np.zeros(len(points), dtype=np.intp)
+    weights = np.zeros((len(points), 3))
+    found = np.zeros(len(points), dtype=bool)
+    grid = _TriangleGrid(triangles, np.flatnonzero(valid))
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start : start + chunk_size]
+        point_ids, candidates = grid.get_candidates(chunk)
+        pair_weights = _get_weights(
+            chunk[point_ids] - origin[candidates],
+            edge_a[candidates],
+            edge_b[candidates],
+            inverse[candidates],
+        )
+        lowest = np.minimum(np.minimum(*pair_weights[:2]), pair_weights[2])
+        # the first candidate with the highest lowest weight, like argmax
+        order = np.lexsort((-lowest, point_ids))
+        pair_ids, first = np.unique(point_ids[order], return_index=True)
+        best = order[first]
+        contained = lowest[best] >= 0.0
+        rows = start + pair_ids[contained]
+        best = best[contained]
+        triangle_ids[rows] = candidates[best]
+        weights[rows] = _clamp_weights(
+            np.stack([weight[best] for weight in pair_weights], axis=1)
+        )
+        found[rows] = True
+
+    # points outside all triangles use the best of the nearby triangles
+    for row in np.flatnonzero(~found):
+        candidates = grid.get_nearby(points[row])
+        candidate_weights = _get_weights(
+            points[row] - origin[candidates],
+            edge_a[candidates],
+            edge_b[candidates],
+            inverse[candidates],
+        )
+        lowest = np.minimum(np.minimum(*candidate_weights[:2]), candidate_weights[2])
+        best = np.argmax(lowest)
+        triangle_ids[row] = candidates[best]
+        weights[row] = _clamp_weights(
+            np.array([[weight[best] for weight in candidate_weights]])
+        )[0]
+    return triangle_ids, weights
+
+
+class Correspondence(object):
+    """Sparse binding of the target vertices to the source vertices."""
+
+    def __init__(self, indices, weights, source_count, key=None):
+        """Initialize.
+
+        Args:
+            indices: (numpy.ndarray) (target vertices, entries) source vertex indices
+            weights: (numpy.ndarray) (target vertices, entries) weights of the indices
+            source_count: (int) Vertex count of the source mesh
+            key: (String) Optional hash of the meshes and settings the binding is
+                created from. See get_key()
+        """
+        super(Correspondence, self).__init__()
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        if self.indices.ndim == 1:
+            self.indices = self.indices[:, None]
+            self.weights = self.weights[:, None]
+        if self.indices.shape != self.weights.shape:
+            raise ValueError("Indices and weights must have the same shape")
+        self.source_count = int(source_count)
+        self.key = key
+
+    @classmethod
+    def identity(cls, vertex_count, key=None):
+        """Binding of two meshes with the same topology."""
+        indices = np.arange(vertex_count)
+        return cls(indices, np.ones(vertex_count), vertex_count, key=key)
+
+    @property
+    def vertex_count(self):
+        """Vertex count of the target mesh."""
+        return self.indices.shape[0]
+
+    def transfer(self, deltas):
+        """Push the source deltas through the binding.
+
+        Args:
+            deltas: (numpy.ndarray) (source vertices, 3) deltas of a single shape or
+                (shapes, source vertices, 3) deltas of many shapes
+
+        Returns:
+            (numpy.ndarray) Target deltas with the same leading dimensions
+        """
+        deltas = np.asarray(deltas, dtype=np.float64)
+        if deltas.shape[-2] != self.source_count:
+            raise ValueError(
+                "Deltas have %i vertices. Source mesh has %i"
+                % (deltas.shape[-2], self.source_count)
+            )
+        if self.indices.size and (
+            self.indices.min() < 0 or self.indices.max() >= self.source_count
+        ):
+            raise ValueError("Binding indices are out of the source vertex range")
+        # accumulate one entry at a time. Gathering all the entries at once needs
+        # (..., target vertices, entries, 3) memory
+        result = np.zeros(deltas.shape[:-2] + (self.vertex_count, 3))
+        buffer = np.empty_like(result)
+        for entry in range(self.indices.shape[1]):
+            # the checked indices need no bounds buffering
+            np.take(deltas, self.indices[:, entry], axis=-2, out=buffer, mode="clip")
+            buffer *= self.weights[:, entry, None]
+            result += buffer
+        return result
+
+    def to_dense(self):
+        """Return the binding as a (target vertices x source vertices) matrix."""
+        matrix = np.zeros((self.vertex_count, self.source_count))
+        rows = np.repeat(np.arange(self.vertex_count), self.indices.shape[1])
+        np.add.at(matrix, (rows, self.indices.ravel()), self.weights.ravel())
+        return matrix
+
+    def save(self, file_path):
+        """Write the binding to a numpy archive."""
+        with io.atomic_write(file_path) as f:
+            np.savez_compressed(
+                f,
+                indices=self.indices.astype(np.int32),
+                weights=self.weights,
+                source_count=np.array(self.source_count),
+                key=np.array(self.key or ""),
+            )
+
+    @classmethod
+    def load(cls, file_path):
+        """Read a binding written with save()."""
+        with np.load(file_path) as archive:
+            return cls(
+                archive["indices"],
+                archive["weights"],
+                int(archive["source_count"]),
+                key=str(archive["key"]) or None,
+            )
@@ -1,6 +1,7 @@
 from maya import cmds
 from trigger.core import compatibility as compat
 from trigger.library import connection, attribute
+from trigger.library import graph_builder
 
 class Angle(object):
     """Creates set of locators to create angle extractors"""
@@ -133,7 +134,7 @@ class Distance(object):
 
     @start.setter
     def start(self, attr):
-        cmds.connectAttr(attr, "%s.point1" % self._distance_node)
+        graph_builder.connect(attr, "%s.point1" % self._distance_node)
         self._start = attr
 
     @property
@@ -142,7 +143,7 @@ class Distance(object):
 
     @end.setter
     def end(self, attr):
-        cmds.connectAttr(attr, "%s.point2" % self._distance_node)
+        graph_builder.connect(attr, "%s.point2" % self._distance_node)
         self._end = attr
 
     @property
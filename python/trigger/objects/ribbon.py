@@ -6,6 +6,7 @@
 from maya import cmds
 from trigger.library import functions, naming, connection
 from trigger.library import arithmetic as op
+from trigger.library import graph_builder
 from trigger.library import attribute
 
 from trigger.objects.controller import Controller
@@ -437,7 +438,7 @@ class Ribbon(object):
                 )
 
                 for ch in "RGB":
-                    cmds.connectAttr(
+                    graph_builder.connect(
                         global_div_plug, "{0}.color1{1}".format(global_mixer, ch)
                     )
                     cmds.setAttr("{0}.color2{1}".format(global_mixer, ch), 1)
@@ -449,6 +450,8 @@ class Ribbon(object):
                     "%s.scaleSwitch" % self._startPlug, "%s.blender" % global_mixer
                 )
 
+        # the deformer joints are queried once the follicles are in place
+        graph_builder.flush()
         return follicle_list
 
     def _create_controllers(self, length):
@@ -11,6 +11,13 @@ from trigger.core.io import IO
 
 from trigger.core import filelog
 
+try:
+    from trigger.objects import weight_matrix
+    from trigger.core import weight_file
+except ImportError:
+    weight_matrix = None
+    weight_file = None
+
 log = filelog.Filelog(logname=__name__, filename="trigger_log")
 
 
@@ -41,15 +48,33 @@ def subtractList(list_of_values):
 
 
 class Weight(object):
-    def __init__(self, source=None):
+    def __init__(self, source=None, sparse=False):
+        """Initialize.
+
+        Args:
+            source: (String or Dict) see feed()
+            sparse: (Bool) If True, zero weights are omitted when the data is exported.
+        """
         super(Weight, self).__init__()
         self.temp_io = IO(file_name="trigger_temp_skin.json")
         self._is_temp_dirty = True
         self._data = None
+        # (vertices x influences) weights. Stays None if numpy is not available
+        self._matrix = None
+        self.sparse = sparse
 
         if source:
             self.feed(source)
 
+    @property
+    def metadata(self):
+        """Deformer, shape and influence information of the data.
+
+        Point values are not guaranteed to be up to date. Use get_influence_data() or
+        export() for weights.
+        """
+        return self._data
+
     @property
     def is_temp_dirty(self):
         """Checks the temp file and dirty flag and returns True if the temp file requires recreated or not"""
@@ -66,13 +91,23 @@ class Weight(object):
         """provides the data that the class needs to work with.
         The source can be:
          - absolute json path (string) (valid weight formatted matching cmds.deformerWeights output))
+         - absolute binary weight file path (string) (.trwz)
          - dictionary item (matching cmds.deformerWeights output
          - skinCluster node (String) (must be present in the current maya scene)
         """
+        _matrix = None
         if isinstance(source, dict):
             _data = source
         elif isinstance(source, str):
-            if os.path.isfile(source):
+            is_file = os.path.isfile(source)
+            if is_file and weight_file and weight_file.is_weight_file(source):
+                # read the weights directly into the matrix
+                with weight_file.WeightFile(source) as binary_file:
+                    _data = binary_file.header_data()
+                    _matrix = binary_file.to_matrix()
+            elif is_file and weight_matrix:
+                _data, _matrix = self.__stream_data_from_file(source)
+            elif is_file:
                 _data = self.__read_data_from_file(source)
             elif cmds.ls(source, type="skinCluster"):
                 _data = self.__read_data_from_deformer(source)
@@ -86,16 +121,24 @@ class Weight(object):
 
         if self.validate(_data):
             self._data = _data
+            if _matrix is not None:
+                self._matrix = _matrix
+            elif weight_matrix:
+                self._matrix = weight_matrix.WeightMatrix.from_deformer_weight(_data)
         else:
             log.error("Data is corrupted")
             raise
 
     def export(self, file_path):
         """
-        Exports the data to specified json file path
+        Exports the data to specified json or binary weight (.trwz) file path
 
         """
         "TODO data validation?"
+        self._sync_data()
+        if weight_file and weight_file.is_weight_file(file_path):
+            weight_file.write(self._data, file_path)
+            return
         IO().write(self._data, file_path)
 
     def apply(self, deformer):
@@ -137,7 +180,7 @@ class Weight(object):
         # compare the vertex size and act accordingly if the topologies are different
         if len(api.get_all_vertices(geo)) == self.get_vertex_count():
             # same topology
-            self.__set_weights(deformer, geo, self.__convert_to_m_array(self._data))
+            self.__set_weights(deformer, geo, self.__get_m_array())
             if cmds.skinCluster(deformer, query=True, skinMethod=True):
                 self.__set_blend_weights(
                     deformer, geo, om.MDoubleArray(self._data.get("DQ_weights", []))
@@ -255,6 +298,37 @@ class Weight(object):
         """Gets the weight dictionary from specified file path"""
         return IO(file_path=path).read()
 
+    def __stream_data_from_file(self, path):
+        """Reads the weight file influence by influence directly into a weight matrix.
+
+        Point lists are not kept in the data, so the memory is bounded to the matrix
+        and a single influence block.
+        """
+        _data = {"deformerWeight": {}}
+        _influences = []
+        _arrays = []
+        for key_path, value in IO(file_path=path).stream(
+            keys=["deformerWeight", "weights"]
+        ):
+            if key_path[:2] == ("deformerWeight", "weights"):
+                _arrays.append(weight_matrix.points_to_arrays(value["points"]))
+                value["points"] = []
+                _influences.append(value.get("source"))
+                _data["deformerWeight"].setdefault("weights", []).append(value)
+            elif key_path[0] == "deformerWeight":
+                _data["deformerWeight"][key_path[1]] = value
+            else:
+                _data[key_path[0]] = value
+
+        if "shapes" not in _data["deformerWeight"]:
+            # not a valid weights file. Let the validation handle it
+            return _data, None
+        _data["deformerWeight"].setdefault("weights", [])
+        vertex_count = _data["deformerWeight"]["shapes"][0]["size"]
+        return _data, weight_matrix.WeightMatrix.from_arrays(
+            vertex_count, _influences, _arrays
+        )
+
     def __points_to_dict(self, points_data):
         """Converts hard to calculate point data in json file to easy to iterate dictionary"""
         _dict_data = {}
@@ -269,6 +343,11 @@ class Weight(object):
             points_list.append({"index": index, "value": value})
         return points_list
 
+    def _sync_data(self):
+        """Writes the weight matrix values back to the maya weights JSON data"""
+        if self._matrix is not None:
+            self._matrix.update_deformer_weight(self._data, sparse=self.sparse)
+
     def get_influence_data(self, influence_name):
         """searches the data dictionary and returns the related influence dictionary like
         Args:
@@ -297,14 +376,25 @@ class Weight(object):
         """
         for weights in self._data["deformerWeight"]["weights"]:
             if weights["source"] == influence_name:
+                if self._matrix is not None:
+                    return dict(
+                        weights,
+                        points=self._matrix.to_points(
+                            influence_name, sparse=self.sparse
+                        ),
+                    )
                 return weights
 
     def remove_influence(self, influence_name):
         """Removes the given influence (weights) from the data"""
 
-        for weights in self._data["deformerWeight"]["weights"]:
-            if weights["source"] == influence_name:
-                self._data["deformerWeight"]["weights"].remove(weights)
+        self._data["deformerWeight"]["weights"] = [
+            weights
+            for weights in self._data["deformerWeight"]["weights"]
+            if weights["source"] != influence_name
+        ]
+        if self._matrix is not None and influence_name in self._matrix.influences:
+            self._matrix.remove_influence(influence_name)
 
     def _get_last_layer(self):
         _layers = []
@@ -328,7 +418,8 @@ class Weight(object):
             self._clamp_point_weights(influence_data)
         # start = time.time()
         _influence_name = influence_data.get("source", None)
-        if self.get_influence_data(_influence_name) and not force:
+        _existing_data = self.get_influence_data(_influence_name)
+        if _existing_data and not force:
             raise Exception(
                 "Data already contains weights data for %s" % _influence_name
             )
@@ -337,11 +428,23 @@ class Weight(object):
         _shape = self._data["deformerWeight"]["shapes"][0]["name"]
         influence_data["deformer"] = _deformer
         influence_data["shape"] = _shape
-        influence_data["layer"] = self._get_last_layer() + 1
+        if _existing_data:
+            # replace the existing influence keeping its layer
+            influence_data["layer"] = _existing_data.get("layer", 0)
+            self.remove_influence(_influence_name)
+        else:
+            influence_data["layer"] = self._get_last_layer() + 1
         # print("afer normalization: %s" %str(time.time() - start))
 
         # s_b = time.time()
         self._data["deformerWeight"]["weights"].append(copy.copy(influence_data))
+        if self._matrix is not None:
+            points = influence_data["points"]
+            self._matrix.add_influence(
+                _influence_name,
+                weight_matrix.points_to_array(points, self._matrix.vertex_count),
+                stored=weight_matrix.points_to_arrays(points)[0],
+            )
         # print("apply data: %s" % str(time.time() - s_b))
 
     def negate(self, influences=None):
@@ -354,6 +457,10 @@ class Weight(object):
         Returns:
 
         """
+        if self._matrix is not None:
+            self._matrix.negate(influences)
+            return
+
         weight_list = []
         if not influences:
             weight_list = self._data["deformerWeight"]["weights"]
@@ -370,6 +477,15 @@ class Weight(object):
         """removes the influence data from defined influences"""
         if isinstance(influences, str):
             influences = [influences]
+        if self._matrix is not None:
+            self._matrix.subtract(
+                influences,
+                weight_matrix.points_to_array(
+                    influence_data["points"], self._matrix.vertex_count
+                ),
+                clamp=clamp,
+            )
+            return
         # first convert the weights list of dictionaries data into a simpler dictionary
         # where the key is the vtx id and value is the value
         subtract_dict_data = self.__points_to_dict(influence_data["points"])
@@ -400,6 +516,16 @@ class Weight(object):
         #             point["value"] = max(min(point["value"], 1.0), 0.0)
         # return copy_data
 
+    def __get_m_array(self):
+        """Returns the weights as MDoubleArray to be applied with MFnSkincluster"""
+        if self._matrix is None:
+            return self.__convert_to_m_array(self._data)
+        # place the influence columns to their layers
+        layers = [
+            weights.get("layer") for weights in self._data["deformerWeight"]["weights"]
+        ]
+        return om.MDoubleArray(self._matrix.flatten(layers=layers))
+
     @staticmethod
     def __convert_to_m_array(json_data):
         """Converts the json data weights compatible to be applied with MFnSkincluster"""
@@ -556,47 +682,33 @@ class Weight(object):
     #     self.__set_blend_weights(skincluster, mesh, m_array)
     def _clamp_point_weights(self, constant_inf_data):
         """uses the constant_inf_data values as constant and removes the excess values from other influences"""
+        if self._matrix is not None:
+            indices, values = weight_matrix.points_to_arrays(
+                constant_inf_data["points"]
+            )
+            self._matrix.redistribute(indices, values)
+            return
+
         # convert all influence weights into dictionary right at the beginning (so only once per influence)
         inf_dict = {}
         for inf in self._data["deformerWeight"]["weights"]:
-            p_dict = self.__points_to_dict(inf["points"])
-            inf_dict[inf.get("source")] = p_dict
+            inf_dict[inf.get("source")] = self.__points_to_dict(inf["points"])
 
-        # get the list of vtx and remaining values
-        # reduction_dict = {} # dictionary of excess values that needs to be reduced from the other incluences
+        # single pass over the vertices. For each vertex, the excess value is removed
+        # from the influences starting from the most effective one
         for points_data in constant_inf_data["points"]:
             vtx_id = points_data["index"]
             excess_value = clamp(points_data["value"])
-            # excess_value = clamp((1 - points_data["value"]))
-            # reduction_dict[vtx_id] = excess_value
-            # build a dictionary for that vtx where keys are influences
             vtx_inf_dict = {}
             for inf_name, p_dict in inf_dict.items():
-                # p_dict = self.__points_to_dict(inf["points"])
-                value = p_dict.get(vtx_id, 0)  # get the value on the vtx id
-                vtx_inf_dict[inf_name] = value
-            #
-            impact_list = list(reversed(sorted(vtx_inf_dict, key=vtx_inf_dict.get)))
-            # print(impact_list)
+                vtx_inf_dict[inf_name] = p_dict.get(vtx_id, 0)
+            impact_list = reversed(sorted(vtx_inf_dict, key=vtx_inf_dict.get))
             for _inf in impact_list:
-                original_value = inf_dict[_inf].get(vtx_id, 0)
-                inf_dict[_inf].update({vtx_id: clamp(original_value - excess_value)})
+                original_value = vtx_inf_dict[_inf]
+                inf_dict[_inf][vtx_id] = clamp(original_value - excess_value)
                 excess_value = clamp(excess_value - original_value)
 
-            # # TODO maybe this speed it up a bit
-            # counter = 0
-            # while excess_value:
-            #     try:
-            #         _inf = impact_list[counter]
-            #     except IndexError:
-            #         break
-            #     original_value = inf_dict[_inf].get(vtx_id, 0)
-            #     inf_dict[_inf].update({vtx_id: clamp(original_value - excess_value)})
-            #     excess_value = clamp(excess_value - original_value)
-            #     counter += 1
-
-            # convert back to the maya JSON compatibility
-            for inf_data in self._data["deformerWeight"]["weights"]:
-                inf_name = inf_data.get("source")
-                reconverted_points_data = self.__dict_to_points(inf_dict[inf_name])
-                inf_data["points"] = reconverted_points_data
+        # convert back to the maya JSON compatibility only once
+        for inf_data in self._data["deformerWeight"]["weights"]:
+            inf_name = inf_data.get("source")
+            inf_data["points"] = self.__dict_to_points(inf_dict[inf_name])
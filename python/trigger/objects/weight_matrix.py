@@ -0,0 +1,305 @@
+"""Dense weight matrix engine for deformer weights.
+
+Keeps the weights of a single deformer as a (vertices x influences) float array
+and runs all the weight maths as vectorized operations on it. Conversion from
+and to the Maya ``deformerWeight`` JSON layout (list of ``{"index", "value"}``
+dictionaries per influence) only happens at the I/O edges.
+
+This module has no Maya dependency. It requires numpy, callers are expected to
+guard the import and fall back to the dictionary based code when it is missing.
+"""
+
+import numpy as np
+
+
+def points_to_array(points, size, dtype=np.float64):
+    """Convert deformerWeight point dictionaries to a dense array.
+
+    Args:
+        points: (list) List of {"index": int, "value": float} dictionaries
+        size: (int) Vertex count of the shape
+        dtype: (numpy.dtype) Data type of the returned array
+
+    Returns:
+        (numpy.ndarray) Dense array of weights. Missing points are zero.
+    """
+    array = np.zeros(size, dtype=dtype)
+    if points:
+        count = len(points)
+        indices = np.fromiter((p["index"] for p in points), dtype=np.intp, count=count)
+        values = np.fromiter((p["value"] for p in points), dtype=dtype, count=count)
+        array[indices] = values
+    return array
+
+
+def points_to_arrays(points):
+    """Convert deformerWeight point dictionaries to index and value arrays.
+
+    Args:
+        points: (list) List of {"index": int, "value": float} dictionaries
+
+    Returns:
+        (tuple) numpy index array and numpy value array
+    """
+    count = len(points)
+    indices = np.fromiter((p["index"] for p in points), dtype=np.intp, count=count)
+    values = np.fromiter((p["value"] for p in points), dtype=np.float64, count=count)
+    return indices, values
+
+
+def array_to_points(array, sparse=False):
+    """Convert a dense array back to deformerWeight point dictionaries.
+
+    Args:
+        array: (numpy.ndarray) Dense weight array
+        sparse: (bool) If True, zero weights are not written.
+
+    Returns:
+        (list) List of {"index": int, "value": float} dictionaries
+    """
+    if sparse:
+        indices = np.flatnonzero(array)
+    else:
+        indices = np.arange(array.shape[0])
+    return [
+        {"index": index, "value": value}
+        for index, value in zip(indices.tolist(), array[indices].tolist())
+    ]
+
+
+class WeightMatrix(object):
+    """(vertices x influences) weight matrix.
+
+    Columns are kept in the order of the influences list. A boolean mask of the
+    same shape keeps which points are stored in the (sparse) source data. Point
+    operations like negate only touch the stored points and only the stored
+    points are written back, the same as editing the point lists directly.
+    """
+
+    def __init__(
+        self, vertex_count, influences=None, values=None, dtype=np.float64, stored=None
+    ):
+        """Initialize.
+
+        Args:
+            vertex_count: (int) Vertex count of the shape
+            influences: (list) Influence names. One per column
+            values: (numpy.ndarray) Optional (vertex_count x len(influences)) array
+            dtype: (numpy.dtype) Data type of the matrix. float32 halves the memory
+            stored: (numpy.ndarray) Optional boolean mask of the stored points with
+                the same shape. All points are stored if None
+        """
+        super(WeightMatrix, self).__init__()
+        self.vertex_count = vertex_count
+        self.influences = list(influences or [])
+        self.dtype = dtype
+        if values is None:
+            values = np.zeros((vertex_count, len(self.influences)), dtype=dtype)
+        elif values.shape != (vertex_count, len(self.influences)):
+            raise ValueError(
+                "Matrix shape %s does not match %s vertices and %s influences"
+                % (values.shape, vertex_count, len(self.influences))
+            )
+        self.values = values
+        if stored is None:
+            stored = np.ones(values.shape, dtype=bool)
+        self.stored = stored
+
+    @classmethod
+    def from_deformer_weight(cls, data, dtype=np.float64):
+        """Create the matrix from deformerWeight formatted dictionary.
+
+        Args:
+            data: (dict) Dictionary matching cmds.deformerWeights JSON output
+            dtype: (numpy.dtype) Data type of the matrix
+
+        Returns:
+            (WeightMatrix)
+        """
+        vertex_count = data["deformerWeight"]["shapes"][0]["size"]
+        weights_list = data["deformerWeight"]["weights"]
+        return cls.from_arrays(
+            vertex_count,
+            [weights.get("source") for weights in weights_list],
+            [points_to_arrays(weights["points"]) for weights in weights_list],
+            dtype=dtype,
+        )
+
+    @classmethod
+    def from_arrays(cls, vertex_count, influences, arrays, dtype=np.float64):
+        """Create the matrix from sparse index and value arrays.
+
+        Args:
+            vertex_count: (int) Vertex count of the shape
+            influences: (list) Influence names
+            arrays: (list) (indices, values) array pair for each influence
+            dtype: (numpy.dtype) Data type of the matrix
+
+        Returns:
+            (WeightMatrix)
+        """
+        matrix = cls(
+            vertex_count,
+            influences,
+            dtype=dtype,
+            stored=np.zeros((vertex_count, len(influences)), dtype=bool),
+        )
+        for column, (indices, values) in enumerate(arrays):
+            matrix.values[indices, column] = values
+            matrix.stored[indices, column] = True
+        return matrix
+
+    def update_deformer_weight(self, data, sparse=False):
+        """Write the matrix values back into the deformerWeight dictionary in place.
+
+        Args:
+            data: (dict) Dictionary matching cmds.deformerWeights JSON output
+            sparse: (bool) If True, zero weights are not written.
+        """
+        for weights in data["deformerWeight"]["weights"]:
+            weights["points"] = self.to_points(weights.get("source"), sparse=sparse)
+
+    def column_index(self, influence):
+        """Return the column index of the influence."""
+        try:
+            return self.influences.index(influence)
+        except ValueError:
+            raise KeyError("Influence %s is not in the weight matrix" % influence)
+
+    def get_column(self, influence):
+        """Return the weights of the influence as a (view) array."""
+        return self.values[:, self.column_index(influence)]
+
+    def set_column(self, influence, values):
+        """Set the weights of the influence. Adds a new column if it doesn't exist."""
+        if influence not in self.influences:
+            self.add_influence(influence, values)
+        else:
+            self.values[:, self.column_index(influence)] = values
+
+    def to_points(self, influence, sparse=False):
+        """Return the stored weights of the influence as deformerWeight points.
+
+        Args:
+            influence: (str) Name of the influence
+            sparse: (bool) If True, zero weights are not written.
+        """
+        column = self.column_index(influence)
+        values = self.values[:, column]
+        mask = self.stored[:, column]
+        if sparse:
+            mask = mask & (values != 0)
+        indices = np.flatnonzero(mask)
+        return [
+            {"index": index, "value": value}
+            for index, value in zip(indices.tolist(), values[indices].tolist())
+        ]
+
+    def add_influence(self, influence, values=None, stored=None):
+        """Add a new influence column.
+
+        Args:
+            influence: (str) Name of the influence
+            values: (numpy.ndarray) Weights of the influence. Zeros if None
+            stored: (numpy.ndarray) Indices of the stored points. All if None
+        """
+        if influence in self.influences:
+            raise KeyError("Influence %s is already in the weight matrix" % influence)
+        column = np.zeros((self.vertex_count, 1), dtype=self.dtype)
+        if values is not None:
+            column[:, 0] = values
+        if stored is None:
+            stored_column = np.ones((self.vertex_count, 1), dtype=bool)
+        else:
+            stored_column = np.zeros((self.vertex_count, 1), dtype=bool)
+            stored_column[stored, 0] = True
+        self.values = np.hstack((self.values, column))
+        self.stored = np.hstack((self.stored, stored_column))
+        self.influences.append(influence)
+
+    def remove_influence(self, influence):
+        """Remove the influence column."""
+        column = self.column_index(influence)
+        self.values = np.delete(self.values, column, axis=1)
+        self.stored = np.delete(self.stored, column, axis=1)
+        self.influences.pop(column)
+
+    def _columns(self, influences=None):
+        """Return column indices for the given influences. All columns if None."""
+        if not influences:
+            return list(range(len(self.influences)))
+        return [self.column_index(influence) for influence in influences]
+
+    def negate(self, influences=None):
+        """Negate the stored weights of given influences. Negates all if None."""
+        columns = self._columns(influences)
+        values = self.values[:, columns]
+        self.values[:, columns] = np.where(
+            self.stored[:, columns], 1.0 - values, values
+        )
+
+    def subtract(self, influences, values, clamp=True):
+        """Subtract the values array from the stored weights of the given influences.
+
+        Args:
+            influences: (list) Influence names
+            values: (numpy.ndarray) Dense array of weights to subtract
+            clamp: (bool) Clamps the results between 0 and 1
+        """
+        columns = self._columns(influences)
+        result = self.values[:, columns] - np.asarray(values, dtype=self.dtype)[:, None]
+        if clamp:
+            np.clip(result, 0.0, 1.0, out=result)
+        self.values[:, columns] = np.where(
+            self.stored[:, columns], result, self.values[:, columns]
+        )
+
+    def redistribute(self, indices, values):
+        """Make room for a constant weight by reducing the other influences.
+
+        For each vertex, the (clamped) constant value is removed from the existing
+        influences starting from the most effective one, until it is consumed.
+
+        Args:
+            indices: (numpy.ndarray) Vertex indices of the constant weights
+            values: (numpy.ndarray) Constant weight values
+        """
+        if not len(indices) or not self.influences:
+            return
+        excess = np.clip(np.asarray(values, dtype=self.dtype), 0.0, 1.0)
+        rows = self.values[indices]
+        # Most effective influence first. Ties are resolved with the last column first
+        order = np.argsort(rows, axis=1, kind="stable")[:, ::-1]
+        sorted_rows = np.take_along_axis(rows, order, axis=1)
+        for column in range(sorted_rows.shape[1]):
+            if not excess.any():
+                # nothing left to remove. Rest of the influences are only clamped
+                np.clip(sorted_rows[:, column:], 0.0, 1.0, out=sorted_rows[:, column:])
+                break
+            original = sorted_rows[:, column].copy()
+            sorted_rows[:, column] = np.clip(original - excess, 0.0, 1.0)
+            excess = np.clip(excess - original, 0.0, 1.0)
+        np.put_along_axis(rows, order, sorted_rows, axis=1)
+        self.values[indices] = rows
+        # every influence gets a point for the clamped vertices
+        self.stored[indices] = True
+
+    def flatten(self, layers=None):
+        """Return the weights as flat list ordered vertex by vertex.
+
+        If there are 3 influences (jnt1, jnt2, jnt3):
+         Vertex ID         vtx0   vtx1   vtx2   .....
+         Flat list         | | |  | | |  | | |  .....
+         Influence (Layer) 1 2 3  1 2 3  1 2 3  .....
+
+        Args:
+            layers: (list) Target position of each column. Column order if None
+
+        Returns:
+            (list) Flat list of floats compatible with MFnSkinCluster.setWeights
+        """
+        if layers is None:
+            return self.values.ravel().tolist()
+        ordered = np.zeros_like(self.values)
+        ordered[:, layers] = self.values
+        return ordered.ravel().tolist()
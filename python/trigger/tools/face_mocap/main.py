@@ -19,14 +19,18 @@ handler.import_livelinkface_package(test_path)
 import os
 import glob
 import csv
+import itertools
 import json
 import logging
 from pathlib import Path
 
+import numpy as np
+
 from trigger.ui.Qt import QtWidgets
 
 
 from maya import cmds, mel
+from maya.api import OpenMaya, OpenMayaAnim
 
 # import the decode package from the same directory
 from .decode import extract_wav, extract_jpg
@@ -37,6 +41,121 @@ from trigger.core.decorators import tracktime
 LOG = logging.getLogger(__name__)
 
 
+def _is_number(value):
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def iter_csv_columns(csv_file, columns=None, chunk_size=4096):
+    """Read the csv file in chunks of rows, keeping only the given columns.
+
+    Memory use depends on the chunk size and the number of columns, not on the
+    length of the capture.
+
+    Args:
+        csv_file (str): Path to the csv file.
+        columns (list): Column names to keep. Case insensitive. If None, all
+            the numeric columns are kept.
+        chunk_size (int): Number of rows in each chunk.
+
+    Yields:
+        tuple: (row count, {lowercase column name: numpy array}) for each chunk.
+            The row count is given even if no columns are kept.
+    """
+    with open(csv_file, "r", newline="") as f_p:
+        reader = csv.reader(f_p)
+        header = [name.lower() for name in next(reader)]
+        rows = (row for row in reader if row)
+        first_chunk = list(itertools.islice(rows, chunk_size))
+        if columns is None:
+            first_row = first_chunk[0] if first_chunk else header
+            columns = [x for x, v in zip(header, first_row) if _is_number(v)]
+        columns = [x.lower() for x in columns]
+        missing = [x for x in columns if x not in header]
+        if missing:
+            LOG.error("Columns cannot be found in %s => %s", csv_file, missing)
+            raise ValueError("Missing columns: %s" % missing)
+        indices = [header.index(x) for x in columns]
+        chunk = first_chunk
+        while chunk:
+            yield len(chunk), {
+                name: np.array([row[index] for row in chunk], dtype=float)
+                for name, index in zip(columns, indices)
+            }
+            chunk = list(itertools.islice(rows, chunk_size))
+
+
+def _to_internal_units(curve_fn, values):
+    """Convert the ui unit values to the internal units of the curve."""
+    curve_type = curve_fn.animCurveType
+    if curve_type in (
+        OpenMayaAnim.MFnAnimCurve.kAnimCurveTA,
+        OpenMayaAnim.MFnAnimCurve.kAnimCurveUA,
+    ):
+        unit = OpenMaya.MAngle.uiUnit()
+        return [OpenMaya.MAngle(x, unit).asRadians() for x in values]
+    if curve_type in (
+        OpenMayaAnim.MFnAnimCurve.kAnimCurveTL,
+        OpenMayaAnim.MFnAnimCurve.kAnimCurveUL,
+    ):
+        unit = OpenMaya.MDistance.uiUnit()
+        return [OpenMaya.MDistance(x, unit).asCentimeters() for x in values]
+    return [float(x) for x in values]
+
+
+def set_keys(node, attribute, times, values, animlayer=None):
+    """Key the attribute on all the given frames at once.
+
+    The first key is set with setKeyframe, which creates the anim curve (on the
+    animation layer if defined) and the rest is added to that curve in one call.
+    Keys are not undoable.
+
+    Args:
+        node (str): Node to key.
+        attribute (str): Attribute to key.
+        times (list): Frames.
+        values (list): Values in the ui units.
+        animlayer (str): Animation layer of the keys. Optional.
+    """
+    if not len(times):
+        return
+    layer_flags = {"animLayer": animlayer} if animlayer else {}
+    cmds.setKeyframe(
+        node,
+        attribute=attribute,
+        time=float(times[0]),
+        value=float(values[0]),
+        **layer_flags
+    )
+    plug = "{}.{}".format(node, attribute)
+    if animlayer:
+        curves = cmds.animLayer(animlayer, query=True, findCurveForPlug=plug)
+    else:
+        curves = cmds.keyframe(plug, query=True, name=True)
+    if len(times) == 1:
+        return
+    selection_list = OpenMaya.MSelectionList()
+    selection_list.add(curves[0])
+    curve_fn = OpenMayaAnim.MFnAnimCurve(selection_list.getDependNode(0))
+    time_unit = OpenMaya.MTime.uiUnit()
+    key_times = [OpenMaya.MTime(float(x), time_unit) for x in times[1:]]
+    key_values = _to_internal_units(curve_fn, values[1:])
+    # keys are appended after the existing ones, e.g. continuing the previous chunk
+    if curve_fn.input(curve_fn.numKeys - 1) < key_times[0]:
+        curve_fn.addKeys(key_times, key_values, keepExistingKeys=True)
+        return
+    # keys overlap the existing ones. Replace the ones on the same frames
+    for key_time, key_value in zip(key_times, key_values):
+        index = curve_fn.find(key_time)
+        if index is None:
+            curve_fn.addKey(key_time, key_value)
+        else:
+            curve_fn.setValue(index, key_value)
+
+
 class FaceMocap:
     """Mocap handler for importing motion capture data from json and csv files."""
 
@@ -207,32 +326,37 @@ class FaceMocap:
         # if not self._controller or not cmds.objExists(self._controller):
         #     raise ValueError("Controller not defined or doesn't exist.")
 
-        live_link_face_data = list(csv.DictReader(open(csv_file)))
-
         if set_fps:
             self.set_scene_fps(fps)
 
-        frame_range = [
-            self.start_frame,
-            self.start_frame + len(live_link_face_data),
-        ]
-
-        if set_ranges:
-            self.set_ranges(
-                [frame_range[0], frame_range[0], frame_range[1], frame_range[1]]
-            )
-
-        cmds.currentTime(frame_range[0])
+        cmds.currentTime(self.start_frame)
 
         # create the animlayers for the lower and upper face
         lower_face_layer = cmds.animLayer("livelink_lowerFace")
         upper_face_layer = cmds.animLayer("livelink_upperFace")
         key_object = self._controller if self.bake_on_controllers else self._livelink_mocap_layer
+        layer_mappings = [
+            (upper_face_layer, self.upper_face_mappings),
+            (lower_face_layer, self.lower_face_mappings),
+        ]
 
         # self.set_static_keys([lower_face_layer, upper_face_layer])
 
-        self.__apply_livelinkface_data(key_object, self.upper_face_mappings, live_link_face_data, upper_face_layer, frame_range[0], baked=self.bake_on_controllers)
-        self.__apply_livelinkface_data(key_object, self.lower_face_mappings, live_link_face_data, lower_face_layer, frame_range[0], baked=self.bake_on_controllers)
+        # only the mapped columns are read. Keys are written chunk by chunk
+        columns = sorted({key.lower() for _, mappings in layer_mappings for key in mappings})
+        for layer, mappings in layer_mappings:
+            self.__prepare_livelinkface_layer(key_object, mappings, layer, baked=self.bake_on_controllers)
+        frame_count = 0
+        for row_count, chunk in iter_csv_columns(csv_file, columns):
+            for layer, mappings in layer_mappings:
+                self.__apply_livelinkface_data(key_object, mappings, chunk, layer, self.start_frame + frame_count, baked=self.bake_on_controllers)
+            frame_count += row_count
+
+        if set_ranges:
+            frame_range = [self.start_frame, self.start_frame + frame_count]
+            self.set_ranges(
+                [frame_range[0], frame_range[0], frame_range[1], frame_range[1]]
+            )
 
         # create a neutralize layer if the neutralize frame is set
         if self._enable_neutralize:
@@ -242,8 +366,8 @@ class FaceMocap:
 
 
     @staticmethod
-    def __apply_livelinkface_data(controller, trigger_mappings, livelinkface_data, animlayer, start_frame, baked=True):
-        """Apply the livelinkface data to the controller."""
+    def __prepare_livelinkface_layer(controller, trigger_mappings, animlayer, baked=True):
+        """Add the mapped attributes to the animation layer."""
         for key, data in trigger_mappings.items():
             for dest_attr_pack in data:
                 attr = dest_attr_pack[0]
@@ -251,16 +375,22 @@ class FaceMocap:
                 if not baked:
                     mult_attr = f"{dest_attr_pack[0]}_multiplier"
                     cmds.setAttr(f"{controller}.{mult_attr}", dest_attr_pack[3])
-        for frame, row_dict in enumerate(livelinkface_data):
-            incase_sensitive_row_dict = {_key.lower(): _val for _key,_val in row_dict.items()}
-            for key, data in trigger_mappings.items():
-                for dest_attr_pack in data:
-                    mult = dest_attr_pack[3] if not baked else 1.0
-                    attr = dest_attr_pack[0]
-                    livelink_value = float(incase_sensitive_row_dict[key.lower()])
-                    mapped_value = float(dest_attr_pack[1] + (dest_attr_pack[2] - dest_attr_pack[1])) * livelink_value * mult
-                    cmds.setKeyframe(controller, value=mapped_value, attribute=attr, time=frame + start_frame,
-                                     animLayer=animlayer)
+
+    @staticmethod
+    def __apply_livelinkface_data(controller, trigger_mappings, livelinkface_data, animlayer, start_frame, baked=True):
+        """Apply the livelinkface data to the controller.
+
+        Args:
+            livelinkface_data (dict): {lowercase column name: numpy array}
+        """
+        for key, data in trigger_mappings.items():
+            livelink_values = livelinkface_data[key.lower()]
+            times = np.arange(len(livelink_values)) + start_frame
+            for dest_attr_pack in data:
+                attr = dest_attr_pack[0]
+                mult = dest_attr_pack[3] if not baked else 1.0
+                mapped_values = float(dest_attr_pack[1] + (dest_attr_pack[2] - dest_attr_pack[1])) * livelink_values * mult
+                set_keys(controller, attr, times, mapped_values, animlayer=animlayer)
 
     def validations(self, file_path):
         """Run some validations before starting and return the result."""
@@ -344,6 +474,11 @@ class FaceMocap:
     @staticmethod
     def __apply_a2f_data(controller, trigger_mappings, audio_2_face_data, animlayer, start_frame, baked=True):
         """Apply the audio2face data to the controller."""
+        # frames x facs
+        weights = np.asarray(audio_2_face_data["weightMat"], dtype=float).reshape(
+            -1, len(audio_2_face_data["facsNames"])
+        )
+        times = np.arange(len(weights)) + start_frame
         for key, data in trigger_mappings.items():
             id = audio_2_face_data["facsNames"].index(key)
             for dest_attr_pack in data:
@@ -355,10 +490,8 @@ class FaceMocap:
                     mult = 1.0
                 else:
                     mult = dest_attr_pack[3]
-                for frame, value_list in enumerate(audio_2_face_data["weightMat"]):
-                    mapped_value = dest_attr_pack[1] + (dest_attr_pack[2] - dest_attr_pack[1]) * value_list[id] * mult
-                    cmds.setKeyframe(controller, value=mapped_value, attribute=attr, time=frame + start_frame,
-                                     animLayer=animlayer)
+                mapped_values = dest_attr_pack[1] + (dest_attr_pack[2] - dest_attr_pack[1]) * weights[:, id] * mult
+                set_keys(controller, attr, times, mapped_values, animlayer=animlayer)
 
     @staticmethod
     def __neutralize(controller, neutralize_frame, mapping_datas, neutralize_layer):
@@ -571,3 +571,12 @@ class ProgressListWidget(QtWidgets.QListWidget):
         item = self.item(row)
         if item:
             item.setIcon(QtGui.QIcon(icon_path))
+
+    def checkpointItem(self, row, state=True):
+        """Marks the item as a checkpoint with an underline"""
+        item = self.item(row)
+        if item:
+            font = item.font()
+            font.setUnderline(state)
+            item.setFont(font)
+            item.setToolTip("Checkpoint" if state else "")
@@ -16,6 +16,7 @@ from trigger.ui import custom_widgets
 from trigger.ui import feedback
 
 from trigger.base import session
+from trigger.base import guide_index
 from trigger.base import actions_session
 
 from trigger.library import naming
@@ -135,6 +136,12 @@ class MainUI(QtWidgets.QMainWindow):
         # create guide and rig objects
         self.actions_handler = actions_session.ActionsSession()
         self.guides_handler = session.Session()
+        # guide roots are tracked with callbacks instead of scanning the scene
+        self._guide_items = {}
+        self._is_guide_update_scheduled = False
+        self.guide_index = guide_index.GuideRootIndex(self.guides_handler.init)
+        self.guide_index.listeners.append(self.schedule_guide_update)
+        self.guide_index.start()
 
         self.actions_handler.reset_actions()
 
@@ -187,7 +194,7 @@ class MainUI(QtWidgets.QMainWindow):
 
         # self.callbackIDList = _createCallbacks(self.force_update, WINDOW_NAME, "SelectionChanged")
         self.callbackIDList = _create_callbacks(
-            self.force_update, parent=None, event="SelectionChanged"
+            self.on_scene_selection, parent=None, event="SelectionChanged"
         )
 
         # force open the trigger session on initialization if a session found
@@ -250,14 +257,17 @@ class MainUI(QtWidgets.QMainWindow):
             if r == "yes":
                 self.save_trigger()
                 _kill_callbacks(self.callbackIDList)
+                self.guide_index.stop()
                 event.accept()
             elif r == "no":
                 _kill_callbacks(self.callbackIDList)
+                self.guide_index.stop()
                 event.accept()
             else:
                 event.ignore()
         else:
             _kill_callbacks(self.callbackIDList)
+            self.guide_index.stop()
             event.accept()
 
     def build_bars_ui(self):
@@ -787,6 +797,14 @@ class MainUI(QtWidgets.QMainWindow):
         self.build_pb = QtWidgets.QPushButton(self.rigging_tab, text="Build Rig")
         self.rig_buttons_hLay.addWidget(self.build_pb)
 
+        self.incremental_build_pb = QtWidgets.QPushButton(
+            self.rigging_tab, text="Incremental Build"
+        )
+        self.incremental_build_pb.setToolTip(
+            "Resumes from the last valid checkpoint and saves the scene after the checkpoint actions"
+        )
+        self.rig_buttons_hLay.addWidget(self.incremental_build_pb)
+
         self.build_and_publish_pb = QtWidgets.QPushButton(
             self.rigging_tab, text="Build && Publish"
         )
@@ -829,6 +847,9 @@ class MainUI(QtWidgets.QMainWindow):
         self.action_rc_toggle = QtWidgets.QAction("Toggle Disable/Enable", self)
         pop_menu_rig_action.addAction(self.action_rc_toggle)
 
+        self.action_rc_checkpoint = QtWidgets.QAction("Toggle Checkpoint", self)
+        pop_menu_rig_action.addAction(self.action_rc_checkpoint)
+
         ### SHORTCUTS ###
         shortcutRefresh = QtWidgets.QShortcut(
             QtGui.QKeySequence("F5"), self, self.refresh
@@ -839,6 +860,7 @@ class MainUI(QtWidgets.QMainWindow):
         self.action_rc_rename.triggered.connect(self.on_action_rename)
         self.action_rc_dup.triggered.connect(self.on_action_duplicate)
         self.action_rc_toggle.triggered.connect(self.on_action_toggle)
+        self.action_rc_checkpoint.triggered.connect(self.on_action_checkpoint)
         self.action_rc_delete.triggered.connect(self.delete_action)
 
         self.action_rc_run.triggered.connect(self.on_run_action)
@@ -855,6 +877,7 @@ class MainUI(QtWidgets.QMainWindow):
         self.action_info_pb.clicked.connect(self.on_action_info)
 
         self.build_pb.clicked.connect(self.on_build_rig)
+        self.incremental_build_pb.clicked.connect(self.on_incremental_build)
         self.build_and_publish_pb.clicked.connect(self.on_build_and_publish)
         self.rig_actions_listwidget.doubleClicked.connect(self.on_run_action)
         # TODO: Make a seperate method for running run actions wih progressbar
@@ -944,6 +967,12 @@ class MainUI(QtWidgets.QMainWindow):
             self.actions_handler.enable_action(action_name)
         self.populate_actions()
 
+    def on_action_checkpoint(self):
+        action_name = self.rig_actions_listwidget.currentItem().text()
+        is_checkpoint = self.actions_handler.is_checkpoint(action_name)
+        self.actions_handler.set_checkpoint(action_name, not is_checkpoint)
+        self.populate_actions()
+
     def on_run_action(self):
         action_name = self.rig_actions_listwidget.currentItem().text()
         # self.populate_actions()
@@ -964,6 +993,21 @@ class MainUI(QtWidgets.QMainWindow):
         else:
             return
 
+    def on_incremental_build(self):
+        if not self.actions_handler.session_path:
+            self.feedback.pop_info(
+                title="Session not saved",
+                text="Incremental builds need a saved session",
+                critical=True,
+            )
+            return
+        msg = "The current scene will be REPLACED with the last valid checkpoint and the rest of the actions will run in order\n\nYou will lose any unsaved work in your scene!\nDo you want to continue?"
+        state = self.feedback.pop_question(
+            title="Confirmation", text=msg, buttons=["yes", "no"]
+        )
+        if state == "yes":
+            self.actions_handler.run_all_actions(incremental=True)
+
     def on_build_and_publish(self):
         """Publish the rig.
         This will work only if there is an active version control system."""
@@ -1157,6 +1201,8 @@ class MainUI(QtWidgets.QMainWindow):
                 self.rig_actions_listwidget.enableItem(row)
             else:
                 self.rig_actions_listwidget.disableItem(row)
+            if self.actions_handler.is_checkpoint(action_name):
+                self.rig_actions_listwidget.checkpointItem(row)
 
         self.update_title()
 
@@ -1236,37 +1282,96 @@ class MainUI(QtWidgets.QMainWindow):
     def populate_guides(self):
         self.block_all_signals(True)
 
-        if self.guides_list_treeWidget.currentItem():
-            selected_root_jnt = self.guides_list_treeWidget.currentItem().text(2)
-        else:
-            selected_root_jnt = None
-
+        selected_key = self._get_current_guide_key()
+        self.guide_index.update()
         self.guides_list_treeWidget.clear()
-        roots_dict_list = self.guides_handler.init.get_scene_roots()
-        for item in roots_dict_list:
-            if item["side"] == "C":
-                color = QtGui.QColor(255, 255, 0, 255)
-            elif item["side"] == "L":
-                color = QtGui.QColor(0, 100, 255, 255)
-            else:
-                color = QtGui.QColor(255, 100, 0, 255)
-            tree_item = QtWidgets.QTreeWidgetItem(
-                self.guides_list_treeWidget,
-                [
-                    item["module_name"],
-                    item["side"],
-                    item["root_joint"],
-                    item["module_type"],
-                ],
-            )
-            if item["root_joint"] == selected_root_jnt:
+        self._guide_items = {}
+        for key, item in self.guide_index.roots.items():
+            tree_item = self._create_guide_item(key, item)
+            if key == selected_key:
                 self.guides_list_treeWidget.setCurrentItem(tree_item)
-            tree_item.setForeground(0, color)
 
         self.populate_properties()
 
         self.block_all_signals(False)
 
+    def _get_current_guide_key(self):
+        current_item = self.guides_list_treeWidget.currentItem()
+        if not current_item:
+            return None
+        for key, tree_item in self._guide_items.items():
+            if tree_item is current_item:
+                return key
+        return None
+
+    def _create_guide_item(self, key, item):
+        tree_item = QtWidgets.QTreeWidgetItem(self.guides_list_treeWidget)
+        self._update_guide_item(tree_item, item)
+        self._guide_items[key] = tree_item
+        return tree_item
+
+    @staticmethod
+    def _update_guide_item(tree_item, item):
+        if item["side"] == "C":
+            color = QtGui.QColor(255, 255, 0, 255)
+        elif item["side"] == "L":
+            color = QtGui.QColor(0, 100, 255, 255)
+        else:
+            color = QtGui.QColor(255, 100, 0, 255)
+        for column, value in enumerate(
+            [item["module_name"], item["side"], item["root_joint"], item["module_type"]]
+        ):
+            tree_item.setText(column, value)
+        tree_item.setForeground(0, color)
+
+    def schedule_guide_update(self):
+        """Update the guides list once the current Maya operation is completed"""
+        if not self._is_guide_update_scheduled:
+            self._is_guide_update_scheduled = True
+            QtCore.QTimer.singleShot(0, self.update_guides)
+
+    def update_guides(self):
+        """Apply only the changed guide roots to the guides list"""
+        self._is_guide_update_scheduled = False
+        if not self.guide_index.is_dirty:
+            return
+        changes = self.guide_index.update()
+        if changes["reset"]:
+            self.populate_guides()
+            return
+        self.block_all_signals(True)
+        current_key = self._get_current_guide_key()
+        for key, item in changes["removed"]:
+            tree_item = self._guide_items.pop(key)
+            self.guides_list_treeWidget.takeTopLevelItem(
+                self.guides_list_treeWidget.indexOfTopLevelItem(tree_item)
+            )
+        for key, item in changes["added"]:
+            self._create_guide_item(key, item)
+        for key, item in changes["changed"]:
+            self._update_guide_item(self._guide_items[key], item)
+        affected_keys = [key for key, _ in changes["removed"] + changes["changed"]]
+        if current_key in affected_keys:
+            if current_key not in self._guide_items:
+                self.guides_list_treeWidget.setCurrentItem(None)
+            self.populate_properties()
+        self.block_all_signals(False)
+
+    def on_scene_selection(self):
+        """Highlight the guide of the selected root joint"""
+        if self.guide_index.is_dirty:
+            self.update_guides()
+        selection = cmds.ls(sl=True, type="joint")
+        if not selection:
+            return
+        key = self.guide_index.find(selection[-1])
+        if key is None or key == self._get_current_guide_key():
+            return
+        self.block_all_signals(True)
+        self.guides_list_treeWidget.setCurrentItem(self._guide_items[key])
+        self.populate_properties()
+        self.block_all_signals(False)
+
     def populate_properties(self):
         self.block_all_signals(True)
 
@@ -1414,6 +1519,7 @@ class MainUI(QtWidgets.QMainWindow):
         self.populate_properties()
 
     def force_update(self):
+        self.guide_index.rebuild()
         self.populate_guides()
 
     def clearLayout(self, layout):
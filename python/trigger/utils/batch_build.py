@@ -0,0 +1,366 @@
+"""Headless batch builder for trigger sessions.
+
+Builds each .tr session in its own mayapy process, running a number of them in
+parallel, and writes a summary of the results.
+
+Usage:
+    mayapy -m trigger.utils.batch_build "/assets/*/rig/*.tr" --workers 4 \\
+        --output /tmp/nightly
+
+The output folder contains one log and one result file per session together with
+summary.json and summary.csv. The exit code is 1 if any of the builds failed.
+"""
+import os
+import sys
+import csv
+import glob
+import time
+import logging
+import argparse
+import datetime
+import subprocess
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from trigger.core import filelog
+from trigger.core import io
+
+SUMMARY_FIELDS = ["asset", "session", "status", "duration", "error", "log"]
+TRIGGER_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def find_mayapy():
+    """Return the mayapy of MAYA_LOCATION. Current interpreter if it is not defined."""
+    maya_location = os.environ.get("MAYA_LOCATION")
+    if maya_location:
+        executable = "mayapy.exe" if sys.platform == "win32" else "mayapy"
+        mayapy = os.path.join(maya_location, "bin", executable)
+        if os.path.isfile(mayapy):
+            return mayapy
+    return sys.executable
+
+
+def collect_sessions(patterns):
+    """Return the unique .tr files matching the given paths or glob patterns."""
+    sessions = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            match = os.path.abspath(match)
+            if os.path.splitext(match)[1] != ".tr" or not os.path.isfile(match):
+                continue
+            if match not in sessions:
+                sessions.append(match)
+    return sessions
+
+
+def get_asset_names(sessions):
+    """Return a unique name for each session to name the output files.
+
+    Sessions with the same file name are prefixed with the nearest parent folder
+    telling them apart. e.g. /assets/hero/rig/rig.tr => hero_rig
+    """
+    groups = {}
+    for session in sessions:
+        base_name = os.path.splitext(os.path.basename(session))[0]
+        groups.setdefault(base_name, []).append(session)
+
+    names = []
+    for session in sessions:
+        base_name = os.path.splitext(os.path.basename(session))[0]
+        group = groups[base_name]
+        name = base_name
+        if len(group) > 1:
+            folders = [os.path.dirname(x).replace("\\", "/").split("/") for x in group]
+            for depth in range(1, max(len(x) for x in folders) + 1):
+                parents = [x[-depth] if depth <= len(x) else "" for x in folders]
+                if len(set(parents)) == len(parents):
+                    name = "%s_%s" % (parents[group.index(session)], base_name)
+                    break
+        unique_name = name
+        counter = 1
+        while unique_name in names:
+            unique_name = "%s_%i" % (name, counter)
+            counter += 1
+        names.append(unique_name)
+    return names
+
+
+def build_session(
+    session_path, result_path, save_path=None, incremental=False, profile=False
+):
+    """Build the session in the current (mayapy) process and write the result.
+
+    Args:
+        session_path: (String) Path of the .tr file
+        result_path: (String) Path of the .json file for the result
+        save_path: (String) Saves the built scene as a Maya binary if defined
+        incremental: (Bool) Resumes from the checkpoints of the session
+        profile: (Bool) Captures cProfile data for each action
+
+    Returns:
+        (Bool) True if the build is successful
+    """
+    result = {"session": session_path, "status": "failed", "error": "", "actions": []}
+    start = time.time()
+    session = None
+    # trigger logs go to the output of the worker as well. It is kept per session
+    logging.getLogger(filelog.__name__).addHandler(logging.StreamHandler(sys.stdout))
+    try:
+        import maya.standalone
+
+        maya.standalone.initialize(name="python")
+        from maya import cmds
+        from trigger.base import actions_session
+
+        session = actions_session.ActionsSession()
+        session.load_session(session_path)
+        session.run_all_actions(incremental=incremental, profile=profile)
+        if save_path:
+            cmds.file(rename=save_path)
+            cmds.file(save=True, type="mayaBinary", force=True)
+        result["status"] = "success"
+    except Exception:
+        result["error"] = traceback.format_exc()
+        sys.stderr.write(result["error"])
+    finally:
+        if session is not None:
+            result["actions"] = session.profiler.report()["actions"]
+        result["duration"] = time.time() - start
+        io.IO(file_path=result_path).write(result)
+        filelog.flush_all()
+    return result["status"] == "success"
+
+
+class BatchBuild(object):
+    """Runs the builds of many sessions in parallel worker processes."""
+
+    def __init__(
+        self,
+        sessions,
+        output_folder,
+        workers=2,
+        mayapy=None,
+        timeout=None,
+        save_scenes=False,
+        incremental=False,
+        profile=False,
+    ):
+        """Initialize.
+
+        Args:
+            sessions: (List) Paths of the .tr files
+            output_folder: (String) Folder for the logs, results and the summary
+            workers: (Int) Number of builds running at the same time
+            mayapy: (String) Python executable of Maya. Uses find_mayapy() if None
+            timeout: (Float) Seconds before a build is killed. No limit if None
+            save_scenes: (Bool) Saves the built scenes into the output folder
+            incremental: (Bool) Resumes from the checkpoints of the sessions
+            profile: (Bool) Captures cProfile data for each action
+        """
+        super(BatchBuild, self).__init__()
+        self.sessions = sessions
+        self.output_folder = output_folder
+        self.workers = max(1, workers)
+        self.mayapy = mayapy or find_mayapy()
+        self.timeout = timeout
+        self.save_scenes = save_scenes
+        self.incremental = incremental
+        self.profile = profile
+        self.results = []
+
+    def _get_command(self, session_path, result_path, save_path):
+        command = [
+            self.mayapy,
+            "-m",
+            "trigger.utils.batch_build",
+            "--worker",
+            session_path,
+            "--result",
+            result_path,
+        ]
+        if save_path:
+            command.extend(["--save", save_path])
+        if self.incremental:
+            command.append("--incremental")
+        if self.profile:
+            command.append("--profile")
+        return command
+
+    def _run_worker(self, asset_name, session_path):
+        """Build a single session in a new process and return its summary row."""
+        log_path = os.path.join(self.output_folder, "%s.log" % asset_name)
+        result_path = os.path.join(self.output_folder, "%s_result.json" % asset_name)
+        save_path = None
+        if self.save_scenes:
+            save_path = os.path.join(self.output_folder, "%s.mb" % asset_name)
+        if os.path.isfile(result_path):
+            os.remove(result_path)
+
+        env = os.environ.copy()
+        env["PYTHONPATH"] = os.pathsep.join(
+            [TRIGGER_ROOT] + [x for x in [env.get("PYTHONPATH")] if x]
+        )
+        row = {
+            "asset": asset_name,
+            "session": session_path,
+            "log": log_path,
+            "error": "",
+        }
+        start = time.time()
+        with open(log_path, "w") as log_file:
+            process = subprocess.Popen(
+                self._get_command(session_path, result_path, save_path),
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                env=env,
+            )
+            try:
+                process.wait(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                row["error"] = "Timed out after %s seconds" % self.timeout
+        row["duration"] = time.time() - start
+
+        result = io.IO(file_path=result_path).read()
+        if result:
+            row["status"] = result["status"]
+            row["error"] = result["error"].strip().split("\n")[-1]
+            row["actions"] = result["actions"]
+        else:
+            row["status"] = "failed"
+            row["error"] = (
+                row["error"] or "Worker exited with code %s" % process.returncode
+            )
+        return row
+
+    def run(self):
+        """Build all sessions and write the summary.
+
+        Returns:
+            (List) Summary rows of the sessions in the given order
+        """
+        io.IO.folder_check(self.output_folder)
+        names = get_asset_names(self.sessions)
+        rows = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(self._run_worker, name, session): name
+                for name, session in zip(names, self.sessions)
+            }
+            for future in as_completed(futures):
+                row = future.result()
+                rows[futures[future]] = row
+                print(
+                    "[%i/%i] %s: %s (%.1fs)"
+                    % (
+                        len(rows),
+                        len(names),
+                        row["asset"],
+                        row["status"],
+                        row["duration"],
+                    )
+                )
+        self.results = [rows[name] for name in names]
+        self.write_summary()
+        return self.results
+
+    def write_summary(self):
+        """Write summary.json and summary.csv into the output folder."""
+        succeeded = len([x for x in self.results if x["status"] == "success"])
+        summary = {
+            "date": datetime.datetime.now().isoformat(),
+            "workers": self.workers,
+            "succeeded": succeeded,
+            "failed": len(self.results) - succeeded,
+            "total_duration": sum(x["duration"] for x in self.results),
+            "assets": self.results,
+        }
+        summary_path = os.path.join(self.output_folder, "summary.json")
+        io.IO(file_path=summary_path, compact=False).write(summary)
+        with open(os.path.join(self.output_folder, "summary.csv"), "w") as f:
+            writer = csv.DictWriter(
+                f, fieldnames=SUMMARY_FIELDS, extrasaction="ignore", lineterminator="\n"
+            )
+            writer.writeheader()
+            for row in self.results:
+                writer.writerow(row)
+        return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="trigger.utils.batch_build",
+        description="Build trigger sessions in parallel mayapy processes",
+    )
+    parser.add_argument("sessions", nargs="+", help=".tr files or glob patterns")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=2, help="Number of parallel builds"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="Output folder. Defaults to trigger_batch_<date> in the current folder",
+    )
+    parser.add_argument("--mayapy", default=None, help="Path of the mayapy executable")
+    parser.add_argument(
+        "--timeout", type=float, default=None, help="Seconds before a build is killed"
+    )
+    parser.add_argument(
+        "--save-scenes",
+        action="store_true",
+        help="Save the built scenes to the output folder",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true", help="Resume from the session checkpoints"
+    )
+    parser.add_argument("--profile", action="store_true", help="Capture cProfile data")
+    # worker process arguments
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    parser.add_argument("--save", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        success = build_session(
+            args.sessions[0],
+            args.result,
+            save_path=args.save,
+            incremental=args.incremental,
+            profile=args.profile,
+        )
+        return 0 if success else 1
+
+    sessions = collect_sessions(args.sessions)
+    if not sessions:
+        parser.error("No .tr files found")
+    output_folder = args.output or os.path.abspath(
+        datetime.datetime.now().strftime("trigger_batch_%Y%m%d_%H%M%S")
+    )
+    batch = BatchBuild(
+        sessions,
+        output_folder,
+        workers=args.workers,
+        mayapy=args.mayapy,
+        timeout=args.timeout,
+        save_scenes=args.save_scenes,
+        incremental=args.incremental,
+        profile=args.profile,
+    )
+    results = batch.run()
+    failed = [x for x in results if x["status"] != "success"]
+    print(
+        "%i succeeded, %i failed. Summary => %s"
+        % (len(results) - len(failed), len(failed), output_folder)
+    )
+    for row in failed:
+        print("    %s: %s" % (row["asset"], row["error"]))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
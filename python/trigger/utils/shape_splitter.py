@@ -1,16 +1,23 @@
-"""splits blendshapes with the given maps"""
+"""splits blendshapes with the given maps
+
+Split shapes are computed directly from the point positions:
+    neutral + (target - neutral) * mask
+Masks of cascaded split maps are multiplied, so only the final shapes are created.
+"""
 import os
 from copy import deepcopy
 
+import numpy as np
 from maya import cmds
+from maya.api import OpenMaya
 import itertools
 from trigger.core import filelog
+from trigger.core import weight_file
 from trigger.core.decorators import keepselection
 from trigger.actions import weights
 from trigger.library import functions
 from trigger.library import deformers
 
-
 log = filelog.Filelog(logname=__name__, filename="trigger_log")
 
 
@@ -23,6 +30,8 @@ class Splitter(dict):
         self.weightsHandler = weights.Weights()
         self.neutral = None
         self.splittedShapesGrp = "SPLITTED_SHAPES_grp"
+        # {file path: (mtime, weights array)} of the loaded split maps
+        self._mask_cache = {}
 
     def add_blendshapes(self, meshes=None):
         if not meshes:
@@ -60,18 +69,57 @@ class Splitter(dict):
             split_maps = [split_maps]
         self["matches"][blendshape] = split_maps
 
-    def _bs_split(self, mesh, split_map_path, name, grp):
+    def _create_split(self, name, points, grp):
+        """Duplicate the neutral and move its vertices to the given positions."""
         splitted_mesh = cmds.duplicate(self.neutral, name=name)[0]
-        cmds.blendShape(mesh, splitted_mesh, w=[0, 1], name="tmp_split_blendshape")
-        self.weightsHandler.load_weights(
-            deformer="tmp_split_blendshape",
-            file_path=split_map_path,
-            suppress_messages=True,
-        )
-        cmds.delete(splitted_mesh, ch=True)
+        self.set_points(splitted_mesh, points)
         cmds.parent(splitted_mesh, grp)
         return splitted_mesh
 
+    @staticmethod
+    def _get_mfn_mesh(mesh):
+        selection_list = OpenMaya.MSelectionList()
+        selection_list.add(mesh)
+        return OpenMaya.MFnMesh(selection_list.getDagPath(0))
+
+    def get_points(self, mesh):
+        """Return the object space vertex positions of the mesh as (n, 3) array."""
+        points = self._get_mfn_mesh(mesh).getPoints(OpenMaya.MSpace.kObject)
+        return np.array([(point.x, point.y, point.z) for point in points])
+
+    def set_points(self, mesh, points):
+        """Set the object space vertex positions of the mesh from (n, 3) array."""
+        point_array = OpenMaya.MPointArray(
+            [OpenMaya.MPoint(*x) for x in points.tolist()]
+        )
+        self._get_mfn_mesh(mesh).setPoints(point_array, OpenMaya.MSpace.kObject)
+
+    def get_mask(self, file_path, vertex_count):
+        """Return the weights of the split map as an array of the vertex count.
+
+        Maps hold the weights of a single blendshape target. Vertices missing in
+        the file get the default value of the map. Arrays are cached until the
+        file changes.
+        """
+        mtime = os.path.getmtime(file_path)
+        cached = self._mask_cache.get(file_path)
+        if cached and cached[0] == mtime and len(cached[1]) == vertex_count:
+            return cached[1]
+
+        if weight_file.is_weight_file(file_path):
+            with weight_file.WeightFile(file_path) as binary_file:
+                weights = binary_file.header["deformerWeight"]["weights"][0]
+                indices, values = binary_file.get_arrays(weights.get("source"))
+        else:
+            self.weightsHandler.io.file_path = file_path
+            weights = self.weightsHandler.io.read()["deformerWeight"]["weights"][0]
+            indices = np.array([x["index"] for x in weights["points"]], dtype=np.intp)
+            values = np.array([x["value"] for x in weights["points"]], dtype=float)
+        mask = np.full(vertex_count, weights.get("defaultValue", 0.0), dtype=float)
+        mask[indices] = values
+        self._mask_cache[file_path] = (mtime, mask)
+        return mask
+
     def _resolve_split_name(self, unsplit_name, map_path):
         map_name = os.path.splitext(os.path.basename(map_path))[0]
         suffix = ""
@@ -113,27 +161,39 @@ class Splitter(dict):
         if not cmds.objExists(self.splittedShapesGrp):
             cmds.group(name="SPLITTED_SHAPES_grp", em=True)
 
-        mort_list = []
-        expandable_list = deepcopy(list(self["matches"].items()))
-        for shape, split_maps in expandable_list:
+        neutral_points = self.get_points(self.neutral)
+        vertex_count = len(neutral_points)
+        for shape, split_maps in deepcopy(list(self["matches"].items())):
             if not split_maps:
                 continue
 
-            map_paths = self["splitMaps"][split_maps[0]]
-
-            for nmb, map_path in enumerate(map_paths):
-                # resolve the name suffix
-                splitted_name = self._resolve_split_name(shape, map_path)
-                splitted_mesh = self._bs_split(
-                    shape, map_path, splitted_name, self.splittedShapesGrp
+            # cascade the maps. Each level splits the results of the previous one
+            names = [shape]
+            masks = np.ones((1, vertex_count))
+            for split_map in split_maps:
+                map_paths = self["splitMaps"][split_map]
+                names = [
+                    self._resolve_split_name(name, map_path)
+                    for name in names
+                    for map_path in map_paths
+                ]
+                map_masks = np.array(
+                    [self.get_mask(x, vertex_count) for x in map_paths]
+                )
+                masks = (masks[:, None, :] * map_masks[None, :, :]).reshape(
+                    -1, vertex_count
+                )
+                log.info(
+                    "{0} splitted ({1})".format(
+                        shape, ", ".join(os.path.basename(x) for x in map_paths)
+                    )
                 )
 
-                if len(split_maps) > 1:
-                    mort_list.append(splitted_mesh)
-                    expandable_list.append((splitted_mesh, split_maps[1:]))
-                log.info("{0} splitted ({1})".format(shape, os.path.basename(map_path)))
+            delta = self.get_points(shape) - neutral_points
+            splitted_points = neutral_points + delta[None, :, :] * masks[:, :, None]
+            for name, points in zip(names, splitted_points):
+                self._create_split(name, points, self.splittedShapesGrp)
 
-        cmds.delete(mort_list)
         return self.splittedShapesGrp
 
     # getters / cleaners
@@ -0,0 +1,264 @@
+"""Source to target correspondences for the direct shape transfers.
+
+The correspondence is computed once from the neutral meshes and cached on disk,
+keyed by a hash of the meshes and the binding settings. Any shape pack on the
+same source and target pair re-uses it.
+
+Binding modes:
+    identity: Same topology. Deltas are copied vertex to vertex
+    closest: Each target vertex is bound to the closest point on the source surface
+    uv: Each target vertex is bound to the source point at the same UV position
+"""
+import os
+import logging
+
+import numpy as np
+from maya.api import OpenMaya as om
+
+from trigger.objects import correspondence
+
+LOG = logging.getLogger(__name__)
+
+MODES = ["identity", "closest", "uv"]
+
+
+def get_mfn_mesh(mesh):
+    """Return the MFnMesh of the mesh transform or shape."""
+    selection_list = om.MSelectionList()
+    selection_list.add(mesh)
+    dag_path = selection_list.getDagPath(0)
+    if dag_path.apiType() != om.MFn.kMesh:
+        # use the first non intermediate mesh shape
+        for nmb in range(dag_path.childCount()):
+            child = dag_path.child(nmb)
+            is_intermediate = om.MFnDagNode(child).isIntermediateObject
+            if child.hasFn(om.MFn.kMesh) and not is_intermediate:
+                dag_path.push(child)
+                break
+    return om.MFnMesh(dag_path)
+
+
+def get_points(mesh, space=om.MSpace.kObject):
+    """Return the vertex positions of the mesh as (n, 3) array."""
+    points = get_mfn_mesh(mesh).getPoints(space)
+    return np.array([(point.x, point.y, point.z) for point in points])
+
+
+def set_points(mesh, points, space=om.MSpace.kObject):
+    """Set the vertex positions of the mesh from (n, 3) array."""
+    point_array = om.MPointArray([om.MPoint(*point) for point in points.tolist()])
+    get_mfn_mesh(mesh).setPoints(point_array, space)
+
+
+def get_triangles(mfn_mesh):
+    """Return the vertex indices of all triangles as (t, 3) array."""
+    _, vertices = mfn_mesh.getTriangles()
+    return np.array(vertices, dtype=np.intp).reshape(-1, 3)
+
+
+def get_uvs(mfn_mesh, uv_set):
+    """Return the UV positions of the UV set as (n, 2) array."""
+    us, vs = mfn_mesh.getUVs(uv_set)
+    return np.array([list(us), list(vs)]).T.reshape(-1, 2)
+
+
+def closest_point_binding(source_mesh, target_mesh, target_indices=None):
+    """Bind the target vertices to the closest triangles of the source mesh.
+
+    Args:
+        source_mesh: (String) Source neutral mesh
+        target_mesh: (String) Target neutral mesh
+        target_indices: (List) Only bind these target vertices. Default all
+
+    Returns:
+        (tuple) (n, 3) source vertex index array and (n, 3) weight array
+    """
+    source_fn = get_mfn_mesh(source_mesh)
+    intersector = om.MMeshIntersector()
+    intersector.create(source_fn.object(), source_fn.dagPath().inclusiveMatrix())
+    target_points = get_mfn_mesh(target_mesh).getPoints(om.MSpace.kWorld)
+    if target_indices is None:
+        target_indices = range(len(target_points))
+
+    indices = []
+    weights = []
+    for index in target_indices:
+        point_on_mesh = intersector.getClosestPoint(target_points[index])
+        indices.append(
+            source_fn.getPolygonTriangleVertices(
+                point_on_mesh.face, point_on_mesh.triangle
+            )
+        )
+        weight_u, weight_v = point_on_mesh.getBarycentricCoords()
+        weights.append((weight_u, weight_v, 1.0 - weight_u - weight_v))
+    return (
+        np.array(indices, dtype=np.intp).reshape(-1, 3),
+        np.array(weights).reshape(-1, 3),
+    )
+
+
+def _get_vertex_uv_ids(mfn_mesh, uv_set):
+    """Return the first UV id of each vertex. -1 for the vertices without UVs."""
+    polygon_counts, vertex_list = mfn_mesh.getVertices()
+    uv_counts, uv_ids = mfn_mesh.getAssignedUVs(uv_set)
+    vertex_uv_ids = np.full(mfn_mesh.numVertices, -1, dtype=np.intp)
+    # unmapped polygons have no entries in the uv id list
+    is_mapped = np.repeat(np.array(uv_counts) > 0, polygon_counts)
+    mapped_vertices = np.array(vertex_list, dtype=np.intp)[is_mapped]
+    # reversed, so the first UV of each vertex wins
+    vertex_uv_ids[mapped_vertices[::-1]] = np.array(uv_ids, dtype=np.intp)[::-1]
+    return vertex_uv_ids
+
+
+def _get_triangle_uv_ids(mfn_mesh, uv_set):
+    """Return the UV ids of the triangle corners as (t, 3) array. -1 if unmapped."""
+    triangle_counts, triangle_vertices = mfn_mesh.getTriangles()
+    polygon_counts, vertex_list = mfn_mesh.getVertices()
+    uv_counts, uv_ids = mfn_mesh.getAssignedUVs(uv_set)
+
+    corner_uv_ids = {}
+    vertex_position = 0
+    uv_position = 0
+    for polygon, (polygon_count, uv_count) in enumerate(zip(polygon_counts, uv_counts)):
+        if uv_count:
+            for nmb in range(polygon_count):
+                vertex = vertex_list[vertex_position + nmb]
+                corner_uv_ids[(polygon, vertex)] = uv_ids[uv_position + nmb]
+        vertex_position += polygon_count
+        uv_position += uv_count
+
+    triangle_polygons = np.repeat(np.arange(len(triangle_counts)), triangle_counts)
+    return np.array(
+        [
+            corner_uv_ids.get((polygon, vertex), -1)
+            for polygon, vertex in zip(
+                np.repeat(triangle_polygons, 3).tolist(), triangle_vertices
+            )
+        ],
+        dtype=np.intp,
+    ).reshape(-1, 3)
+
+
+def uv_binding(source_mesh, target_mesh, source_uv_set=None, target_uv_set=None):
+    """Bind the target vertices to the source triangles at the same UV positions.
+
+    Target vertices without UVs fall back to the closest point binding.
+
+    Args:
+        source_mesh: (String) Source neutral mesh
+        target_mesh: (String) Target neutral mesh
+        source_uv_set: (String) Default is the current UV set of the source
+        target_uv_set: (String) Default is the current UV set of the target
+
+    Returns:
+        (tuple) (n, 3) source vertex index array and (n, 3) weight array
+    """
+    source_fn = get_mfn_mesh(source_mesh)
+    target_fn = get_mfn_mesh(target_mesh)
+    source_uv_set = source_uv_set or source_fn.currentUVSetName()
+    target_uv_set = target_uv_set or target_fn.currentUVSetName()
+
+    source_triangles = get_triangles(source_fn)
+    triangle_uv_ids = _get_triangle_uv_ids(source_fn, source_uv_set)
+    is_mapped = np.all(triangle_uv_ids >= 0, axis=1)
+    if not np.any(is_mapped):
+        msg = "%s has no UVs in %s" % (source_mesh, source_uv_set)
+        LOG.error(msg)
+        raise ValueError(msg)
+    source_triangles = source_triangles[is_mapped]
+    source_uvs = get_uvs(source_fn, source_uv_set)
+    triangle_uvs = source_uvs[triangle_uv_ids[is_mapped]]
+
+    target_uv_ids = _get_vertex_uv_ids(target_fn, target_uv_set)
+    has_uv = target_uv_ids >= 0
+    target_uvs = get_uvs(target_fn, target_uv_set)[target_uv_ids[has_uv]]
+    triangle_ids, uv_weights = correspondence.triangle_barycentrics(
+        target_uvs, triangle_uvs
+    )
+
+    indices = np.zeros((target_fn.numVertices, 3), dtype=np.intp)
+    weights = np.zeros((target_fn.numVertices, 3))
+    indices[has_uv] = source_triangles[triangle_ids]
+    weights[has_uv] = uv_weights
+    if not np.all(has_uv):
+        missing = np.flatnonzero(~has_uv)
+        LOG.warning(
+            "%i vertices of %s have no UVs. Using the closest points for them"
+            % (len(missing), target_mesh)
+        )
+        indices[missing], weights[missing] = closest_point_binding(
+            source_mesh, target_mesh, target_indices=missing.tolist()
+        )
+    return indices, weights
+
+
+def get_correspondence(
+    source_mesh,
+    target_mesh,
+    mode="closest",
+    cache_folder=None,
+    source_uv_set=None,
+    target_uv_set=None,
+):
+    """Return the correspondence of the meshes. Read from the cache if possible.
+
+    Args:
+        source_mesh: (String) Source neutral mesh
+        target_mesh: (String) Target neutral mesh
+        mode: (String) One of the MODES
+        cache_folder: (String) Folder of the cached correspondences. No caching if
+            not defined
+        source_uv_set: (String) Used by the uv mode
+        target_uv_set: (String) Used by the uv mode
+
+    Returns:
+        (correspondence.Correspondence)
+    """
+    if mode not in MODES:
+        msg = "Binding mode must be one of %s" % ", ".join(MODES)
+        LOG.error(msg)
+        raise ValueError(msg)
+
+    source_fn = get_mfn_mesh(source_mesh)
+    target_fn = get_mfn_mesh(target_mesh)
+    if mode == "identity":
+        if source_fn.numVertices != target_fn.numVertices:
+            msg = "%s and %s must have the same topology" % (source_mesh, target_mesh)
+            LOG.error(msg)
+            raise ValueError(msg)
+        return correspondence.Correspondence.identity(source_fn.numVertices)
+
+    arrays = [
+        get_points(source_mesh, space=om.MSpace.kWorld),
+        get_triangles(source_fn),
+        get_points(target_mesh, space=om.MSpace.kWorld),
+        get_triangles(target_fn),
+    ]
+    if mode == "uv":
+        source_uv_set = source_uv_set or source_fn.currentUVSetName()
+        target_uv_set = target_uv_set or target_fn.currentUVSetName()
+        arrays.append(get_uvs(source_fn, source_uv_set))
+        arrays.append(get_uvs(target_fn, target_uv_set))
+    key = correspondence.get_key(*arrays, mode=mode)
+    cache_path = os.path.join(cache_folder, "%s.npz" % key) if cache_folder else None
+    if cache_path and os.path.isfile(cache_path):
+        LOG.info("Using the cached correspondence %s" % cache_path)
+        return correspondence.Correspondence.load(cache_path)
+
+    if mode == "uv":
+        indices, weights = uv_binding(
+            source_mesh,
+            target_mesh,
+            source_uv_set=source_uv_set,
+            target_uv_set=target_uv_set,
+        )
+    else:
+        indices, weights = closest_point_binding(source_mesh, target_mesh)
+    binding = correspondence.Correspondence(
+        indices, weights, source_fn.numVertices, key=key
+    )
+    if cache_path:
+        if not os.path.isdir(cache_folder):
+            os.makedirs(cache_folder)
+        binding.save(cache_path)
+    return binding
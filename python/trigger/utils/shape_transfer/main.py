@@ -1,14 +1,17 @@
 # pylint: disable=consider-using-f-string
 """Main module for the shape transfer tool."""
+import os
 from time import time
 import logging
 
+import numpy as np
 from maya import cmds
 
 from trigger.library import interface
 from trigger.library import functions
 from trigger.objects.scene_data import SceneDictionary
 from trigger.utils.shape_transfer import protocols
+from trigger.utils.shape_transfer import binding
 
 LOG = logging.getLogger(__name__)
 
@@ -45,6 +48,11 @@ class ShapeTransfer(object):
         self.active_protocol = None
         self.is_preview_on = False
 
+        # correspondences of the direct transfers are cached here
+        self.cache_folder = os.path.join(
+            os.path.expanduser("~"), "trigger_correspondence"
+        )
+
     def set_source_mesh(self, source_mesh):
         """Set the source mesh and update the message attribute."""
         self._source_mesh = source_mesh
@@ -280,8 +288,17 @@ class ShapeTransfer(object):
 
         cmds.delete(_temp_dup)
 
-    def transfer(self, q_progressbar=None):
-        """Bake the QC into a shape pack."""
+    def transfer(self, q_progressbar=None, use_correspondence=False):
+        """Bake the QC into a shape pack.
+
+        Args:
+            q_progressbar: (QProgressBar) Optional progress bar to update
+            use_correspondence: (Bool) If the active protocol supports it, push the
+                deltas through a precomputed correspondence instead of baking the
+                preview frame by frame. See transfer_direct()
+        """
+        if use_correspondence and self.active_protocol and self.active_protocol.binding:
+            return self.transfer_direct(q_progressbar=q_progressbar)
 
         if not self.is_preview_on:
             state, message = self.preview_mode(turn_on=True)
@@ -341,4 +358,93 @@ class ShapeTransfer(object):
         LOG.info("Time taken: {}".format(time() - start))
         return True, "Transferred Successfully"
 
+    def transfer_direct(self, q_progressbar=None):
+        """Transfer the shape pack through a precomputed correspondence.
+
+        The correspondence of the neutral meshes is computed once and cached in the
+        cache folder. All shape deltas are transferred with a single product. The
+        preview setup is not needed.
+
+        Wrap and Proximity are approximated by binding each target vertex to the
+        closest source triangle. The envelope of the protocol scales the deltas.
+        Other protocol settings cannot be reproduced, so the transfer is refused
+        when they are changed. Like the baked transfer, the offset of the
+        preview is not applied.
+        """
+        state, message = self.validate_variables()
+        if not state:
+            LOG.warning(message)
+            return False, message
+        if not self.active_protocol.binding:
+            return False, "{} does not support direct transfers".format(
+                self.active_protocol.display_name
+            )
+        unsupported = self.active_protocol.get_unsupported_properties()
+        if unsupported:
+            message = (
+                "Direct transfer ignores {0}. Reset them to the defaults or "
+                "bake the preview instead".format(", ".join(unsupported))
+            )
+            LOG.warning(message)
+            return False, message
+
+        start = time()
+        correspondence = binding.get_correspondence(
+            self._source_mesh,
+            self._target_mesh,
+            cache_folder=self.cache_folder,
+            **self.active_protocol.get_binding_settings()
+        )
+
+        source_points = binding.get_points(self._source_mesh)
+        meshes = functions.get_meshes(self._source_blendshape_grp, full_path=True)
+        # the deltas are written in place. Stacking the points would copy them
+        deltas = np.empty((len(meshes),) + source_points.shape)
+        shapes = []
+        for shape in meshes:
+            points = binding.get_points(shape)
+            if len(points) != len(source_points):
+                LOG.warning("{} has a different topology. Skipping".format(shape))
+                continue
+            np.subtract(points, source_points, out=deltas[len(shapes)])
+            shapes.append(shape.split("|")[-1])
+        if not shapes:
+            return False, "No compatible shapes in {}".format(
+                self._source_blendshape_grp
+            )
+
+        transferred_points = correspondence.transfer(deltas[: len(shapes)])
+        del deltas
+        transferred_points *= self.active_protocol.get_envelope()
+        transferred_points += binding.get_points(self._target_mesh)
 
+        cmds.refresh(suspend=True)
+        try:
+            transferred_shapes_grp = cmds.group(
+                empty=True,
+                name="TRANSFERRED_{0}_{1}".format(
+                    self._source_blendshape_grp, self.active_protocol.name
+                ),
+            )
+            if q_progressbar:
+                q_progressbar.reset()
+                q_progressbar.setRange(0, len(shapes))
+
+            for count, (shape, points) in enumerate(zip(shapes, transferred_points)):
+                new_blendshape = cmds.duplicate(self._target_mesh)[0]
+                functions.delete_intermediates(new_blendshape)
+                # make sure it's visible
+                cmds.setAttr("{}.v".format(new_blendshape), True)
+                new_blendshape = cmds.parent(new_blendshape, transferred_shapes_grp)[0]
+                new_blendshape = cmds.rename(new_blendshape, shape)
+                binding.set_points(new_blendshape, points)
+
+                if q_progressbar:
+                    q_progressbar.setValue(count)
+
+            if q_progressbar:
+                q_progressbar.reset()
+        finally:
+            cmds.refresh(suspend=False)
+        LOG.info("Time taken: {}".format(time() - start))
+        return True, "Transferred Successfully"
@@ -13,6 +13,10 @@ class ProtocolCore(dict):
     name = ""
     display_name = ""
     type = None  # "shape" or "topology"
+    # correspondence mode of the direct transfer. See binding.MODES
+    binding = None
+    # properties the direct transfer takes into account. Others must be default
+    binding_properties = ["visibility", "source_visibility", "target_visibility"]
 
     def __init__(self):
 
@@ -261,6 +265,25 @@ class ProtocolCore(dict):
         cmds.setAttr("%s.nodeState" % self.blendshape_node, 1)
         cmds.setAttr("%s.nodeState" % self.blendshape_node, 0)
 
+    def get_binding_settings(self):
+        """Return the keyword arguments of binding.get_correspondence."""
+        return {"mode": self.binding}
+
+    def get_envelope(self):
+        """Return the envelope the direct transfer scales the deltas with."""
+        if "envelope" in self:
+            return self["envelope"].value
+        return 1.0
+
+    def get_unsupported_properties(self):
+        """Return the changed properties the direct transfer cannot reproduce."""
+        return [
+            name
+            for name, property_object in self.items()
+            if name not in self.binding_properties + ["envelope"]
+            and property_object.value != property_object.default
+        ]
+
     def ui_refresh(self):
         """Reinitialize the exposed (UI) properties."""
 
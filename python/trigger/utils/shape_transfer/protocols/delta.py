@@ -8,6 +8,7 @@ class DeltaTransfer(ProtocolCore):
     name = "deltaTransfer"
     display_name = "Delta Transfer"
     type = "shape"
+    binding = "identity"
 
     def __init__(self):
         super(DeltaTransfer, self).__init__()
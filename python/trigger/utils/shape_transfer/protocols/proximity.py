@@ -10,6 +10,7 @@ class ProximityTransfer(ProtocolCore):
     name = "proximity"
     display_name = "Proximity"
     type = "topology"
+    binding = "closest"
 
     wrap_properties = [
         "envelope",
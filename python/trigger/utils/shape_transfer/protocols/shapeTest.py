@@ -6,6 +6,7 @@ class ShapeTest(ProtocolCore):
     name = "shapeTest"
     display_name = "Shape Test"
     type = "shape"
+    binding = "identity"
     def __init__(self):
         super(ShapeTest, self).__init__()
         
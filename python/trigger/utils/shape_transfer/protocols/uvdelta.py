@@ -10,6 +10,11 @@ class UvDeltaTransfer(ProtocolCore):
     name = "uvDeltaTransfer"
     display_name = "UV Delta Transfer"
     type = "shape"
+    binding = "uv"
+    binding_properties = ProtocolCore.binding_properties + [
+        "sourceUVSpace",
+        "targetUVSpace",
+    ]
 
     def __init__(self):
         super(UvDeltaTransfer, self).__init__()
@@ -79,6 +84,14 @@ class UvDeltaTransfer(ProtocolCore):
             if self["targetUVSpace"].value not in _target_uv_sets:
                 self["targetUVSpace"].value = _target_uv_sets[0]
 
+    def get_binding_settings(self):
+        """Bind with the selected UV sets."""
+        return {
+            "mode": self.binding,
+            "source_uv_set": self["sourceUVSpace"].value or None,
+            "target_uv_set": self["targetUVSpace"].value or None,
+        }
+
     def prepare(self):
         """Prepare the protocol for execution."""
         super(UvDeltaTransfer, self).prepare()
@@ -9,6 +9,7 @@ class WrapTransfer(ProtocolCore):
     name = "wrap"
     display_name = "Wrap"
     type = "topology"
+    binding = "closest"
 
     wrap_properties = [
         "weightThreshold",
@@ -51,6 +52,13 @@ class WrapTransfer(ProtocolCore):
             default_value=True,
         )
 
+    def get_unsupported_properties(self):
+        """The automatic weight threshold is not a user setting."""
+        unsupported = super(WrapTransfer, self).get_unsupported_properties()
+        if self["autoWeightThreshold"].value and "weightThreshold" in unsupported:
+            unsupported.remove("weightThreshold")
+        return unsupported
+
     def prepare(self):
         super(WrapTransfer, self).prepare()
         self.blendshape_node = "trTMP_{0}_blendshape".format(self.name)
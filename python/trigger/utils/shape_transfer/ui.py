@@ -410,6 +410,15 @@ class MainUI(QtWidgets.QMainWindow):
         refresh_pb.setMaximumWidth(15)
         buttons_hlay.addWidget(refresh_pb)
 
+        self.direct_transfer_cb = QtWidgets.QCheckBox(text="Direct")
+        self.direct_transfer_cb.setToolTip(
+            "Transfer through a cached correspondence instead of baking the preview.\n"
+            "Wrap and Proximity are approximated by binding each vertex to the\n"
+            "closest source triangle with barycentric weights. Only the envelope\n"
+            "of the protocol settings is applied"
+        )
+        buttons_hlay.addWidget(self.direct_transfer_cb)
+
         transfer_pb = QtWidgets.QPushButton(text="Transfer")
         buttons_hlay.addWidget(transfer_pb)
 
@@ -487,7 +496,10 @@ class MainUI(QtWidgets.QMainWindow):
 
     def on_transfer(self):
         """Run the transfer and inform the user about the progress and result."""
-        state, message = self.transfer_handler.transfer(q_progressbar=self.progress_bar)
+        state, message = self.transfer_handler.transfer(
+            q_progressbar=self.progress_bar,
+            use_correspondence=self.direct_transfer_cb.isChecked(),
+        )
         if not state:
             self.feed.pop_info(title="Transfer Error", text=message, critical=True)
             return
@@ -0,0 +1,92 @@
+"""Import-time benchmark for the lazy plugin registry.
+
+Each scenario runs in a fresh interpreter and measures the time spent importing
+trigger.actions and trigger.modules and listing their default data:
+    cold: No manifest. All plugin files are parsed
+    warm: Manifest is up to date. Nothing is parsed or imported
+    eager: Same as warm, then every plugin is imported like the old registry did.
+        Needs Maya. Run with mayapy to include it.
+    session: Same as warm, then trigger.base.actions_session is imported like a
+        headless build does. Needs Maya. It should not load any Qt/UI modules
+
+Run with the 'python' folder in PYTHONPATH:
+    python tests/benchmark_plugin_registry.py
+    mayapy tests/benchmark_plugin_registry.py
+"""
+import os
+import sys
+import subprocess
+
+REPEAT = 5
+
+SCRIPT = """
+import sys
+import time
+start = time.perf_counter()
+if %(eager)s or %(session)s:
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    start = time.perf_counter()
+from trigger import actions, modules
+defaults = [actions.class_data.get_data(x) for x in actions.class_data]
+limbs = [modules.class_data.get_data(x) for x in modules.class_data]
+if %(eager)s:
+    plugins = [actions.class_data[x] for x in actions.class_data]
+    plugins += [modules.class_data[x] for x in modules.class_data]
+if %(session)s:
+    import trigger.base.actions_session
+print(time.perf_counter() - start)
+print(len([x for x in sys.modules if x.startswith(("PySide", "shiboken", "trigger.ui"))]))
+"""
+
+
+def remove_manifests():
+    import trigger
+
+    root = os.path.dirname(trigger.__file__)
+    for package in ["actions", "modules"]:
+        manifest = os.path.join(root, package, "_manifest.json")
+        if os.path.isfile(manifest):
+            os.remove(manifest)
+
+
+def run(eager=False, cold=False, session=False):
+    timings = []
+    ui_modules = 0
+    for _ in range(REPEAT):
+        if cold:
+            remove_manifests()
+        output = subprocess.check_output(
+            [sys.executable, "-c", SCRIPT % {"eager": eager, "session": session}],
+            env=os.environ.copy(),
+        )
+        elapsed, ui_modules = output.decode().strip().split("\n")[-2:]
+        timings.append(float(elapsed))
+    return min(timings), int(ui_modules)
+
+
+def main():
+    try:
+        import maya.standalone  # noqa: F401
+
+        has_maya = True
+    except ImportError:
+        has_maya = False
+
+    scenarios = [("cold", False, True, False), ("warm", False, False, False)]
+    if has_maya:
+        scenarios.append(("eager", True, False, False))
+        scenarios.append(("session", False, False, True))
+    for name, eager, cold, session in scenarios:
+        elapsed, ui_modules = run(eager=eager, cold=cold, session=session)
+        print("%-7s %8.1f ms  %3i Qt/UI modules loaded" % (name, elapsed * 1000, ui_modules))
+    if not has_maya:
+        print(
+            "eager and session skipped. Run with mayapy to compare against "
+            "importing all plugins and the actions session"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Benchmark for the weight redistribution used by skin.Weight.add_influence.
+
+Runs WeightMatrix.redistribute on synthetic data up to 100k vertices and prints
+the time per vertex for each size. Linear scaling means the time per vertex
+stays (roughly) constant while the vertex count doubles.
+
+Does not need Maya. Run with the 'python' folder in PYTHONPATH:
+    python tests/benchmark_weight_matrix.py
+"""
+import sys
+import time
+
+import numpy as np
+
+from trigger.objects import weight_matrix
+
+INFLUENCE_COUNT = 200
+VERTEX_COUNTS = [12500, 25000, 50000, 100000]
+# max allowed growth of time per vertex between the smallest and the largest run
+TOLERANCE = 2.0
+
+
+def synthetic_matrix(vertex_count, influence_count, seed=0):
+    """Create a normalized matrix with 4 influences per vertex."""
+    rng = np.random.default_rng(seed)
+    values = np.zeros((vertex_count, influence_count))
+    rows = np.repeat(np.arange(vertex_count), 4)
+    columns = rng.integers(0, influence_count, size=vertex_count * 4)
+    values[rows, columns] = rng.random(vertex_count * 4)
+    values /= np.maximum(values.sum(axis=1, keepdims=True), 1e-9)
+    influences = ["joint%i" % nmb for nmb in range(influence_count)]
+    return weight_matrix.WeightMatrix(vertex_count, influences, values=values)
+
+
+def run(vertex_count):
+    matrix = synthetic_matrix(vertex_count, INFLUENCE_COUNT)
+    rng = np.random.default_rng(1)
+    indices = np.arange(vertex_count)
+    values = rng.random(vertex_count)
+    start = time.perf_counter()
+    matrix.redistribute(indices, values)
+    return time.perf_counter() - start
+
+
+def main():
+    per_vertex = []
+    for vertex_count in VERTEX_COUNTS:
+        elapsed = run(vertex_count)
+        per_vertex.append(elapsed / vertex_count)
+        print(
+            "%7i vertices x %i influences: %.3f s (%.2f us/vertex)"
+            % (vertex_count, INFLUENCE_COUNT, elapsed, per_vertex[-1] * 1e6)
+        )
+    growth = per_vertex[-1] / per_vertex[0]
+    print("time per vertex growth: x%.2f" % growth)
+    return 0 if growth < TOLERANCE else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
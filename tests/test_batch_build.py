@@ -0,0 +1,62 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from trigger.utils import batch_build
+
+
+class BatchBuildTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.sessions = []
+        for folder in ["assetA", "assetB"]:
+            os.mkdir(os.path.join(self.temp_dir, folder))
+            session_path = os.path.join(self.temp_dir, folder, "rig.tr")
+            with open(session_path, "w") as f:
+                f.write('{"actions": []}')
+            self.sessions.append(session_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_collect_sessions(self):
+        sessions = batch_build.collect_sessions(
+            [os.path.join(self.temp_dir, "*", "*.tr"), self.sessions[0]]
+        )
+        self.assertEqual(sessions, self.sessions)
+        self.assertEqual(
+            batch_build.get_asset_names(sessions), ["assetA_rig", "assetB_rig"]
+        )
+
+    def test_asset_names(self):
+        sessions = [
+            "/assets/hero/rig/rig.tr",
+            "/assets/villain/rig/rig.tr",
+            "/assets/hero/rig/face.tr",
+        ]
+        self.assertEqual(
+            batch_build.get_asset_names(sessions), ["hero_rig", "villain_rig", "face"]
+        )
+
+    def test_failed_workers_are_reported(self):
+        # this interpreter has no maya.standalone, so the workers fail to build
+        output_folder = os.path.join(self.temp_dir, "output")
+        batch = batch_build.BatchBuild(
+            self.sessions, output_folder, workers=2, mayapy=sys.executable
+        )
+        results = batch.run()
+        self.assertEqual([x["status"] for x in results], ["failed", "failed"])
+        self.assertTrue(all(x["error"] for x in results))
+        for file_name in [
+            "summary.json",
+            "summary.csv",
+            "assetA_rig.log",
+            "assetB_rig.log",
+        ]:
+            self.assertTrue(os.path.isfile(os.path.join(output_folder, file_name)))
+
+
+if __name__ == "__main__":
+    unittest.main()
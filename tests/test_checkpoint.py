@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from trigger.core import checkpoint
+
+
+class CheckpointTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.weights_path = os.path.join(self.temp_dir, "body.trw")
+        with open(self.weights_path, "w") as f:
+            f.write("{}")
+        self.actions = [
+            {"name": "kinematics", "type": "kinematics", "data": {"guides_file_path": ""}},
+            {"name": "weights", "type": "weights", "data": {"weights_file_path": self.weights_path}},
+            {"name": "cleanup", "type": "cleanup", "data": {}},
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_fingerprints_are_chained(self):
+        fingerprints = checkpoint.chain_fingerprints(self.actions)
+        self.assertEqual(fingerprints, checkpoint.chain_fingerprints(self.actions))
+        self.actions[0]["data"]["guides_file_path"] = "changed"
+        changed = checkpoint.chain_fingerprints(self.actions)
+        self.assertTrue(all(a != b for a, b in zip(fingerprints, changed)))
+
+    def test_referenced_files(self):
+        fingerprints = checkpoint.chain_fingerprints(self.actions)
+        # files in the companion folder count as well
+        os.mkdir(os.path.join(self.temp_dir, "body"))
+        with open(os.path.join(self.temp_dir, "body", "skinCluster.json"), "w") as f:
+            f.write("{}")
+        changed = checkpoint.chain_fingerprints(self.actions)
+        self.assertEqual(fingerprints[0], changed[0])
+        self.assertNotEqual(fingerprints[1], changed[1])
+
+    def test_resume_point(self):
+        session_path = os.path.join(self.temp_dir, "session.tr")
+        checkpoints = checkpoint.Checkpoints(session_path)
+        fingerprints = checkpoint.chain_fingerprints(self.actions)
+        self.assertEqual(checkpoints.find_resume_point(self.actions), (-1, None))
+        scene_path = checkpoints.get_scene_path(1, "weights")
+        with open(scene_path, "w") as f:
+            f.write("")
+        checkpoints.record(1, "weights", fingerprints[1], scene_path)
+
+        checkpoints = checkpoint.Checkpoints(session_path)
+        self.assertEqual(checkpoints.find_resume_point(self.actions), (1, scene_path))
+        self.actions[2]["data"]["anything"] = True
+        self.assertEqual(checkpoints.find_resume_point(self.actions), (1, scene_path))
+        self.actions[1]["enabled"] = False
+        self.assertEqual(checkpoints.find_resume_point(self.actions), (-1, None))
+
+        checkpoints.prune(["kinematics", "cleanup"])
+        self.assertFalse(os.path.isfile(scene_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
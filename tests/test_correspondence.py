@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+    from trigger.objects import correspondence
+except ImportError:
+    correspondence = None
+
+
+@unittest.skipIf(correspondence is None, "numpy is not available")
+class CorrespondenceTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_transfer_matches_dense_product(self):
+        rand = np.random.RandomState(0)
+        binding = correspondence.Correspondence(
+            rand.randint(0, 20, size=(30, 3)), rand.random_sample((30, 3)), 20
+        )
+        deltas = rand.random_sample((5, 20, 3))
+        expected = np.einsum("ts,nsk->ntk", binding.to_dense(), deltas)
+        self.assertTrue(np.allclose(binding.transfer(deltas), expected))
+        self.assertTrue(np.allclose(binding.transfer(deltas[0]), expected[0]))
+
+    def test_triangle_barycentrics(self):
+        triangles = np.array([[[0, 0], [1, 0], [0, 1]], [[1, 0], [1, 1], [0, 1]]])
+        points = np.array([[0.2, 0.2], [0.8, 0.7], [1.5, 0.5]])
+        triangle_ids, weights = correspondence.triangle_barycentrics(
+            points, triangles, chunk_size=2
+        )
+        self.assertEqual(triangle_ids.tolist(), [0, 1, 1])
+        rebuilt = np.einsum("nij,ni->nj", triangles[triangle_ids], weights)
+        self.assertTrue(np.allclose(rebuilt[:2], points[:2]))
+        # outside points are clamped onto the closest triangle
+        self.assertTrue(np.allclose(weights.sum(axis=1), 1.0))
+        self.assertTrue(np.all(weights >= 0))
+
+    def test_triangle_barycentrics_grid(self):
+        rand = np.random.RandomState(0)
+        corners = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=float)
+        # a 20 x 20 quad grid split into triangles and a far away island
+        offsets = np.array([[x, y] for y in range(20) for x in range(20)], dtype=float)
+        quads = (corners[None] + offsets[:, None]) / 20.0
+        triangles = np.concatenate(
+            [quads[:, [0, 1, 2]], quads[:, [0, 2, 3]], [[[5, 5], [6, 5], [5, 6]]]]
+        )
+        points = rand.uniform(0.001, 0.999, (200, 2))
+        triangle_ids, weights = correspondence.triangle_barycentrics(
+            points, triangles, chunk_size=64
+        )
+        rebuilt = np.einsum("nij,ni->nj", triangles[triangle_ids], weights)
+        self.assertTrue(np.allclose(rebuilt, points))
+        self.assertTrue(np.all(weights >= 0))
+        # outside points use the nearby triangles, not the island
+        triangle_ids, weights = correspondence.triangle_barycentrics(
+            [[1.2, 0.5]], triangles
+        )
+        rebuilt = np.einsum("nij,ni->nj", triangles[triangle_ids], weights)
+        self.assertLess(np.linalg.norm(rebuilt[0] - [1.2, 0.5]), 0.25)
+
+    def test_save_load(self):
+        binding = correspondence.Correspondence.identity(4, key="abc")
+        file_path = os.path.join(self.temp_dir, "binding.npz")
+        binding.save(file_path)
+        loaded = correspondence.Correspondence.load(file_path)
+        self.assertEqual(loaded.key, "abc")
+        self.assertEqual(loaded.source_count, 4)
+        self.assertTrue(np.array_equal(loaded.indices, binding.indices))
+
+
+if __name__ == "__main__":
+    unittest.main()
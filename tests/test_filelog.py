@@ -0,0 +1,35 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from trigger.core import filelog
+
+
+class FilelogTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        file_path = os.path.join(self.temp_dir, "test_log.log")
+        handler = filelog._FILE_HANDLERS.pop(file_path, None)
+        if handler:
+            handler.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_banner_is_written_once(self):
+        logs = [
+            filelog.Filelog(logname=name, filename="test_log", filedir=self.temp_dir)
+            for name in ["first", "second", "third"]
+        ]
+        logs[1].info("message")
+        filelog.flush_all()
+        with open(os.path.join(self.temp_dir, "test_log.log")) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[:3], ["=====", "first", "====="])
+        self.assertNotIn("second", lines)
+        self.assertEqual(len([x for x in lines if x.endswith("message")]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
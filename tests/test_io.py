@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from trigger.core import io
+
+
+class IOTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.data = {
+            "deformerWeight": {
+                "shapes": [{"name": "meshShape", "size": 3}],
+                "weights": [
+                    {"source": "joint%i" % nmb, "points": [{"index": 0, "value": 0.25}]}
+                    for nmb in range(3)
+                ],
+            },
+            "DQ_weights": [1.0, 0.5, 1e-9],
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.temp_dir)
+
+    def test_write_read(self):
+        for file_name in ["data.trw", "data.trw.gz"]:
+            file_path = os.path.join(self.temp_dir, file_name)
+            handler = io.IO(file_path=file_path)
+            handler.write(self.data)
+            self.assertEqual(handler.read(), self.data)
+            # no temporary files left behind
+            self.assertEqual(self._get_temp_files(), [])
+
+    def test_stream_scalars(self):
+        data = {"a": 1.25, "b": [1.5, 22, -2.5e-10, True, None, "x"], "c": -7}
+        file_path = os.path.join(self.temp_dir, "scalars.trw")
+        handler = io.IO(file_path=file_path)
+        handler.write(data)
+        for chunk_size in range(1, 9):
+            items = list(handler.stream(keys=["b"], chunk_size=chunk_size))
+            self.assertEqual(
+                items,
+                [(("a",), 1.25)]
+                + [(("b", nmb), value) for nmb, value in enumerate(data["b"])]
+                + [(("c",), -7)],
+            )
+
+    def _get_temp_files(self):
+        return [x for x in os.listdir(self.temp_dir) if x.endswith(".tmp")]
+
+    def test_failed_write_keeps_the_file(self):
+        file_path = os.path.join(self.temp_dir, "keep.tr")
+        handler = io.IO(file_path=file_path)
+        handler.write(self.data)
+        # failing while moving the written temporary file over the target
+        with mock.patch.object(io.os, "replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                handler.write({"other": 1})
+        self.assertEqual(handler.read(), self.data)
+        self.assertEqual(self._get_temp_files(), [])
+
+        # failing in the middle of the write
+        with self.assertRaises(RuntimeError):
+            with io.atomic_write(file_path) as f:
+                f.write(b'{"partial": ')
+                raise RuntimeError("interrupted")
+        self.assertEqual(handler.read(), self.data)
+        self.assertEqual(self._get_temp_files(), [])
+
+    def test_stream(self):
+        file_path = os.path.join(self.temp_dir, "stream.trw")
+        handler = io.IO(file_path=file_path, compact=False)
+        handler.write(self.data)
+        items = list(
+            handler.stream(keys=["deformerWeight", "weights"], chunk_size=7)
+        )
+        self.assertEqual(
+            items[0],
+            (("deformerWeight", "shapes"), self.data["deformerWeight"]["shapes"]),
+        )
+        self.assertEqual(
+            [value for key_path, value in items if len(key_path) == 3],
+            self.data["deformerWeight"]["weights"],
+        )
+        self.assertEqual(items[-1], (("DQ_weights",), self.data["DQ_weights"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
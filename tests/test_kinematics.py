@@ -0,0 +1,78 @@
+import maya.cmds as cmds
+import base_test
+from standalone_start import standalone_prep
+
+
+class KinematicsTests(base_test.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        standalone_prep()
+        from trigger.base import session
+        from trigger.actions import kinematics
+
+        cls.guides_handler = session.Session()
+        cls.kinematics = kinematics
+
+    def build(self, module_name, **options):
+        """Build the limb from the default guides and return the created rig."""
+        self.guides_handler.reset_scene()
+        cmds.select(clear=True)
+        _, side_dict = self.guides_handler.init.initLimb(
+            module_name, whichSide="left", defineAs=False
+        )
+        root_guide = list(side_dict.values())[0][0]
+        builder = self.kinematics.Kinematics(root_guide)
+        builder.afterlife = 0
+        for key, value in options.items():
+            setattr(builder, key, value)
+        builder.action()
+
+        nodes = sorted(cmds.ls())
+        transforms = sorted(cmds.ls(type="transform"))
+        joints = {
+            jnt: cmds.xform(jnt, query=True, worldSpace=True, matrix=True)
+            for jnt in cmds.ls(type="joint")
+        }
+        return nodes, joints, transforms
+
+    def assert_same_rig(self, rig_a, rig_b):
+        """Compare the nodes, joint matrices and transforms of two builds."""
+        nodes_a, joints_a, transforms_a = rig_a
+        nodes_b, joints_b, transforms_b = rig_b
+        self.assertEqual(nodes_a, nodes_b)
+        self.assert_same_joints(joints_a, joints_b)
+        self.assertEqual(transforms_a, transforms_b)
+
+    def assert_same_joints(self, joints_a, joints_b):
+        self.assertEqual(sorted(joints_a), sorted(joints_b))
+        for jnt, matrix in joints_a.items():
+            for value_a, value_b in zip(matrix, joints_b[jnt]):
+                self.assertAlmostEqual(value_a, value_b, places=4)
+
+    def test_batch_node_creation(self):
+        for module_name in ("arm", "leg"):
+            expected = self.build(module_name)
+            batched = self.build(module_name, batchNodeCreation=True)
+            self.assert_same_rig(expected, batched)
+
+    def test_cache_expressions(self):
+        from trigger.library import arithmetic
+
+        for module_name in ("arm", "leg"):
+            expected = self.build(module_name)
+            cached = self.build(module_name, cacheExpressions=True)
+            # folded and shared nodes are gone. The rig itself is the same
+            self.assertLessEqual(len(cached[0]), len(expected[0]))
+            self.assert_same_joints(expected[1], cached[1])
+            self.assertEqual(expected[2], cached[2])
+
+        cmds.file(newFile=True, force=True)
+        locator = cmds.spaceLocator(name="cacheTest")[0]
+        with arithmetic.ExpressionCache():
+            self.assertEqual(arithmetic.multiply(2, 3), 6.0)
+            plug = arithmetic.add("%s.tx" % locator, 1)
+            self.assertEqual(arithmetic.add("%s.tx" % locator, 1), plug)
+            # named nodes belong to the caller
+            named = arithmetic.add("%s.tx" % locator, 1, name="named")
+            self.assertNotEqual(named, plug)
+            self.assertEqual(arithmetic.multiply(2, 3, name="product"), "product.output")
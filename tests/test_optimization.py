@@ -0,0 +1,66 @@
+import maya.cmds as cmds
+import base_test
+from standalone_start import standalone_prep
+
+
+class OptimizationTests(base_test.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        standalone_prep()
+        from trigger.core import compatibility
+        from trigger.library import optimization
+
+        cls.compat = compatibility
+        cls.optimization = optimization
+
+    def setUp(self):
+        cmds.file(newFile=True, force=True)
+
+    def test_find_dead_nodes(self):
+        driven = cmds.spaceLocator(name="driven")[0]
+        used = cmds.createNode("reverse", name="used")
+        cmds.connectAttr("%s.outputX" % used, "%s.tx" % driven)
+        # nodes feeding only the dead nodes are dead as well
+        dead_end = cmds.createNode("multiplyDivide", name="deadEnd")
+        dead_input = cmds.createNode("reverse", name="deadInput")
+        cmds.connectAttr("%s.outputX" % dead_input, "%s.input1X" % dead_end)
+        locked = cmds.createNode("clamp", name="locked")
+        cmds.lockNode(locked, lock=True)
+
+        dead_nodes = self.optimization.find_dead_nodes()
+        self.assertEqual(dead_nodes, sorted([dead_end, dead_input]))
+        # finding does not delete
+        self.assertTrue(cmds.objExists(dead_end))
+
+        self.assertEqual(self.optimization.delete_dead_nodes(), dead_nodes)
+        self.assertFalse(cmds.objExists(dead_end))
+        self.assertFalse(cmds.objExists(dead_input))
+        self.assertTrue(cmds.objExists(used))
+        self.assertTrue(cmds.objExists(locked))
+        cmds.lockNode(locked, lock=False)
+
+    def test_merge_node_chains(self):
+        driver = cmds.spaceLocator(name="driver")[0]
+        driven = cmds.spaceLocator(name="driven")[0]
+        chain = []
+        plug = "%s.tx" % driver
+        for offset in (1.0, 2.0, 3.0):
+            node = cmds.createNode(self.compat.ADD_NODE_NAME)
+            cmds.connectAttr(plug, "%s.input1" % node)
+            cmds.setAttr("%s.input2" % node, offset)
+            plug = "%s.output" % node
+            chain.append(node)
+        cmds.connectAttr(plug, "%s.tx" % driven)
+
+        merged = self.optimization.merge_node_chains()
+        self.assertEqual(sorted(merged), sorted(chain[:2]))
+        self.assertEqual(cmds.ls(type=self.compat.ADD_NODE_NAME), [chain[-1]])
+        self.assertEqual(cmds.getAttr("%s.input2" % chain[-1]), 6.0)
+        self.assertEqual(
+            cmds.listConnections(
+                "%s.input1" % chain[-1], source=True, destination=False, plugs=True
+            ),
+            ["%s.translateX" % driver],
+        )
+        cmds.setAttr("%s.tx" % driver, 4)
+        self.assertEqual(cmds.getAttr("%s.tx" % driven), 10.0)
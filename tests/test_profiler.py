@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from trigger.core import profiler
+
+
+class BuildProfilerTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.session_path = os.path.join(self.temp_dir, "session.tr")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _build(self, prof, fail=False):
+        action = {"name": "kinematics1", "type": "kinematics"}
+        prof.start()
+        for phase in ["init", "feed", "action"]:
+            with prof.measure(action, phase):
+                pass
+        if fail:
+            with self.assertRaises(RuntimeError):
+                with prof.measure({"name": "weights1", "type": "weights"}, "action"):
+                    raise RuntimeError
+        prof.finish()
+        return prof.write_report(self.session_path)
+
+    def test_report_files(self):
+        report = self._build(profiler.BuildProfiler(cprofile=True), fail=True)
+        statuses = {x["action"]: x["status"] for x in report["actions"]}
+        self.assertEqual(
+            statuses, {"kinematics1": "success", "weights1": "failed at action"}
+        )
+        for suffix in ["_build_report.json", "_build_report.csv", "_build_history.csv"]:
+            self.assertTrue(os.path.isfile(os.path.join(self.temp_dir, "session%s" % suffix)))
+        self.assertTrue(
+            os.path.isfile(os.path.join(self.temp_dir, "session_profiles", "kinematics1.prof"))
+        )
+
+    def test_regressions(self):
+        prof = profiler.BuildProfiler(regression_minimum=0.0)
+        self._build(prof)
+        history = prof.read_history(os.path.join(self.temp_dir, "session_build_history.csv"))
+        self.assertEqual(len(history), 1)
+        prof.records[0]["total"] = float(history[0]["total"]) * 2 + 1.0
+        self.assertEqual(
+            [x["action"] for x in prof.find_regressions(history)], ["kinematics1"]
+        )
+        prof.regression_minimum = 10.0
+        self.assertEqual(prof.find_regressions(history), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
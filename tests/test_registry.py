@@ -0,0 +1,77 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from trigger.core import registry
+
+PLUGIN = """
+BASE_DATA = {"value": %s}
+
+
+class Base(object):
+    data = BASE_DATA
+
+
+class %s(Base):
+    data = BASE_DATA
+"""
+
+
+def get_class(module):
+    return getattr(module, module.__name__.split(".")[-1].capitalize(), None)
+
+
+class PluginRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.package_folder = os.path.join(self.temp_dir, "dummy_plugins")
+        os.mkdir(self.package_folder)
+        with open(os.path.join(self.package_folder, "__init__.py"), "w") as f:
+            f.write("")
+        for name, value in [("first", "1"), ("second", "[1, 2]")]:
+            with open(os.path.join(self.package_folder, "%s.py" % name), "w") as f:
+                f.write(PLUGIN % (value, name.capitalize()))
+        with open(os.path.join(self.package_folder, "helpers.py"), "w") as f:
+            f.write("raise RuntimeError('must not be imported')\n")
+        sys.path.insert(0, self.temp_dir)
+
+    def tearDown(self):
+        sys.path.remove(self.temp_dir)
+        for name in list(sys.modules):
+            if name.startswith("dummy_plugins"):
+                sys.modules.pop(name)
+        shutil.rmtree(self.temp_dir)
+
+    def _registry(self):
+        return registry.PluginRegistry(
+            "dummy_plugins",
+            self.package_folder,
+            resolver=get_class,
+            base_classes=["Base"],
+            data_name="BASE_DATA",
+            data_getter=lambda plugin: plugin.data,
+        )
+
+    def test_lazy_import(self):
+        plugins = self._registry()
+        self.assertEqual(list(plugins), ["first", "second"])
+        self.assertEqual(plugins.get_data("second"), {"value": [1, 2]})
+        self.assertNotIn("dummy_plugins.first", sys.modules)
+        self.assertEqual(plugins["first"].__name__, "First")
+        self.assertTrue(plugins.is_loaded("first"))
+        self.assertFalse(plugins.is_loaded("second"))
+
+    def test_manifest(self):
+        self._registry()
+        manifest_path = os.path.join(self.package_folder, registry.MANIFEST_NAME)
+        self.assertTrue(os.path.isfile(manifest_path))
+        # changed files are parsed again
+        with open(os.path.join(self.package_folder, "first.py"), "w") as f:
+            f.write(PLUGIN % ("'changed'", "First"))
+        self.assertEqual(self._registry().get_data("first"), {"value": "changed"})
+
+
+if __name__ == "__main__":
+    unittest.main()
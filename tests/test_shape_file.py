@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+    from trigger.core import shape_file
+except ImportError:
+    shape_file = None
+
+
+@unittest.skipIf(shape_file is None, "numpy is not available")
+class ShapeFileTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "shapes.trsz")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip(self):
+        rand = np.random.RandomState(0)
+        base_points = rand.random_sample((50, 3))
+        jaw_open = np.zeros((50, 3))
+        jaw_open[[3, 7, 20]] = rand.random_sample((3, 3))
+        targets = [
+            {"name": "jawOpen", "deltas": jaw_open},
+            {
+                "name": "jawOpen50",
+                "target": "jawOpen",
+                "value": 0.5,
+                "indices": [3, 7],
+                "deltas": jaw_open[[3, 7]] * 0.5,
+            },
+        ]
+        shape_file.write(targets, self.file_path, 50, base_points=base_points)
+
+        with shape_file.ShapeFile(self.file_path) as shapes:
+            self.assertEqual(shapes.names, ["jawOpen", "jawOpen50"])
+            self.assertEqual(shapes.targets[1]["target"], "jawOpen")
+            self.assertEqual(shapes.targets[1]["value"], 0.5)
+            indices, deltas = shapes.get_arrays("jawOpen")
+            # only the moving vertices are stored
+            self.assertEqual(indices.tolist(), [3, 7, 20])
+            # deltas are not rounded to single precision
+            self.assertTrue(np.array_equal(shapes.get_deltas("jawOpen"), jaw_open))
+            self.assertTrue(
+                np.allclose(shapes.get_points("jawOpen"), base_points + jaw_open)
+            )
+            self.assertRaises(KeyError, shapes.get_arrays, "smile")
+
+    def test_invalid_extension(self):
+        self.assertRaises(
+            ValueError,
+            shape_file.write,
+            [],
+            os.path.join(self.temp_dir, "shapes.npz"),
+            10,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import random
+import unittest
+
+try:
+    import numpy as np
+    from trigger.objects import weight_matrix
+except ImportError:
+    weight_matrix = None
+
+
+def clamp(num, min_value=0, max_value=1):
+    return max(min(num, max_value), min_value)
+
+
+def synthetic_data(vertex_count, influence_count, seed=0):
+    """Create a deformerWeight formatted dictionary with random sparse weights."""
+    rand = random.Random(seed)
+    weights = []
+    for nmb in range(influence_count):
+        points = [
+            {"index": idx, "value": rand.choice([0.0, 0.5, 1.0, rand.random()])}
+            for idx in range(vertex_count)
+            if rand.random() > 0.3
+        ]
+        weights.append({"source": "joint%i" % nmb, "layer": nmb, "points": points})
+    return {
+        "deformerWeight": {
+            "headerInfo": {},
+            "deformers": [{"name": "skinCluster1"}],
+            "shapes": [{"name": "meshShape", "size": vertex_count}],
+            "weights": weights,
+        }
+    }
+
+
+def reference_clamp_point_weights(data, constant_points):
+    """Per vertex implementation of skin.Weight._clamp_point_weights to compare against."""
+    inf_dict = {}
+    for inf in data["deformerWeight"]["weights"]:
+        inf_dict[inf["source"]] = {p["index"]: p["value"] for p in inf["points"]}
+    for points_data in constant_points:
+        vtx_id = points_data["index"]
+        excess_value = clamp(points_data["value"])
+        vtx_inf_dict = {name: p_dict.get(vtx_id, 0) for name, p_dict in inf_dict.items()}
+        for _inf in reversed(sorted(vtx_inf_dict, key=vtx_inf_dict.get)):
+            original_value = inf_dict[_inf].get(vtx_id, 0)
+            inf_dict[_inf][vtx_id] = clamp(original_value - excess_value)
+            excess_value = clamp(excess_value - original_value)
+    return inf_dict
+
+
+@unittest.skipIf(weight_matrix is None, "numpy is not available")
+class WeightMatrixTests(unittest.TestCase):
+    def test_round_trip(self):
+        data = synthetic_data(200, 5)
+        matrix = weight_matrix.WeightMatrix.from_deformer_weight(data)
+        for weights in data["deformerWeight"]["weights"]:
+            expected = {p["index"]: p["value"] for p in weights["points"] if p["value"]}
+            points = matrix.to_points(weights["source"], sparse=True)
+            self.assertEqual({p["index"]: p["value"] for p in points}, expected)
+
+    def test_sparse_influence(self):
+        data = {
+            "deformerWeight": {
+                "shapes": [{"name": "meshShape", "size": 4}],
+                "weights": [
+                    {
+                        "source": "joint0",
+                        "points": [
+                            {"index": 1, "value": 0.25},
+                            {"index": 3, "value": 1.0},
+                        ],
+                    }
+                ],
+            }
+        }
+        matrix = weight_matrix.WeightMatrix.from_deformer_weight(data)
+        matrix.negate()
+        # missing points are not stored, so they are not negated
+        self.assertEqual(matrix.get_column("joint0").tolist(), [0.0, 0.75, 0.0, 0.0])
+        matrix.subtract(["joint0"], np.array([0.5, 0.5, 0.5, 0.5]), clamp=False)
+        self.assertEqual(matrix.get_column("joint0").tolist(), [0.0, 0.25, 0.0, -0.5])
+        self.assertEqual(
+            matrix.to_points("joint0"),
+            [{"index": 1, "value": 0.25}, {"index": 3, "value": -0.5}],
+        )
+
+    def test_flatten_by_layer(self):
+        matrix = weight_matrix.WeightMatrix(
+            2, ["b", "a"], values=np.array([[1.0, 2.0], [3.0, 4.0]])
+        )
+        self.assertEqual(matrix.flatten(layers=[1, 0]), [2.0, 1.0, 4.0, 3.0])
+
+    def test_redistribute_matches_reference(self):
+        vertex_count = 500
+        data = synthetic_data(vertex_count, 8, seed=3)
+        rand = random.Random(7)
+        constant_points = [
+            {"index": idx, "value": rand.choice([0.5, 1.0, rand.random() * 1.2])}
+            for idx in range(0, vertex_count, 2)
+        ]
+        matrix = weight_matrix.WeightMatrix.from_deformer_weight(data)
+        matrix.redistribute(*weight_matrix.points_to_arrays(constant_points))
+
+        reference = reference_clamp_point_weights(data, constant_points)
+        for name, p_dict in reference.items():
+            expected = weight_matrix.points_to_array(
+                [{"index": k, "value": v} for k, v in p_dict.items()], vertex_count
+            )
+            self.assertTrue(np.array_equal(matrix.get_column(name), expected), name)
+
+
+if __name__ == "__main__":
+    unittest.main()